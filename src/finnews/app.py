@@ -1,5 +1,13 @@
+import argparse, os, traceback
 from news_apis.clients.newsapi_client import NewsAPIClientAdapter
-import predict_text
+from news_apis.clients.marketaux_client import MarketAuxClient
+from news_apis import ingest
+import config
+import metrics
+import near_duplicates
+import pipeline
+import scheduler
+import tickers
 
 # Prefer package import; fall back to relative when run as module
 try:
@@ -7,65 +15,99 @@ try:
 except Exception:
     from .storage import db as store  # type: ignore
 
-def main_loop():
-    try:
-        # Initialize new storage
-        store.init_db()
-        # Optionally migrate legacy URLs once:
-        # store.import_legacy_processed_urls()
+def _newsapi_client():
+    return NewsAPIClientAdapter(rate_limit_s=config.NEWSAPI_RATE_LIMIT_S, burst=config.NEWSAPI_BURST)
 
-        # Initialize adapter and fetch business news
-        adapter = NewsAPIClientAdapter()
-        articles = adapter.top_headlines(categories=['business'], countries=['us'], normalize=True)
+def _marketaux_client():
+    return MarketAuxClient(rate_limit_s=config.MARKETAUX_RATE_LIMIT_S, burst=config.MARKETAUX_BURST)
 
-        news_articles_found = 0
-        for article in articles:
-            url = article.get('url')
-            if not url: continue
-            title = article.get('title') or ''
+def build_fetch_requests():
+    """All provider requests for one ingestion cycle; MarketAux only if a key is configured."""
+    requests = ingest.newsapi_requests(
+        _newsapi_client(),
+        categories=config.NEWS_CATEGORIES,
+        countries=config.NEWS_COUNTRIES,
+        pages=config.FETCH_PAGES,
+    )
+    if os.getenv("MARKETAUX_API_KEY"):
+        requests += ingest.marketaux_requests(
+            _marketaux_client(),
+            symbols=config.MARKETAUX_SYMBOLS,
+            pages=config.FETCH_PAGES,
+        )
+    return requests
 
-            # Check existence before upsert
-            existing_id = store.get_article_id_by_url(url)
+def build_feeds():
+    """Incremental feeds for daemon mode; MarketAux only if a key is configured."""
+    feeds = scheduler.newsapi_feeds(
+        _newsapi_client(),
+        queries=config.NEWSAPI_QUERIES,
+        categories=config.NEWS_CATEGORIES,
+        countries=config.NEWS_COUNTRIES,
+    )
+    if os.getenv("MARKETAUX_API_KEY"):
+        feeds += scheduler.marketaux_feeds(_marketaux_client(), symbols=config.MARKETAUX_SYMBOLS)
+    return feeds
 
-            # Normalize fields
-            provider = "newsapi"
-            external_id = None
-            published_at = article.get('published_at')
-            source = article.get('source')
-            language = article.get('language')
-            tickers = article.get('tickers')
+def run_daemon():
+    store.init_db()
+    scheduler.Scheduler(build_feeds()).run_forever()
 
-            article_id = store.upsert_article(
-                provider=provider,
-                external_id=external_id,
-                url=url,
-                title=title,
-                published_at=published_at,
-                source=source,
-                language=language,
-                tickers=tickers,
-                raw_obj=article.get('_raw', article),
-            )
-
-            is_new = existing_id is None
-            if is_new:
-                news_articles_found += 1
-                print(f"  -> New article added: {title} (URL: {url})")
-
-            sentiment = predict_text.predict_sentiment(title)
-            print(f"  -> Sentiment: {sentiment.upper()}")
+def main_loop():
+    try:
+        with metrics.timer("finnews_cycle_seconds", mode="once"):
+            # Initialize new storage
+            store.init_db()
+            # Optionally migrate legacy URLs once:
+            # store.import_legacy_processed_urls()
 
-            # Save sentiment if not already present
-            if not store.has_sentiment(article_id):
-                store.save_sentiment(article_id=article_id, engine="predict_text", score=None, label=sentiment)
+            # Fetch, dedupe, score and store as overlapping stages
+            stats = pipeline.build_ingestion_pipeline(build_fetch_requests()).run()
+        for name, stage_stats in stats.items():
+            print(f"  [{name}] {stage_stats}")
 
-            if sentiment in ['positive', 'negative']:
-                print(f"  ALERT: {title} has a {sentiment} sentiment.")
+        news_articles_found = stats["writer"].get("new_articles", 0)
         if news_articles_found == 0:
             print("No new articles found or all articles have been processed.")
 
     except Exception as e:
         print(f"An error occurred in the main loop: {e}")
+        traceback.print_exc()
+    finally:
+        metrics.print_summary()
+        if config.METRICS_PATH:
+            metrics.write_textfile(config.METRICS_PATH)
 
 if __name__ == "__main__":
-    main_loop()
+    parser = argparse.ArgumentParser(description="FinNews ingestion pipeline")
+    parser.add_argument("--daemon", action="store_true", help="poll providers continuously using stored watermarks")
+    parser.add_argument("--rebuild-rollups", action="store_true", help="recompute sentiment rollup tables and exit")
+    parser.add_argument("--compact-raw", action="store_true", help="recompress raw payloads with a trained dictionary and VACUUM")
+    parser.add_argument("--backfill-tickers", action="store_true", help="re-tag stored articles into article_tickers and exit")
+    parser.add_argument("--index-titles", action="store_true", help="add stored titles to the near-duplicate index and exit")
+    parser.add_argument("--trace", metavar="PATH", help="cProfile one ingestion run (all threads) and write the stats to PATH")
+    args = parser.parse_args()
+    if config.METRICS_PORT:
+        metrics.serve(config.METRICS_PORT)
+    if args.compact_raw:
+        store.init_db()
+        dict_id, rewritten = store.default_store().compact_raw_payloads()
+        store.default_store().vacuum()
+        print(f"Recompressed {rewritten} raw payload(s) with dictionary {dict_id}.")
+    elif args.backfill_tickers:
+        store.init_db()
+        print(f"Tagged {tickers.backfill_tickers(store.default_store())} article(s).")
+        print(f"Rebuilt rollups from {store.rebuild_rollups()} sentiment(s).")
+    elif args.index_titles:
+        store.init_db()
+        print(f"Indexed {near_duplicates.backfill_index(store.default_store())} title(s).")
+    elif args.rebuild_rollups:
+        store.init_db()
+        print(f"Rebuilt rollups from {store.rebuild_rollups()} sentiment(s).")
+    elif args.daemon:
+        run_daemon()
+    elif args.trace:
+        with metrics.trace(args.trace):
+            main_loop()
+    else:
+        main_loop()
@@ -0,0 +1,186 @@
+"""
+Article body text, so scoring is not limited to the headline.
+
+Pages go through an on-disk HTML cache (one gzip file per url), so each
+article is downloaded at most once. Cache misses are served by the
+configured source: "http" downloads the page, "none" reads the cache only,
+and any other value is a directory of recorded pages listed in its
+index.json ({url: file name}), used by the tests and for offline runs.
+
+    python src/finnews/article_body.py https://example.com/story   # print the extracted text
+"""
+import gzip, hashlib, json, os, sys, threading
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional
+
+import config
+
+# Elements whose text is never article prose
+_SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "nav", "header", "footer", "aside", "form", "button", "figure"}
+_BLOCK_TAGS = {"p", "li", "blockquote", "h2", "h3"}
+# Paragraphs with fewer words are navigation, bylines, "Share" buttons and the like
+MIN_PARAGRAPH_WORDS = 6
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.skip = 0
+        self.article = 0
+        self.block: Optional[List[str]] = None
+        self.block_in_article = False
+        self.paragraphs: List[str] = []
+        self.article_paragraphs: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self.skip += 1
+        elif tag in ("article", "main"):
+            self.article += 1
+        elif tag in _BLOCK_TAGS and not self.skip:
+            self._flush()
+            self.block, self.block_in_article = [], self.article > 0
+        elif tag == "br" and self.block is not None:
+            self.block.append(" ")
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self.skip = max(0, self.skip - 1)
+        elif tag in ("article", "main"):
+            self.article = max(0, self.article - 1)
+        elif tag in _BLOCK_TAGS:
+            self._flush()
+
+    def handle_data(self, data):
+        if self.block is not None and not self.skip:
+            self.block.append(data)
+
+    def _flush(self):
+        if self.block is None:
+            return
+        text = " ".join("".join(self.block).split())
+        if len(text.split()) >= MIN_PARAGRAPH_WORDS:
+            self.paragraphs.append(text)
+            if self.block_in_article:
+                self.article_paragraphs.append(text)
+        self.block = None
+
+
+def extract_text(html: str) -> str:
+    """
+    Main text of a page: its paragraphs, preferring those inside
+    <article>/<main>, with scripts, navigation and other chrome dropped.
+    """
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    parser._flush()
+    return "\n\n".join(parser.article_paragraphs or parser.paragraphs)
+
+
+def url_key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+
+
+class HtmlCache:
+    """Gzipped pages under root/<key[:2]>/<key>.html.gz."""
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or config.BODY_CACHE_PATH
+
+    def _path(self, url: str) -> str:
+        key = url_key(url)
+        return os.path.join(self.root, key[:2], f"{key}.html.gz")
+
+    def get(self, url: str) -> Optional[str]:
+        try:
+            with gzip.open(self._path(url), "rt", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, url: str, html: str) -> None:
+        path = self._path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            f.write(html)
+        os.replace(tmp, path)
+
+
+class HttpSource:
+    def __init__(self, *, timeout_s: float = 10.0):
+        import requests
+
+        self.timeout_s = timeout_s
+        self.s = requests.Session()
+        self.s.headers.update({"User-Agent": "Mozilla/5.0 (compatible; finnews/0.1)"})
+
+    def fetch(self, url: str) -> Optional[str]:
+        try:
+            r = self.s.get(url, timeout=self.timeout_s)
+            r.raise_for_status()
+        except Exception as e:
+            print(f"  -> Body fetch failed for {url}: {e}")
+            return None
+        if "html" not in r.headers.get("Content-Type", "html") or len(r.content) > MAX_PAGE_BYTES:
+            return None
+        return r.text
+
+
+class FixtureSource:
+    """Recorded pages: root/index.json maps each url to a file in root."""
+    def __init__(self, root: str):
+        self.root = root
+        with open(os.path.join(root, "index.json"), "r", encoding="utf-8") as f:
+            self.index: Dict[str, str] = json.load(f)
+
+    def fetch(self, url: str) -> Optional[str]:
+        name = self.index.get(url)
+        if name is None:
+            return None
+        with open(os.path.join(self.root, name), "r", encoding="utf-8") as f:
+            return f.read()
+
+
+class BodyFetcher:
+    """source is anything with fetch(url) -> html or None; None reads the cache only."""
+    def __init__(self, cache: Optional[HtmlCache] = None, source: Any = None):
+        self.cache = cache or HtmlCache()
+        self.source = source
+
+    def html(self, url: str) -> Optional[str]:
+        html = self.cache.get(url)
+        if html is None and self.source is not None:
+            html = self.source.fetch(url)
+            if html is not None:
+                self.cache.put(url, html)
+        return html
+
+    def body(self, url: str) -> Optional[str]:
+        """Extracted text of the page at url, or None when unavailable."""
+        html = self.html(url)
+        return (extract_text(html) or None) if html else None
+
+
+def get_fetcher() -> BodyFetcher:
+    """Fetcher for config.BODY_SOURCE over config.BODY_CACHE_PATH."""
+    source = config.BODY_SOURCE
+    if source == "http":
+        return BodyFetcher(source=HttpSource())
+    if source == "none":
+        return BodyFetcher()
+    return BodyFetcher(source=FixtureSource(source))
+
+
+def document_text(row: Dict[str, Any]) -> str:
+    """
+    What gets scored: the title, followed by the body when one was fetched
+    (after a blank line, where predict_text splits them to window each on its own).
+    """
+    return "\n\n".join(part for part in (row.get("title") or "", row.get("body") or "") if part)
+
+
+if __name__ == "__main__":
+    for url in sys.argv[1:]:
+        print(get_fetcher().body(url) or f"(no text for {url})")
@@ -0,0 +1,210 @@
+"""
+Local columnar store for OHLCV price bars.
+
+Each symbol is a directory of raw column files: ts.i64 (epoch seconds,
+strictly increasing) and open/high/low/close/volume.f32. Files are only
+ever appended to (after cutting off rows an interrupted append left without
+a timestamp) and are read through np.memmap, so a lookup touches a few
+pages of one symbol's history instead of loading it. As-of lookups are a
+binary search (np.searchsorted) over the ts column, vectorized over as many
+timestamps as are asked for at once.
+
+    python src/finnews/bar_store.py ingest data/minute_bars/   # CSV/Parquet, see price_moves.load_bars
+    python src/finnews/bar_store.py info
+"""
+import argparse, os, threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import config
+
+TS_FILE = "ts.i64"
+VALUE_COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+def to_epoch_s(values) -> np.ndarray:
+    """Datetimes (tz-aware or naive UTC) or epoch seconds as int64 epoch seconds."""
+    arr = np.asarray(values)
+    if np.issubdtype(arr.dtype, np.integer):
+        return arr.astype("int64")
+    return pd.to_datetime(pd.Series(values), utc=True).to_numpy("datetime64[s]").astype("int64")
+
+
+class BarStore:
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or config.BAR_STORE_PATH
+        # symbol -> (row count, {column: memmap}) for the files as last opened
+        self._maps: Dict[str, Tuple[int, Dict[str, np.ndarray]]] = {}
+        self._lock = threading.Lock()
+
+    def _dir(self, symbol: str) -> str:
+        return os.path.join(self.root, symbol.upper())
+
+    def symbols(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(d for d in os.listdir(self.root) if os.path.exists(os.path.join(self.root, d, TS_FILE)))
+
+    def _columns(self, symbol: str) -> Dict[str, np.ndarray]:
+        """Read-only memmaps of every column, reopened when an append grew the files."""
+        path = os.path.join(self._dir(symbol), TS_FILE)
+        if not os.path.exists(path):
+            return {}
+        # Values are written before ts, so ts bounds the rows that are complete
+        n = os.path.getsize(path) // 8
+        cached = self._maps.get(symbol.upper())
+        if cached is not None and cached[0] == n:
+            return cached[1]
+        if n == 0:
+            cols = {"ts": np.empty(0, "int64"), **{c: np.empty(0, "float32") for c in VALUE_COLUMNS}}
+        else:
+            cols = {"ts": np.memmap(path, dtype="int64", mode="r", shape=(n,))}
+            for c in VALUE_COLUMNS:
+                cols[c] = np.memmap(os.path.join(self._dir(symbol), f"{c}.f32"), dtype="float32", mode="r", shape=(n,))
+        with self._lock:
+            self._maps[symbol.upper()] = (n, cols)
+        return cols
+
+    def __len__(self) -> int:
+        return sum(len(self._columns(s).get("ts", ())) for s in self.symbols())
+
+    def append(self, symbol: str, ts, **values) -> int:
+        """
+        Append bars for one symbol. ts is epoch seconds or datetimes; values
+        are the VALUE_COLUMNS (missing ones are stored as NaN). Bars at or
+        before the last stored timestamp are dropped. Returns rows appended.
+        """
+        ts = to_epoch_s(ts)
+        order = np.argsort(ts, kind="stable")
+        ts = ts[order]
+        cols = {c: np.asarray(values[c], dtype="float32")[order] if c in values
+                else np.full(len(ts), np.nan, dtype="float32") for c in VALUE_COLUMNS}
+
+        with self._lock:
+            self._repair(self._dir(symbol))
+            last = self._last_ts(symbol)
+            keep = np.ones(len(ts), dtype=bool)
+            if len(ts):
+                keep[1:] = ts[1:] > ts[:-1]
+            if last is not None:
+                keep &= ts > last
+            if not keep.any():
+                return 0
+            d = self._dir(symbol)
+            os.makedirs(d, exist_ok=True)
+            for c in VALUE_COLUMNS:
+                with open(os.path.join(d, f"{c}.f32"), "ab") as f:
+                    f.write(cols[c][keep].tobytes())
+            with open(os.path.join(d, TS_FILE), "ab") as f:
+                f.write(ts[keep].tobytes())
+            return int(keep.sum())
+
+    @staticmethod
+    def _repair(d: str) -> None:
+        """
+        Cut every column back to the rows ts.i64 completes. A crash between
+        the value writes and the ts write leaves extra value rows, which the
+        next append would otherwise shift every later bar behind.
+        """
+        path = os.path.join(d, TS_FILE)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        n = size // 8
+        if size != n * 8:
+            os.truncate(path, n * 8)
+        for c in VALUE_COLUMNS:
+            col = os.path.join(d, f"{c}.f32")
+            have = os.path.getsize(col) if os.path.exists(col) else 0
+            if have > n * 4:
+                os.truncate(col, n * 4)
+            elif have < n * 4:
+                # Not written by append() (a copied or damaged store): keep the rows aligned with NaN
+                if os.path.exists(col):
+                    os.truncate(col, have // 4 * 4)
+                with open(col, "ab") as f:
+                    f.write(np.full(n - have // 4, np.nan, dtype="float32").tobytes())
+
+    def _last_ts(self, symbol: str) -> Optional[int]:
+        path = os.path.join(self._dir(symbol), TS_FILE)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size < 8:
+            return None
+        with open(path, "rb") as f:
+            f.seek(size - 8)
+            return int(np.frombuffer(f.read(8), dtype="int64")[0])
+
+    def append_frame(self, bars: pd.DataFrame) -> int:
+        """Append a symbol/ts/open/high/low/close/volume frame (as from price_moves.load_bars)."""
+        written = 0
+        for symbol, group in bars.groupby("symbol", sort=False):
+            written += self.append(
+                str(symbol), group["ts"], **{c: group[c].to_numpy() for c in VALUE_COLUMNS if c in group}
+            )
+        return written
+
+    def bars(self, symbol: str, start=None, end=None) -> Dict[str, np.ndarray]:
+        """Column views for start <= ts < end (epoch seconds or datetimes), without copying."""
+        cols = self._columns(symbol)
+        if not cols:
+            return {}
+        ts = cols["ts"]
+        lo = 0 if start is None else int(np.searchsorted(ts, to_epoch_s([start])[0], side="left"))
+        hi = len(ts) if end is None else int(np.searchsorted(ts, to_epoch_s([end])[0], side="left"))
+        return {c: a[lo:hi] for c, a in cols.items()}
+
+    def asof(
+        self, symbol: str, ts, *, column: str = "close", tolerance_s: Optional[float] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        For each timestamp, the last bar at or before it: (bar epoch
+        seconds, value). Where there is none, or it is more than
+        tolerance_s old, the bar time is -1 and the value NaN.
+        """
+        t = to_epoch_s(ts)
+        bar_ts = np.full(len(t), -1, dtype="int64")
+        out = np.full(len(t), np.nan, dtype="float64")
+        cols = self._columns(symbol)
+        if not cols or not len(cols["ts"]):
+            return bar_ts, out
+        idx = np.searchsorted(cols["ts"], t, side="right") - 1
+        ok = idx >= 0
+        found = cols["ts"][idx[ok]]
+        if tolerance_s is not None:
+            fresh = t[ok] - found <= tolerance_s
+            ok[ok] = fresh
+            found = found[fresh]
+        bar_ts[ok] = found
+        out[ok] = cols[column][idx[ok]]
+        return bar_ts, out
+
+    def asof_many(
+        self, symbols, ts, *, column: str = "close", tolerance_s: Optional[float] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """asof over mixed (symbol, timestamp) pairs, one vectorized search per symbol."""
+        symbols = np.asarray([s.upper() for s in symbols])
+        t = to_epoch_s(ts)
+        bar_ts = np.full(len(t), -1, dtype="int64")
+        out = np.full(len(t), np.nan, dtype="float64")
+        for symbol in np.unique(symbols):
+            mask = symbols == symbol
+            bar_ts[mask], out[mask] = self.asof(str(symbol), t[mask], column=column, tolerance_s=tolerance_s)
+        return bar_ts, out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Columnar price bar store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ingest = sub.add_parser("ingest", help="append bars from a CSV/Parquet file or directory")
+    ingest.add_argument("path")
+    sub.add_parser("info", help="bars stored per symbol")
+    args = parser.parse_args()
+
+    bar_store = BarStore()
+    if args.command == "ingest":
+        import price_moves
+        print(f"Appended {bar_store.append_frame(price_moves.load_bars(args.path))} bar(s) to {bar_store.root}.")
+    else:
+        for s in bar_store.symbols():
+            ts = bar_store.bars(s)["ts"]
+            print(f"{s:>8} {len(ts):>10} {pd.to_datetime(ts[0], unit='s')} .. {pd.to_datetime(ts[-1], unit='s')}")
@@ -0,0 +1,99 @@
+"""
+Compare inference backends on dev/data/sentiment_data.csv.
+
+For each backend that can be loaded (torch, onnx, onnx-int8, student) reports
+single-sentence latency (p50/p99), batched throughput, accuracy against the
+dataset labels, and the accuracy delta / label agreement versus PyTorch.
+
+Run:
+  python src/finnews/benchmark_backends.py --n 1000 --json bench_backends.json
+"""
+import argparse, json, statistics, time
+from typing import Any, Dict, List
+
+import pandas as pd
+
+import config
+import onnx_backend
+import predict_text
+
+
+def _percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def load_predictor(backend: str) -> predict_text.SentimentPredictor:
+    if backend == "torch":
+        return predict_text.SentimentPredictor(config.MODEL_PATH)
+    if backend == "student":
+        import student_model
+        return student_model.StudentPredictor(config.STUDENT_MODEL_PATH)
+    return onnx_backend.OnnxSentimentPredictor(config.MODEL_PATH, quantized=backend == "onnx-int8")
+
+
+def bench(predictor: predict_text.SentimentPredictor, texts: List[str], labels: List[str],
+          *, single_n: int, batch_size: int) -> Dict[str, Any]:
+    predictor.predict_batch(texts[:batch_size], batch_size=batch_size)  # warm up
+
+    latencies = []
+    for text in texts[:single_n]:
+        t0 = time.perf_counter()
+        predictor.predict(text)
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    preds = predictor.predict_batch(texts, batch_size=batch_size)
+    elapsed = time.perf_counter() - t0
+
+    return {
+        "single_p50_ms": round(statistics.median(latencies), 3),
+        "single_p99_ms": round(_percentile(latencies, 0.99), 3),
+        "batch_throughput_per_s": round(len(texts) / elapsed, 1),
+        "accuracy": round(sum(p == y for p, y in zip(preds, labels)) / len(labels), 4),
+        "predictions": preds,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark inference backends")
+    parser.add_argument("--n", type=int, default=1000, help="sentences to score")
+    parser.add_argument("--single-n", type=int, default=200, help="sentences timed one at a time")
+    parser.add_argument("--batch-size", type=int, default=predict_text.DEFAULT_BATCH_SIZE)
+    parser.add_argument("--backends", default="torch,onnx,onnx-int8,student")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    df = pd.read_csv(config.PROJECT_ROOT / "dev" / "data" / "sentiment_data.csv", encoding="latin1").dropna()
+    df = df.sample(n=min(args.n, len(df)), random_state=42)
+    texts, labels = df["Sentence"].tolist(), df["Sentiment"].tolist()
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for backend in [b.strip() for b in args.backends.split(",") if b.strip()]:
+        try:
+            predictor = load_predictor(backend)
+        except (ImportError, FileNotFoundError) as e:
+            print(f"[{backend}] skipped: {e}")
+            continue
+        results[backend] = bench(predictor, texts, labels, single_n=args.single_n, batch_size=args.batch_size)
+
+    reference = results.get("torch")
+    print(f"\n{'backend':<10} {'p50 ms':>8} {'p99 ms':>8} {'items/s':>9} {'acc':>7} {'Δacc':>7} {'agree':>7}")
+    for backend, r in results.items():
+        if reference:
+            r["accuracy_delta"] = round(r["accuracy"] - reference["accuracy"], 4)
+            r["agreement_with_torch"] = round(
+                sum(a == b for a, b in zip(r["predictions"], reference["predictions"])) / len(texts), 4)
+        print(f"{backend:<10} {r['single_p50_ms']:>8} {r['single_p99_ms']:>8} {r['batch_throughput_per_s']:>9} "
+              f"{r['accuracy']:>7} {r.get('accuracy_delta', ''):>7} {r.get('agreement_with_torch', ''):>7}")
+
+    for r in results.values():
+        r.pop("predictions")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"n": len(texts), "batch_size": args.batch_size, "results": results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""
+Offline, reproducible benchmarks of the ingestion hot paths.
+
+Articles come from a seeded synthetic generator shaped like the recorded
+provider responses in test/fixtures/providers, so no API keys or network
+are needed, and storage runs against a temporary database (the real one
+is never touched). Per stage it reports p50/p99 latency of one call and
+throughput:
+
+    normalize          provider payload -> common article dict
+    upsert_article     one article per call
+    save_sentiment     one sentiment per call
+    predict_single     predict_sentiment, one text per call
+    predict_batched    predict_sentiment_batch, batch_size texts per call
+    dashboard_*        the dashboard's feed page, keyset paging, label filter and trend
+
+Results are written as JSON; against a saved baseline, stages slower (or
+with lower throughput) than the thresholds allow are listed and the run
+exits with status 1.
+
+Run:
+  python src/finnews/benchmark_suite.py --json bench.json --save-baseline dev/bench_baseline.json
+  python src/finnews/benchmark_suite.py --baseline dev/bench_baseline.json
+"""
+import argparse, copy, json, platform, random, sqlite3, statistics, sys, tempfile, time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import predict_text
+from news_apis.clients.marketaux_client import MarketAuxClient
+from news_apis.clients.newsapi_client import NewsAPIClientAdapter
+
+# Prefer package import; fall back to relative when run as module
+try:
+    from storage import db as store
+except Exception:
+    from .storage import db as store  # type: ignore
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "test" / "fixtures" / "providers"
+FEED_PAGE_SIZE = 100  # dashboard.PAGE_SIZE
+
+_NORMALIZERS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "newsapi": NewsAPIClientAdapter._normalize_article,
+    "marketaux": MarketAuxClient._normalize_article,
+}
+
+_COMPANIES = [
+    ("Apple", "AAPL"), ("Microsoft", "MSFT"), ("Nvidia", "NVDA"), ("Amazon", "AMZN"), ("Tesla", "TSLA"),
+    ("Boeing", "BA"), ("JPMorgan", "JPM"), ("Exxon Mobil", "XOM"), ("Pfizer", "PFE"), ("Walmart", "WMT"),
+    ("Nokia", "NOK"), ("Intel", "INTC"),
+]
+_EVENTS = [
+    "shares rise {pct}% after record quarterly revenue",
+    "shares fall {pct}% after a profit warning",
+    "beats estimates as sales grow {pct}%",
+    "cuts its full-year forecast by {pct}%",
+    "to hold its annual meeting in {month}",
+    "announces a {pct}% dividend increase",
+    "says operating profit fell {pct}% in {month}",
+    "plans to cut {pct}% of its workforce",
+    "completes acquisition announced in {month}",
+    "stock unchanged ahead of {month} earnings",
+]
+_MONTHS = ["January", "February", "March", "April", "May", "June",
+           "July", "August", "September", "October", "November", "December"]
+_LABELS = ["positive", "negative", "neutral"]
+
+
+# ---------------------------------------------------------------------------
+# Inputs
+# ---------------------------------------------------------------------------
+
+def load_fixtures() -> Dict[str, List[Dict[str, Any]]]:
+    """Recorded provider responses as {provider: [raw article payload]}."""
+    with open(FIXTURES_DIR / "newsapi_top_headlines.json", encoding="utf-8") as f:
+        newsapi = json.load(f)["articles"]
+    with open(FIXTURES_DIR / "marketaux_news_all.json", encoding="utf-8") as f:
+        marketaux = json.load(f)["data"]
+    return {"newsapi": newsapi, "marketaux": marketaux}
+
+
+def synthetic_payloads(n: int, *, seed: int = 42) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    n (provider, raw payload) pairs, alternating providers. Each payload is
+    a recorded fixture article with a generated headline, url, timestamp
+    and ticker; the same seed always gives the same articles.
+    """
+    rng = random.Random(seed)
+    fixtures = load_fixtures()
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    out = []
+    for i in range(n):
+        company, symbol = rng.choice(_COMPANIES)
+        title = f"{company} " + rng.choice(_EVENTS).format(pct=round(rng.uniform(0.5, 25), 1), month=rng.choice(_MONTHS))
+        published = start + timedelta(seconds=rng.randrange(90 * 24 * 3600))
+        slug = "-".join(title.lower().replace("%", "").split())
+        provider = "marketaux" if i % 2 else "newsapi"
+        a = copy.deepcopy(rng.choice(fixtures[provider]))
+        a["title"] = title
+        if provider == "newsapi":
+            a["url"] = f"https://news.example.com/{published:%Y/%m/%d}/{slug}-{i}"
+            a["publishedAt"] = f"{published:%Y-%m-%dT%H:%M:%SZ}"
+        else:
+            a["url"] = f"https://markets.example.com/story/{slug}-{i}"
+            a["published_at"] = f"{published:%Y-%m-%dT%H:%M:%S}.000000Z"
+            a["uuid"] = f"synthetic-{seed}-{i}"
+            for e in a["entities"][:1]:
+                e["symbol"], e["name"] = symbol, company
+        out.append((provider, a))
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Timing
+# ---------------------------------------------------------------------------
+
+def _percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def _summary(latencies_ms: List[float], items: int, elapsed_s: float) -> Dict[str, Any]:
+    return {
+        "calls": len(latencies_ms),
+        "items": items,
+        "p50_ms": round(statistics.median(latencies_ms), 4),
+        "p99_ms": round(_percentile(latencies_ms, 0.99), 4),
+        "throughput_per_s": round(items / elapsed_s, 1) if elapsed_s else None,
+    }
+
+
+def timed(fn: Callable[[Any], Any], args: Sequence[Any], *, items_per_call: Callable[[Any], int] = lambda _: 1) -> Dict[str, Any]:
+    """Call fn(arg) for each arg; latency per call, throughput in items per second."""
+    latencies, items = [], 0
+    t_start = time.perf_counter()
+    for arg in args:
+        t0 = time.perf_counter()
+        fn(arg)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        items += items_per_call(arg)
+    return _summary(latencies, items, time.perf_counter() - t_start)
+
+
+# ---------------------------------------------------------------------------
+# Stages
+# ---------------------------------------------------------------------------
+
+def normalize(provider: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    return {**_NORMALIZERS[provider](payload), "provider": provider}
+
+
+def bench_normalize(payloads: List[Tuple[str, Dict[str, Any]]], *, rounds: int = 5) -> Dict[str, Dict[str, Any]]:
+    # Microseconds per call, so several passes to steady the throughput figure
+    return {"normalize": timed(lambda p: normalize(*p), payloads * rounds)}
+
+
+def bench_storage(articles: List[Dict[str, Any]], *, seed: int = 42, repeats: int = 50) -> Dict[str, Dict[str, Any]]:
+    """Writes and dashboard reads of articles against a fresh temporary database."""
+    rng = random.Random(seed)
+    results: Dict[str, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory() as root:
+        st = store.Store(str(Path(root) / "bench.db"))
+        st.init_db()
+        ids: List[int] = []
+        results["upsert_article"] = timed(lambda a: ids.append(st.upsert_article(
+            provider=a["provider"], external_id=a.get("external_id"), url=a["url"], title=a["title"],
+            published_at=a["published_at"], source=a["source"], language=a["language"],
+            tickers=a["tickers"], raw_obj=a["_raw"],
+        )), articles)
+
+        sentiments = []
+        for article_id in ids:
+            weights = [rng.random() for _ in _LABELS]
+            probs = {label: w / sum(weights) for label, w in zip(_LABELS, weights)}
+            label = max(probs, key=probs.__getitem__)
+            sentiments.append((article_id, label, probs))
+        results["save_sentiment"] = timed(lambda s: st.save_sentiment(
+            s[0], "predict_text", s[2][s[1]], s[1], s[2], model_version="bench"), sentiments)
+
+        results["dashboard_first_page"] = timed(
+            lambda _: st.articles_page(limit=FEED_PAGE_SIZE), range(repeats), items_per_call=lambda _: FEED_PAGE_SIZE)
+        results["dashboard_label_page"] = timed(
+            lambda _: st.articles_page(limit=FEED_PAGE_SIZE, label="negative"), range(repeats),
+            items_per_call=lambda _: FEED_PAGE_SIZE)
+
+        # Walk the whole feed the way "load more" does
+        cursor: List[Optional[Tuple[str, int]]] = [None]
+        def next_page(_):
+            rows = st.articles_page(after=cursor[0], limit=FEED_PAGE_SIZE)
+            if rows:
+                cursor[0] = (rows[-1]["sort_at"], int(rows[-1]["id"]))
+            return rows
+        pages = -(-len(articles) // FEED_PAGE_SIZE)
+        results["dashboard_keyset_pages"] = timed(next_page, range(pages), items_per_call=lambda _: FEED_PAGE_SIZE)
+        results["dashboard_keyset_pages"]["items"] = len(articles)
+
+        results["dashboard_trend"] = timed(lambda _: st.sentiment_trend("day"), range(repeats))
+        st.close()
+    return results
+
+
+def bench_inference(texts: List[str], *, single_n: int, batch_size: int) -> Dict[str, Dict[str, Any]]:
+    """
+    The configured predictor, one text at a time and in batches. The two
+    runs score disjoint texts so the window cache cannot favour either.
+    """
+    single, batched = texts[:single_n], texts[single_n:]
+    predict_text.warmup()
+    return {
+        "predict_single": timed(predict_text.predict_sentiment, single),
+        "predict_batched": timed(
+            lambda chunk: predict_text.predict_sentiment_batch(chunk, batch_size=batch_size),
+            [batched[i:i + batch_size] for i in range(0, len(batched), batch_size)],
+            items_per_call=len,
+        ),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Baseline comparison
+# ---------------------------------------------------------------------------
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    *,
+    max_p50_increase: float = 0.25,
+    max_p99_increase: float = 0.5,
+    max_throughput_drop: float = 0.2,
+    min_delta_ms: float = 0.5
+) -> List[str]:
+    """
+    Regressions of current against baseline, one line each. Latency
+    increases smaller than min_delta_ms are ignored as timer noise; stages
+    missing from either run are not compared.
+    """
+    regressions = []
+    for name, base in baseline["results"].items():
+        cur = current["results"].get(name)
+        if cur is None:
+            continue
+        for metric, limit in (("p50_ms", max_p50_increase), ("p99_ms", max_p99_increase)):
+            b, c = base.get(metric), cur.get(metric)
+            if b and c and c > b * (1 + limit) and c - b > min_delta_ms:
+                regressions.append(f"{name} {metric}: {b} -> {c} (+{c / b - 1:.0%}, limit +{limit:.0%})")
+        b, c = base.get("throughput_per_s"), cur.get("throughput_per_s")
+        if b and c and c < b * (1 - max_throughput_drop):
+            regressions.append(f"{name} throughput_per_s: {b} -> {c} ({c / b - 1:.0%}, limit -{max_throughput_drop:.0%})")
+    return regressions
+
+
+def run(*, n: int, seed: int, stages: Sequence[str], single_n: int, batch_size: int) -> Dict[str, Any]:
+    payloads = synthetic_payloads(n + single_n, seed=seed)
+    articles = [normalize(*p) for p in payloads[:n]]
+    results: Dict[str, Dict[str, Any]] = {}
+    if "normalize" in stages:
+        results.update(bench_normalize(payloads[:n]))
+    if "storage" in stages:
+        results.update(bench_storage(articles, seed=seed))
+    meta: Dict[str, Any] = {
+        "n": n, "seed": seed, "batch_size": batch_size, "single_n": single_n,
+        "python": platform.python_version(), "sqlite": sqlite3.sqlite_version, "platform": platform.platform(),
+        "timestamp": store.now_iso(),
+    }
+    if "inference" in stages:
+        try:
+            results.update(bench_inference([p[1]["title"] for p in payloads], single_n=single_n, batch_size=batch_size))
+            meta["predictor_version"] = predict_text.predictor_version()
+        except (ImportError, OSError) as e:
+            # No model files or inference dependencies here
+            print(f"[inference] skipped: {e}")
+    return {"meta": meta, "results": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline benchmarks of ingestion, inference and storage")
+    parser.add_argument("--n", type=int, default=2000, help="synthetic articles")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--stages", default="normalize,storage,inference")
+    parser.add_argument("--single-n", type=int, default=200, help="texts scored one at a time")
+    parser.add_argument("--batch-size", type=int, default=predict_text.DEFAULT_BATCH_SIZE)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--save-baseline", help="also write results to this baseline file")
+    parser.add_argument("--baseline", help="compare against this baseline and exit 1 on regressions")
+    parser.add_argument("--max-p50-increase", type=float, default=0.25)
+    parser.add_argument("--max-p99-increase", type=float, default=0.5)
+    parser.add_argument("--max-throughput-drop", type=float, default=0.2)
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="latency increases below this are noise")
+    args = parser.parse_args()
+
+    report = run(n=args.n, seed=args.seed, stages=[s.strip() for s in args.stages.split(",")],
+                 single_n=args.single_n, batch_size=args.batch_size)
+
+    print(f"\n{'stage':<24} {'calls':>7} {'p50 ms':>9} {'p99 ms':>9} {'items/s':>10}")
+    for name, r in report["results"].items():
+        print(f"{name:<24} {r['calls']:>7} {r['p50_ms']:>9} {r['p99_ms']:>9} {r['throughput_per_s']:>10}")
+
+    for path in (args.json, args.save_baseline):
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            print(f"Results written to {path}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["meta"].get("n") != args.n:
+            print(f"Warning: baseline ran {baseline['meta'].get('n')} articles, this run {args.n}")
+        regressions = compare(report, baseline, max_p50_increase=args.max_p50_increase,
+                              max_p99_increase=args.max_p99_increase, max_throughput_drop=args.max_throughput_drop,
+                              min_delta_ms=args.min_delta_ms)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Confidence-gated cascade: a cheap first stage labels every text and only
+the uncertain ones go to the transformer.
+
+The first stage is a student_model.HashedLinearModel: the distilled
+student from distill.py, or one trained straight from the labeled CSV
+with `cascade.py train`. A text whose first-stage confidence (top class
+probability) is below config.CASCADE_THRESHOLD is escalated to the
+configured transformer backend. Every result records the stage that
+decided it ("fast" or "model"), and the cascade counts items and
+escalations, plus the results the sentiment cache served without asking
+it (record_cached). stats() is reported with the pipeline's inference
+stage and the counts are exported as finnews_cascade_items_total.
+
+Enable with FINNEWS_CASCADE=1; predict_text.predict_sentiment_scores then
+routes through get_cascade().
+
+    python src/finnews/cascade.py train                  # first stage from dev/data/sentiment_data.csv
+    python src/finnews/cascade.py sweep --with-model     # accuracy vs escalation rate per threshold
+    python src/finnews/cascade.py stats                  # stored sentiments per deciding stage
+"""
+import argparse, json, threading
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+import config
+import metrics
+import predict_text
+import student_model
+
+FAST, MODEL = "fast", "model"
+
+
+class CascadePredictor:
+    """
+    first_stage: a StudentPredictor. escalate(texts, batch_size) returns
+    SentimentPredictor.predict_scores-style results for the uncertain texts.
+    """
+    def __init__(
+        self,
+        first_stage: "student_model.StudentPredictor",
+        escalate: Callable[..., List[Dict[str, Any]]],
+        *,
+        threshold: float = 0.9
+    ):
+        self.first_stage = first_stage
+        self.escalate = escalate
+        self.threshold = threshold
+        self.items = 0
+        self.escalated = 0
+        self._lock = threading.Lock()
+
+    def predict_scores(self, texts: List[str], batch_size: int = predict_text.DEFAULT_BATCH_SIZE) -> List[Dict[str, Any]]:
+        """Result dicts in input order, each with "stage" set to the stage that decided it."""
+        if not texts:
+            return []
+        results = self.first_stage.predict_scores(texts)
+        uncertain = [i for i, r in enumerate(results) if r["score"] < self.threshold]
+        for r in results:
+            r["stage"] = FAST
+        if uncertain:
+            for i, r in zip(uncertain, self.escalate([texts[i] for i in uncertain], batch_size=batch_size)):
+                results[i] = {**r, "stage": MODEL}
+        with self._lock:
+            self.items += len(texts)
+            self.escalated += len(uncertain)
+        metrics.inc("finnews_cascade_items_total", len(texts) - len(uncertain), stage=FAST, cached="false")
+        metrics.inc("finnews_cascade_items_total", len(uncertain), stage=MODEL, cached="false")
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "items": self.items, "escalated": self.escalated, "threshold": self.threshold,
+                "escalation_rate": round(self.escalated / self.items, 4) if self.items else 0.0,
+            }
+
+
+def version() -> str:
+    """Identifies the first stage and threshold, for predictor_version()."""
+    first = student_model.model_version(config.CASCADE_MODEL_PATH) or "missing"
+    return f"cascade-{first}-{config.CASCADE_THRESHOLD:g}"
+
+
+_cascade: Optional[CascadePredictor] = None
+# version() read just before _cascade was built
+_cascade_version: Optional[str] = None
+_cascade_lock = threading.Lock()
+# Cached results by the stage that decided them when they were first scored
+_cached = {FAST: 0, MODEL: 0}
+_cached_lock = threading.Lock()
+
+
+def get_cascade() -> CascadePredictor:
+    """
+    Process-wide cascade over config.CASCADE_MODEL_PATH and the configured
+    backend, rebuilt (counters kept) when the first stage on disk changes.
+    """
+    global _cascade, _cascade_version
+    current = version()
+    if _cascade is None or _cascade_version != current:
+        with _cascade_lock:
+            if _cascade is None or _cascade_version != current:
+                if config.INFERENCE_BACKEND == "student":
+                    raise ValueError("The cascade escalates to a transformer backend; unset FINNEWS_INFERENCE_BACKEND=student")
+                fresh = CascadePredictor(
+                    student_model.StudentPredictor(config.CASCADE_MODEL_PATH),
+                    predict_text.model_scores,
+                    threshold=config.CASCADE_THRESHOLD,
+                )
+                if _cascade is not None:
+                    print(f"Cascade first stage changed ({_cascade_version} -> {current}); reloaded.")
+                    fresh.items, fresh.escalated = _cascade.items, _cascade.escalated
+                _cascade, _cascade_version = fresh, current
+    return _cascade
+
+
+def record_cached(stages: List[Optional[str]]) -> None:
+    """Count results served from the sentiment cache, which never reach the cascade."""
+    counts = {stage: sum(1 for s in stages if s == stage) for stage in _cached}
+    with _cached_lock:
+        for stage, n in counts.items():
+            _cached[stage] += n
+    for stage, n in counts.items():
+        metrics.inc("finnews_cascade_items_total", n, stage=stage, cached="true")
+
+
+def stats() -> Dict[str, Any]:
+    """
+    Counters of the process-wide cascade (zeros before it has run), plus
+    cached results. escalation_rate is the share of texts the cascade sent
+    to the model; model_rate also counts the cached ones.
+    """
+    if _cascade is None:
+        out = {"items": 0, "escalated": 0, "threshold": config.CASCADE_THRESHOLD, "escalation_rate": 0.0}
+    else:
+        out = _cascade.stats()
+    with _cached_lock:
+        out["cached"] = _cached[FAST] + _cached[MODEL]
+        out["cached_escalated"] = _cached[MODEL]
+    total = out["items"] + out["cached"]
+    out["model_rate"] = round((out["escalated"] + out["cached_escalated"]) / total, 4) if total else 0.0
+    return out
+
+
+def _split():
+    """The labeled CSV as (train, held-out), split like distill.py does."""
+    import training_data
+    from sklearn.model_selection import train_test_split
+
+    df = training_data.load_labeled()
+    return train_test_split(df, test_size=0.2, random_state=42, stratify=df[training_data.LABEL_COLUMN])
+
+
+def train_first_stage(path: str, *, epochs: int = 10) -> str:
+    """Fit a first stage on the gold labels of the training split and save it; returns its version."""
+    import training_data
+
+    df, _ = _split()
+    labels = list(df[training_data.LABEL_COLUMN].unique())
+    targets = np.eye(len(labels))[df[training_data.LABEL_COLUMN].map({l: i for i, l in enumerate(labels)})]
+    model = student_model.HashedLinearModel(labels).fit(df[training_data.TEXT_COLUMN].tolist(), targets, epochs=epochs)
+    return model.save(path)
+
+
+def sweep(thresholds: List[float], *, with_model: bool, batch_size: int) -> List[Dict[str, Any]]:
+    """
+    On the held-out 20% of the labeled CSV (never trained on by `train`
+    or distill.py), per threshold: escalation rate, accuracy of the first
+    stage on the items it keeps and, with_model, accuracy of the whole
+    cascade.
+    """
+    import training_data
+
+    _, test = _split()
+    texts, gold = test[training_data.TEXT_COLUMN].tolist(), np.asarray(test[training_data.LABEL_COLUMN])
+    first = student_model.StudentPredictor(config.CASCADE_MODEL_PATH).predict_scores(texts)
+    fast_labels = np.asarray([r["label"] for r in first])
+    confidence = np.asarray([r["score"] for r in first])
+    model_labels = (np.asarray([r["label"] for r in predict_text.model_scores(texts, batch_size=batch_size)])
+                    if with_model else None)
+
+    rows = []
+    for t in thresholds:
+        kept = confidence >= t
+        row = {
+            "threshold": t,
+            "escalation_rate": round(float(1 - kept.mean()), 4),
+            "fast_accuracy_on_kept": round(float((fast_labels[kept] == gold[kept]).mean()), 4) if kept.any() else None,
+        }
+        if model_labels is not None:
+            row["cascade_accuracy"] = round(float((np.where(kept, fast_labels, model_labels) == gold).mean()), 4)
+        rows.append(row)
+    if model_labels is not None:
+        rows.append({"threshold": None, "escalation_rate": 1.0,
+                     "cascade_accuracy": round(float((model_labels == gold).mean()), 4)})
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cascade inference tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    train = sub.add_parser("train", help="train the first stage from the labeled CSV")
+    train.add_argument("--out", default=config.CASCADE_MODEL_PATH)
+    train.add_argument("--epochs", type=int, default=10)
+    sw = sub.add_parser("sweep", help="escalation rate vs accuracy on the held-out split")
+    sw.add_argument("--thresholds", default="0.5,0.6,0.7,0.8,0.9,0.95")
+    sw.add_argument("--with-model", action="store_true", help="also score the split with the transformer")
+    sw.add_argument("--batch-size", type=int, default=predict_text.DEFAULT_BATCH_SIZE)
+    sw.add_argument("--json", help="write the sweep to this file")
+    sub.add_parser("stats", help="stored sentiments per deciding stage")
+    args = parser.parse_args()
+
+    if args.command == "train":
+        print(f"First stage saved to {args.out} (version {train_first_stage(args.out, epochs=args.epochs)}).")
+    elif args.command == "sweep":
+        rows = sweep([float(t) for t in args.thresholds.split(",")], with_model=args.with_model, batch_size=args.batch_size)
+        print(f"{'threshold':>9} {'escalated':>9} {'fast acc':>9} {'cascade acc':>11}")
+        for r in rows:
+            threshold = "model" if r["threshold"] is None else f"{r['threshold']:g}"
+            print(f"{threshold:>9} {r['escalation_rate']:>9.1%} {r.get('fast_accuracy_on_kept') or '':>9} "
+                  f"{r.get('cascade_accuracy', ''):>11}")
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(rows, f, indent=2)
+    else:
+        try:
+            from storage import db as store
+        except Exception:
+            from .storage import db as store  # type: ignore
+        counts = store.sentiment_stage_counts()
+        total = sum(counts.values())
+        for stage, n in sorted(counts.items()):
+            print(f"{stage:>6} {n:>8} {n / total:>7.1%}")
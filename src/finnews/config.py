@@ -0,0 +1,102 @@
+"""
+Runtime settings for the FinNews pipeline.
+Every value can be overridden through the environment (or a .env file).
+"""
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Repository root (.../FinNews), used to resolve default artifact locations
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+# Fine-tuned model written by train_model.py
+MODEL_PATH = os.getenv("FINNEWS_MODEL_PATH", str(PROJECT_ROOT / "final_model" / "model"))
+
+
+def _csv(name: str, default: str) -> list:
+    return [v.strip() for v in os.getenv(name, default).split(",") if v.strip()]
+
+
+# Ingestion fan-out: every country x category (NewsAPI) and symbol (MarketAux) x page
+NEWS_COUNTRIES = _csv("FINNEWS_COUNTRIES", "us")
+NEWS_CATEGORIES = _csv("FINNEWS_CATEGORIES", "business")
+MARKETAUX_SYMBOLS = _csv("FINNEWS_MARKETAUX_SYMBOLS", "")
+FETCH_PAGES = int(os.getenv("FINNEWS_FETCH_PAGES", "1"))
+# Client-side throttle per provider: seconds between requests and burst size, shared by
+# every concurrent fetch of that provider's client (0 disables it)
+NEWSAPI_RATE_LIMIT_S = float(os.getenv("FINNEWS_NEWSAPI_RATE_LIMIT_S", "0.25"))
+NEWSAPI_BURST = int(os.getenv("FINNEWS_NEWSAPI_BURST", "1"))
+MARKETAUX_RATE_LIMIT_S = float(os.getenv("FINNEWS_MARKETAUX_RATE_LIMIT_S", "0.25"))
+MARKETAUX_BURST = int(os.getenv("FINNEWS_MARKETAUX_BURST", "1"))
+
+# Streaming pipeline (pipeline.py): queue bound per stage, workers and batch sizes
+PIPELINE_QUEUE_SIZE = int(os.getenv("FINNEWS_PIPELINE_QUEUE_SIZE", "256"))
+PIPELINE_DEDUPE_WORKERS = int(os.getenv("FINNEWS_PIPELINE_DEDUPE_WORKERS", "1"))
+PIPELINE_INFERENCE_WORKERS = int(os.getenv("FINNEWS_PIPELINE_INFERENCE_WORKERS", "1"))
+PIPELINE_INFERENCE_BATCH_SIZE = int(os.getenv("FINNEWS_PIPELINE_INFERENCE_BATCH_SIZE", "32"))
+PIPELINE_WRITER_BATCH_SIZE = int(os.getenv("FINNEWS_PIPELINE_WRITER_BATCH_SIZE", "128"))
+
+# Polling daemon (scheduler.py): NewsAPI /everything queries and adaptive intervals
+NEWSAPI_QUERIES = _csv("FINNEWS_NEWSAPI_QUERIES", "stocks")
+POLL_DEFAULT_S = float(os.getenv("FINNEWS_POLL_DEFAULT_S", "300"))
+POLL_MIN_S = float(os.getenv("FINNEWS_POLL_MIN_S", "60"))
+POLL_MAX_S = float(os.getenv("FINNEWS_POLL_MAX_S", "3600"))
+# A poll returning at least this many new items is "busy" and halves the interval
+POLL_BUSY_ITEMS = int(os.getenv("FINNEWS_POLL_BUSY_ITEMS", "20"))
+# Requests per feed and poll when a feed has more than one page of new items
+POLL_MAX_REQUESTS = int(os.getenv("FINNEWS_POLL_MAX_REQUESTS", "5"))
+
+# Near-duplicate headlines (near_duplicates.py): share of the shorter title's words found in
+# the longer one (below 1.0 also merges word substitutions such as "beats" -> "misses"),
+# and shared words over all words. Jaccard below 0.5 is found less reliably by the LSH bands.
+NEAR_DUP_MIN_CONTAINMENT = float(os.getenv("FINNEWS_NEAR_DUP_MIN_CONTAINMENT", "1.0"))
+NEAR_DUP_MIN_JACCARD = float(os.getenv("FINNEWS_NEAR_DUP_MIN_JACCARD", "0.5"))
+
+# Inference backend: "torch", "onnx" or "onnx-int8" (export first with onnx_backend.py),
+# or "student" for the distilled n-gram model (train it with distill.py).
+# The onnx backends need the onnx and onnxruntime packages from requirements.txt.
+INFERENCE_BACKEND = os.getenv("FINNEWS_INFERENCE_BACKEND", "torch")
+STUDENT_MODEL_PATH = os.getenv("FINNEWS_STUDENT_MODEL_PATH", str(PROJECT_ROOT / "final_model" / "student.npz"))
+
+# Cascade inference (cascade.py): the n-gram first stage decides when its top probability is at
+# least CASCADE_THRESHOLD, everything else goes to the transformer backend
+CASCADE = os.getenv("FINNEWS_CASCADE", "0").lower() in ("1", "true", "yes")
+CASCADE_THRESHOLD = float(os.getenv("FINNEWS_CASCADE_THRESHOLD", "0.9"))
+CASCADE_MODEL_PATH = os.getenv("FINNEWS_CASCADE_MODEL_PATH", STUDENT_MODEL_PATH)
+
+# Process-pool inference (inference_pool.py): >1 process enables it, threads are per process
+INFERENCE_PROCESSES = int(os.getenv("FINNEWS_INFERENCE_PROCESSES", "1"))
+INFERENCE_THREADS = int(os.getenv("FINNEWS_INFERENCE_THREADS", "1"))
+
+# Ticker tagging (tickers.py): symbol,names CSV with '|'-separated company names
+SYMBOLS_PATH = os.getenv("FINNEWS_SYMBOLS_PATH", str(Path(__file__).resolve().parent / "data" / "symbols.csv"))
+
+# Price moves (price_moves.py): horizons after publication, and how stale an as-of bar may be
+PRICE_HORIZONS_MIN = [int(h) for h in _csv("FINNEWS_PRICE_HORIZONS_MIN", "5,15,60")]
+PRICE_ASOF_TOLERANCE_MIN = float(os.getenv("FINNEWS_PRICE_ASOF_TOLERANCE_MIN", "60"))
+
+# Columnar price bars (bar_store.py): one directory of memory-mapped column files per symbol
+BAR_STORE_PATH = os.getenv("FINNEWS_BAR_STORE_PATH", str(PROJECT_ROOT / "data" / "bars"))
+
+# Article bodies (article_body.py): off by default; pages are cached on disk as gzipped HTML.
+# BODY_SOURCE is "http", "none" (cache only) or a directory of recorded pages with an index.json
+FETCH_BODIES = os.getenv("FINNEWS_FETCH_BODIES", "0").lower() in ("1", "true", "yes")
+BODY_SOURCE = os.getenv("FINNEWS_BODY_SOURCE", "http")
+BODY_CACHE_PATH = os.getenv("FINNEWS_BODY_CACHE_PATH", str(PROJECT_ROOT / "data" / "html"))
+BODY_FETCH_WORKERS = int(os.getenv("FINNEWS_BODY_FETCH_WORKERS", "4"))
+
+# Long documents (predict_text.py) are scored as overlapping 512-token windows:
+# tokens shared by consecutive windows, windows kept per document, window logits cached in memory
+CHUNK_STRIDE = int(os.getenv("FINNEWS_CHUNK_STRIDE", "128"))
+CHUNK_MAX_WINDOWS = int(os.getenv("FINNEWS_CHUNK_MAX_WINDOWS", "8"))
+CHUNK_CACHE_SIZE = int(os.getenv("FINNEWS_CHUNK_CACHE_SIZE", "4096"))
+
+# Training (train_model.py, training_data.py): labeled sentences and their tokenized cache
+TRAIN_DATA_PATH = os.getenv("FINNEWS_TRAIN_DATA_PATH", str(PROJECT_ROOT / "dev" / "data" / "sentiment_data.csv"))
+TRAIN_CACHE_PATH = os.getenv("FINNEWS_TRAIN_CACHE_PATH", str(PROJECT_ROOT / "data" / "train_cache"))
+
+# Metrics (metrics.py): Prometheus textfile rewritten after each run/poll, and/or an HTTP /metrics port (0 = off)
+METRICS_PATH = os.getenv("FINNEWS_METRICS_PATH", "")
+METRICS_PORT = int(os.getenv("FINNEWS_METRICS_PORT", "0"))
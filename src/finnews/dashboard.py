@@ -3,6 +3,13 @@ import pandas as pd
 import sqlite3
 import matplotlib.pyplot as plt
 import os
+from datetime import datetime, timedelta, timezone
+
+# Prefer package import; fall back to relative when run as module
+try:
+    from storage import db as store
+except Exception:
+    from .storage import db as store  # type: ignore
 
 # Page configuration
 st.set_page_config(
@@ -22,47 +29,111 @@ def get_db_path():
     # Dynamically locate the database relative to this script
     current_dir = os.path.dirname(os.path.abspath(__file__))
 
-    # 1. Check in the same directory (where app.py likely created it)
-    local_path = os.path.join(current_dir, 'storage', DB_FILENAME)
-    if os.path.exists(local_path):
-        return local_path
+    # storage/ next to this script (where app.py creates it); may not exist yet
+    return os.path.join(current_dir, 'storage', DB_FILENAME)
 
 db_path = get_db_path()
 
+PAGE_SIZE = 100
+
+# How far back the trend chart reaches at each resolution
+TREND_WINDOWS = {"minute": timedelta(hours=6), "hour": timedelta(days=14), "day": timedelta(days=365)}
+
+@st.cache_resource
+def get_store(database_path):
+    """One long-lived store (thread-local connections) per database file."""
+    return store.Store(database_path)
+
+@st.cache_data(ttl=600)
+def load_sources(database_path):
+    return get_store(database_path).sources()
+
+def to_frame(rows):
+    columns = ['id', 'sort_at', 'published_at', 'source', 'title', 'url', 'sentiment', 'score']
+    return pd.DataFrame(rows, columns=columns)
+
+def load_feed(database_path, filters, more=False, refresh=False):
+    """
+    Headlines matching filters, kept in session state between reruns.
+    The first call loads one keyset page; more=True appends the next page
+    and refresh=True prepends only articles stored since the last load.
+    """
+    feed = st.session_state.get("feed")
+    db = get_store(database_path)
+    if feed is None or feed["filters"] != filters or (refresh and feed["df"].empty):
+        rows = db.articles_page(limit=PAGE_SIZE, **filters)
+        feed = {"filters": filters, "df": to_frame(rows), "exhausted": len(rows) < PAGE_SIZE}
+    elif more and not feed["exhausted"]:
+        last = feed["df"].iloc[-1]
+        rows = db.articles_page(after=(last["sort_at"], int(last["id"])), limit=PAGE_SIZE, **filters)
+        feed["df"] = pd.concat([feed["df"], to_frame(rows)], ignore_index=True)
+        feed["exhausted"] = len(rows) < PAGE_SIZE
+    elif refresh and not feed["df"].empty:
+        rows = db.articles_since_id(int(feed["df"]["id"].max()), **filters)
+        if rows:
+            feed["df"] = (pd.concat([to_frame(rows), feed["df"]], ignore_index=True)
+                          .sort_values(["sort_at", "id"], ascending=False, ignore_index=True))
+    st.session_state["feed"] = feed
+    return feed
+
 @st.cache_data(ttl=60)
-def load_data(database_path):
-    """Fetches articles and sentiment from the database."""
-    if not os.path.exists(database_path):
-        return pd.DataFrame()
-    
+def load_trend(database_path, resolution):
+    """
+    Pipeline sentiment counts per time bucket, from the pre-aggregated
+    rollup table, over the last TREND_WINDOWS[resolution] only.
+    """
+    since = (datetime.now(timezone.utc) - TREND_WINDOWS[resolution]).strftime(store.ROLLUP_RESOLUTIONS[resolution])
     try:
-        conn = sqlite3.connect(database_path)
-        # Query assumes tables 'articles' and 'sentiments' exist based on app.py usage
-        query = """
-            SELECT 
-                a.title,
-                a.source,
-                a.published_at,
-                s.label as sentiment,
-                a.url
-            FROM articles a
-            LEFT JOIN sentiments s ON a.id = s.article_id
-            ORDER BY a.published_at DESC
-            LIMIT 100
-        """
-        df = pd.read_sql_query(query, conn)
-        conn.close()
-        return df
-    except Exception as e:
-        st.error(f"Error reading database: {e}")
+        rows = get_store(database_path).sentiment_trend(resolution, since=since, engine=store.SENTIMENT_ENGINE)
+    except sqlite3.OperationalError:
+        # Databases created before rollups existed have no table yet
         return pd.DataFrame()
+    return pd.DataFrame(rows, columns=["bucket", "label", "n"])
+
+@st.cache_data(ttl=60)
+def search_headlines(database_path, query):
+    """BM25-ranked full-text matches with the hits in bold."""
+    try:
+        return get_store(database_path).search_articles(query, limit=25, mark=("**", "**"))
+    except sqlite3.OperationalError:
+        # Databases created before the search index existed
+        return []
 
 # --- Main UI ---
 
 if not os.path.exists(db_path):
     st.warning(f"⚠️ Database file '{DB_FILENAME}' not found. Please run the main app to collect data first.")
 else:
-    df = load_data(db_path)
+    ticker = st.sidebar.text_input("Ticker", placeholder="e.g. AAPL")
+    source = st.sidebar.selectbox("Source", ["All"] + load_sources(db_path))
+    label = st.sidebar.selectbox("Sentiment", ["All", "positive", "negative", "neutral"])
+    window = st.sidebar.date_input("Published between", value=[])
+    filters = {
+        "ticker": ticker.strip().upper() or None,
+        "source": None if source == "All" else source,
+        "label": None if label == "All" else label,
+        "since": window[0].isoformat() if len(window) == 2 else None,
+        # until is exclusive, so include the whole last day
+        "until": (window[1] + timedelta(days=1)).isoformat() if len(window) == 2 else None,
+    }
+
+    # Before the search and trend are read, so this run already shows new data (sources from the next run)
+    refresh = st.button("Refresh Data")
+    if refresh:
+        load_sources.clear()
+        load_trend.clear()
+        search_headlines.clear()
+
+    search = st.text_input("🔎 Search headlines", placeholder="e.g. earnings guidance")
+    if search:
+        results = search_headlines(db_path, search)
+        st.caption(f"{len(results)} match(es)")
+        for r in results:
+            st.markdown(f"[{r['title_hl']}]({r['url']})  \n_{r['source'] or ''} · {r['published_at'] or ''}_  \n{r['snippet']}")
+
+    more = st.session_state.pop("load_more", False)
+    feed = load_feed(db_path, filters, more=more, refresh=refresh)
+    df = feed["df"]
 
     if df.empty:
         st.info("No data available in the database.")
@@ -85,6 +156,8 @@ else:
                 width = "stretch",
                 hide_index=True
             )
+            if not feed["exhausted"]:
+                st.button("Load more", on_click=lambda: st.session_state.update(load_more=True))
 
         with col2:
             st.subheader("📊 Market Mood")
@@ -116,7 +189,10 @@ else:
                     st.metric("Total Articles", total)
                     st.metric("Bullish Sentiment", f"{pos/total:.1%}" if total else "0%")
 
-        # Refresh button
-        if st.button("Refresh Data"):
-            st.cache_data.clear()
-            st.rerun()
\ No newline at end of file
+        st.subheader("📈 Sentiment Trend")
+        resolution = st.radio("Resolution", ["day", "hour", "minute"], horizontal=True)
+        trend = load_trend(db_path, resolution)
+        if trend.empty:
+            st.info("No rollups yet. Run `python src/finnews/app.py --rebuild-rollups` to build them.")
+        else:
+            st.line_chart(trend.pivot(index="bucket", columns="label", values="n").fillna(0))
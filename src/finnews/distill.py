@@ -0,0 +1,135 @@
+"""
+Distill the fine-tuned FinBERT model into the small n-gram student.
+
+The teacher scores dev/data/sentiment_data.csv (minus a held-out split)
+and recent headlines from the database. The student (student_model.py) is
+trained on the teacher's temperature-softened probabilities, mixed with
+the gold label where a sentence has one. Both models are then compared on
+the held-out split: accuracy, agreement, single-item latency and batched
+throughput.
+
+Run:
+  python src/finnews/distill.py --db-titles 20000 --json distill_report.json
+  FINNEWS_INFERENCE_BACKEND=student python src/finnews/app.py    # serve the student
+"""
+import argparse, json, sqlite3
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+import benchmark_backends
+import config
+import predict_text
+import student_model
+import training_data
+
+# Prefer package import; fall back to relative when run as module
+try:
+    from storage import db as store
+except Exception:
+    from .storage import db as store  # type: ignore
+
+
+def soften(probs: np.ndarray, temperature: float) -> np.ndarray:
+    """softmax(logits / T) computed from softmax(logits), row-wise."""
+    z = np.log(np.clip(probs, 1e-12, None)) / temperature
+    z = np.exp(z - z.max(axis=1, keepdims=True))
+    return z / z.sum(axis=1, keepdims=True)
+
+
+def teacher_targets(teacher, texts: List[str], labels: List[str], *, temperature: float, batch_size: int) -> np.ndarray:
+    results = teacher.predict_scores(texts, batch_size=batch_size)
+    return soften(np.array([[r["probs"][label] for label in labels] for r in results]), temperature)
+
+
+def distill(
+    teacher,
+    texts: List[str],
+    gold: List[Optional[str]],
+    *,
+    temperature: float = 2.0,
+    alpha: float = 0.5,
+    epochs: int = 10,
+    batch_size: int = predict_text.DEFAULT_BATCH_SIZE
+) -> student_model.HashedLinearModel:
+    """
+    Train a student on texts. Targets are the teacher's softened
+    probabilities, blended with weight alpha towards the gold label where
+    gold has one (None for unlabeled headlines).
+    """
+    labels = [teacher.id2label[i] for i in range(len(teacher.id2label))]
+    print(f"Scoring {len(texts)} texts with the teacher...")
+    targets = teacher_targets(teacher, texts, labels, temperature=temperature, batch_size=batch_size)
+    index = {label: i for i, label in enumerate(labels)}
+    for row, label in enumerate(gold):
+        if label is not None:
+            targets[row] *= 1 - alpha
+            targets[row, index[label]] += alpha
+    print(f"Training the student on {len(texts)} texts...")
+    return student_model.HashedLinearModel(labels).fit(texts, targets, epochs=epochs)
+
+
+def load_db_titles(limit: int) -> List[str]:
+    if limit <= 0:
+        return []
+    try:
+        return store.recent_titles(limit)
+    except sqlite3.OperationalError:
+        # No database (or no articles table) yet
+        return []
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Distill the sentiment model into a fast n-gram student")
+    parser.add_argument("--teacher", default="torch", help="teacher backend: torch, onnx or onnx-int8")
+    parser.add_argument("--db-titles", type=int, default=20000, help="recent stored headlines added as unlabeled data")
+    parser.add_argument("--temperature", type=float, default=2.0)
+    parser.add_argument("--alpha", type=float, default=0.5, help="weight of the gold label where there is one")
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=predict_text.DEFAULT_BATCH_SIZE)
+    parser.add_argument("--single-n", type=int, default=200, help="held-out sentences timed one at a time")
+    parser.add_argument("--out", default=config.STUDENT_MODEL_PATH)
+    parser.add_argument("--json", help="write the comparison to this file")
+    args = parser.parse_args()
+
+    df = training_data.load_labeled()
+    train_df, test_df = train_test_split(df, test_size=0.2, random_state=42, stratify=df[training_data.LABEL_COLUMN])
+    held_out = set(test_df[training_data.TEXT_COLUMN])
+    titles = [t for t in load_db_titles(args.db_titles) if t not in held_out]
+
+    teacher = benchmark_backends.load_predictor(args.teacher)
+    texts = train_df[training_data.TEXT_COLUMN].tolist() + titles
+    gold = train_df[training_data.LABEL_COLUMN].tolist() + [None] * len(titles)
+    model = distill(teacher, texts, gold, temperature=args.temperature, alpha=args.alpha,
+                    epochs=args.epochs, batch_size=args.batch_size)
+    version = model.save(args.out)
+    print(f"Student saved to {args.out} (version {version}); {len(titles)} database headline(s) used.")
+
+    test_texts = test_df[training_data.TEXT_COLUMN].tolist()
+    test_labels = test_df[training_data.LABEL_COLUMN].tolist()
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, predictor in ((args.teacher, teacher), ("student", student_model.StudentPredictor(args.out))):
+        results[name] = benchmark_backends.bench(
+            predictor, test_texts, test_labels, single_n=args.single_n, batch_size=args.batch_size)
+    ref, r = results[args.teacher], results["student"]
+    r["agreement_with_teacher"] = round(
+        sum(a == b for a, b in zip(r["predictions"], ref["predictions"])) / len(test_texts), 4)
+
+    print(f"\n{'model':<10} {'p50 ms':>8} {'p99 ms':>8} {'items/s':>9} {'acc':>7}")
+    for name, r in results.items():
+        print(f"{name:<10} {r['single_p50_ms']:>8} {r['single_p99_ms']:>8} {r['batch_throughput_per_s']:>9} {r['accuracy']:>7}")
+        r.pop("predictions")
+    print(f"Student agrees with the teacher on {results['student']['agreement_with_teacher']:.1%} "
+          f"of {len(test_texts)} held-out sentences.")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"n": len(test_texts), "train_texts": len(texts), "db_titles": len(titles),
+                       "temperature": args.temperature, "alpha": args.alpha, "student_version": version,
+                       "results": results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Multi-process inference for CPU scaling.
+
+One model instance per worker process, each pinned to a fixed number of
+intra-op threads (torch, and onnxruntime for the onnx backends), so N workers x T threads can fill a large host
+without every process fighting over all cores. The dispatcher splits a
+request into length-sorted micro-batches, spreads them over the workers and
+reassembles results in input order.
+
+Enabled for predict_text.predict_sentiment_batch by setting
+FINNEWS_INFERENCE_PROCESSES > 1 (and FINNEWS_INFERENCE_THREADS per worker).
+Workers send back the metrics recorded while scoring each chunk, and the
+parent merges them into its own registry; their inference_seconds add up
+time spent in parallel, so compare them with the parent's wall time for
+the whole call (phase="pool"). Worker metrics from model warmup are dropped.
+
+To find the best split on a given host:
+
+    python src/finnews/inference_pool.py --workers 1,2,4,8 --threads 1,2,4
+"""
+import argparse, atexit, multiprocessing, os, threading, time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import config
+    import metrics
+except Exception:
+    from . import config, metrics  # type: ignore
+
+
+def _pin_threads(threads: int) -> None:
+    # Must happen before torch spins up its thread pools
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    import torch
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+
+    # onnxruntime ignores the above and sizes its pool per session
+    import predict_text
+    predict_text.num_threads = threads
+
+
+def _init_worker(threads: int) -> None:
+    _pin_threads(threads)
+    import predict_text
+    predict_text.warmup()
+
+
+def _predict_chunk(texts: List[str], batch_size: int) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Scores for texts and the worker's metrics for this chunk alone (it runs one chunk at a time)."""
+    import metrics
+    import predict_text
+    metrics.reset()
+    results = predict_text.get_predictor().predict_scores(texts, batch_size=batch_size)
+    return results, metrics.snapshot()
+
+
+class InferencePool:
+    """initializer(threads_per_worker) prepares each worker process (pins threads, loads the model)."""
+    def __init__(
+        self,
+        workers: int,
+        threads_per_worker: int = 1,
+        *,
+        initializer: Callable[[int], None] = _init_worker
+    ):
+        self.workers = max(1, workers)
+        self.threads_per_worker = max(1, threads_per_worker)
+        # spawn: forking a process that already holds torch thread pools is unsafe
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=initializer,
+            initargs=(self.threads_per_worker,),
+        )
+
+    def warmup(self) -> None:
+        """Block until every worker has loaded its model."""
+        futures = [self._executor.submit(_predict_chunk, ["warmup"], 1) for _ in range(self.workers)]
+        for f in futures:
+            f.result()
+
+    def predict_batch(self, texts: List[str], batch_size: int = 32, micro_batch: Optional[int] = None) -> List[str]:
+        """Labels in input order."""
+        return [r["label"] for r in self.predict_scores(texts, batch_size=batch_size, micro_batch=micro_batch)]
+
+    def predict_scores(
+        self, texts: List[str], batch_size: int = 32, micro_batch: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """SentimentPredictor.predict_scores results in input order."""
+        if not texts:
+            return []
+        # Enough chunks to keep every worker busy, but no smaller than one model batch
+        micro_batch = micro_batch or max(batch_size, -(-len(texts) // (self.workers * 2)))
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        chunks = [order[i:i + micro_batch] for i in range(0, len(order), micro_batch)]
+
+        results: List[Dict[str, Any]] = [{}] * len(texts)
+        with metrics.timer("finnews_inference_seconds", backend=config.INFERENCE_BACKEND, phase="pool"):
+            futures = [self._executor.submit(_predict_chunk, [texts[i] for i in chunk], batch_size) for chunk in chunks]
+            for chunk, future in zip(chunks, futures):
+                chunk_results, worker_metrics = future.result()
+                metrics.merge(worker_metrics)
+                for i, result in zip(chunk, chunk_results):
+                    results[i] = result
+        return results
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+_pool: Optional[InferencePool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> InferencePool:
+    """Process-wide pool sized from config, started on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = InferencePool(config.INFERENCE_PROCESSES, config.INFERENCE_THREADS)
+                atexit.register(_pool.close)
+    return _pool
+
+
+def _sweep(worker_counts: List[int], thread_counts: List[int], n: int, batch_size: int) -> None:
+    import pandas as pd
+    df = pd.read_csv(config.PROJECT_ROOT / "dev" / "data" / "sentiment_data.csv", encoding="latin1").dropna()
+    texts = df["Sentence"].sample(n=min(n, len(df)), random_state=42).tolist()
+
+    print(f"{'workers':>7} {'threads':>7} {'items/s':>9}")
+    for workers in worker_counts:
+        for threads in thread_counts:
+            pool = InferencePool(workers, threads)
+            try:
+                pool.warmup()
+                t0 = time.perf_counter()
+                pool.predict_batch(texts, batch_size=batch_size)
+                rate = len(texts) / (time.perf_counter() - t0)
+            finally:
+                pool.close()
+            print(f"{workers:>7} {threads:>7} {rate:>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep worker x thread layouts for inference throughput")
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--threads", default="1,2")
+    parser.add_argument("--n", type=int, default=2000, help="sentences per measurement")
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+    _sweep(
+        [int(x) for x in args.workers.split(",")],
+        [int(x) for x in args.threads.split(",")],
+        args.n,
+        args.batch_size,
+    )
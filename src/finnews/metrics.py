@@ -0,0 +1,282 @@
+"""
+Lightweight in-process instrumentation: counters and latency histograms,
+exported in the Prometheus text format.
+
+    with metrics.timer("finnews_db_seconds", op="upsert_article"):
+        ...
+    metrics.inc("finnews_stage_items_total", 32, stage="inference")
+
+A timer observes its block's duration in seconds and, when the block
+raises, also counts finnews_errors_total{metric, error}. The provider
+clients, the predictor, every storage.db Store method and the pipeline
+stages are instrumented; app.py prints where a run's time went and exports:
+
+    FINNEWS_METRICS_PATH=/var/lib/node_exporter/finnews.prom   # textfile, rewritten after each run/poll
+    FINNEWS_METRICS_PORT=9108                                  # GET /metrics while the process runs
+
+For a single profiled run, `python src/finnews/app.py --trace run.prof`
+records cProfile stats from every thread (open with pstats or snakeviz).
+The one-shot run also works under a sampling profiler:
+
+    py-spy record --threads -o run.svg -- python src/finnews/app.py
+"""
+import bisect, contextlib, cProfile, functools, http.server, os, pstats, threading, time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Seconds; spans SQLite point queries up to slow provider calls and model batches
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_HELP = {
+    "finnews_provider_request_seconds": "Provider API calls, by client and endpoint",
+    "finnews_provider_throttle_seconds": "Time spent waiting on a provider's rate limiter",
+    "finnews_provider_responses_total": "Provider API responses, by status (HTTP code, or NewsAPI's ok/error)",
+    "finnews_inference_seconds": "Predictor time per call, by backend and phase (tokenize, pad, forward; pool: a whole inference_pool call)",
+    "finnews_inference_texts_total": "Texts scored by the predictor",
+    "finnews_inference_windows_total": "Model input windows, scored or served from the window cache",
+    "finnews_cascade_items_total": "Texts decided by each cascade stage, scored now or served from the sentiment cache",
+    "finnews_db_seconds": "storage.db Store operations",
+    "finnews_stage_batch_seconds": "Pipeline stage time per batch",
+    "finnews_stage_items_total": "Items entering each pipeline stage",
+    "finnews_stage_events_total": "Stage-specific pipeline counters",
+    "finnews_cycle_seconds": "Whole ingestion runs",
+    "finnews_feed_truncated_total": "Polls that left new items of a feed unread (more than POLL_MAX_REQUESTS pages)",
+    "finnews_errors_total": "Exceptions raised inside timed blocks, by metric and type",
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Registry:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        # name -> labels -> [per-bucket counts..., +Inf count, sum]
+        self._histograms: Dict[str, Dict[LabelKey, List[float]]] = {}
+
+    def inc(self, name: str, n: float = 1, **labels: Any) -> None:
+        key = _key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + n
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        key = _key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            h = self._histograms.setdefault(name, {}).get(key)
+            if h is None:
+                h = self._histograms[name][key] = [0.0] * (len(self.buckets) + 2)
+            h[i] += 1
+            h[-1] += value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Picklable copy of every series, for merge() in another process."""
+        with self._lock:
+            return {
+                "counters": {name: dict(series) for name, series in self._counters.items()},
+                "histograms": {name: {key: list(h) for key, h in series.items()}
+                               for name, series in self._histograms.items()},
+            }
+
+    def merge(self, snapshot: Dict[str, Any]) -> None:
+        """Add a snapshot() (taken with the same buckets) to this registry."""
+        with self._lock:
+            for name, series in snapshot["counters"].items():
+                mine = self._counters.setdefault(name, {})
+                for key, value in series.items():
+                    mine[key] = mine.get(key, 0) + value
+            for name, series in snapshot["histograms"].items():
+                mine = self._histograms.setdefault(name, {})
+                for key, h in series.items():
+                    if key in mine:
+                        mine[key] = [a + b for a, b in zip(mine[key], h)]
+                    else:
+                        mine[key] = list(h)
+
+    def counters(self, name: str) -> Dict[LabelKey, float]:
+        with self._lock:
+            return dict(self._counters.get(name, {}))
+
+    def totals(self) -> List[Tuple[str, Dict[str, str], int, float]]:
+        """(histogram, labels, count, sum seconds) for every series, largest sum first."""
+        with self._lock:
+            rows = [(name, dict(key), int(sum(h[:-1])), h[-1])
+                    for name, series in self._histograms.items() for key, h in series.items()]
+        return sorted(rows, key=lambda r: -r[3])
+
+    def render(self) -> str:
+        """Every series in the Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(self._counters):
+                if name in _HELP:
+                    lines.append(f"# HELP {name} {_HELP[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(self._counters[name].items()):
+                    lines.append(f"{name}{_labels(key)} {_number(value)}")
+            for name in sorted(self._histograms):
+                if name in _HELP:
+                    lines.append(f"# HELP {name} {_HELP[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, h in sorted(self._histograms[name].items()):
+                    cumulative = 0.0
+                    for bound, n in zip(self.buckets + (float("inf"),), h[:-1]):
+                        cumulative += n
+                        le = "+Inf" if bound == float("inf") else _number(bound)
+                        lines.append(f"{name}_bucket{_labels(key, ('le', le))} {_number(cumulative)}")
+                    lines.append(f"{name}_sum{_labels(key)} {_number(h[-1])}")
+                    lines.append(f"{name}_count{_labels(key)} {_number(cumulative)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+inc = REGISTRY.inc
+observe = REGISTRY.observe
+render = REGISTRY.render
+totals = REGISTRY.totals
+reset = REGISTRY.reset
+snapshot = REGISTRY.snapshot
+merge = REGISTRY.merge
+
+
+@contextlib.contextmanager
+def timer(name: str, **labels: Any) -> Iterator[None]:
+    """Observe the block's wall time under name; count its exceptions in finnews_errors_total."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        inc("finnews_errors_total", metric=name, error=type(e).__name__)
+        raise
+    finally:
+        observe(name, time.perf_counter() - t0, **labels)
+
+
+def timed(name: str, **labels: Any) -> Callable[[Callable], Callable]:
+    """Decorator form of timer()."""
+    def decorate(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timer(name, **labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def instrument_methods(cls: type, name: str, *, exclude: Tuple[str, ...] = ()) -> type:
+    """Time every public method defined on cls under name, labeled op=<method>."""
+    for attr, fn in list(vars(cls).items()):
+        if attr.startswith("_") or attr in exclude or not callable(fn) or isinstance(fn, (staticmethod, classmethod)):
+            continue
+        setattr(cls, attr, timed(name, op=attr)(fn))
+    return cls
+
+
+# ---------------------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------------------
+
+def write_textfile(path: str) -> None:
+    """Write render() to path atomically (node_exporter textfile collector format)."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(render())
+    os.replace(tmp, path)
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port: int, addr: str = "") -> http.server.ThreadingHTTPServer:
+    """Serve /metrics from a daemon thread; returns the server (shutdown() to stop)."""
+    server = http.server.ThreadingHTTPServer((addr, port), _Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    print(f"Metrics on http://{addr or '0.0.0.0'}:{server.server_address[1]}/metrics")
+    return server
+
+
+def print_summary(limit: int = 12) -> None:
+    """Where the time went: the series with the largest total time."""
+    for name, labels, count, seconds in totals()[:limit]:
+        detail = " ".join(f"{k}={v}" for k, v in labels.items())
+        print(f"  [time] {name.removeprefix('finnews_').removesuffix('_seconds')} {detail}: "
+              f"{seconds:.3f}s over {count} call(s)")
+
+
+# ---------------------------------------------------------------------------
+# Tracing
+# ---------------------------------------------------------------------------
+
+@contextlib.contextmanager
+def trace(path: str, *, top: int = 25) -> Iterator[None]:
+    """
+    cProfile the block, including threads it starts (pipeline stages), and
+    write the merged stats to path. Prints the top functions by cumulative
+    time.
+    """
+    profiles: List[cProfile.Profile] = []
+    lock = threading.Lock()
+
+    def start_thread_profile(*_):
+        # Runs as the new thread's first profile event; the profiler replaces it
+        prof = cProfile.Profile()
+        try:
+            prof.enable()
+        except ValueError:
+            # Python 3.12+ allows one active cProfile per process; profile the main thread only
+            return
+        with lock:
+            profiles.append(prof)
+
+    main = cProfile.Profile()
+    threading.setprofile(start_thread_profile)
+    main.enable()
+    try:
+        yield
+    finally:
+        main.disable()
+        threading.setprofile(None)
+        stats = pstats.Stats(main)
+        with lock:
+            for prof in profiles:
+                stats.add(prof)
+        stats.dump_stats(path)
+        print(f"Profile of {len(profiles) + 1} thread(s) written to {path}")
+        stats.sort_stats("cumulative").print_stats(top)
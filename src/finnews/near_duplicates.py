@@ -0,0 +1,199 @@
+"""
+Near-duplicate headline detection with MinHash LSH over title words.
+
+Each title becomes a set of normalized words (stop words dropped). Two
+titles are near copies when every word of the shorter one appears in the
+longer one and they share at least half of all their words (Jaccard), so
+"Apple shares rise" matches "Apple shares rise 3% after earnings" and a
+one-word insertion matches, but "beats" -> "misses" does not.
+
+Candidates come from a 32-value MinHash signature split into 16 bands of
+2 values: titles with Jaccard >= 0.5 share a band with probability above
+0.99. Each band value is one indexed equality lookup (title_bands), and
+only the candidates found are compared word by word.
+
+Normalization drops the trailing " - Source" / " | Source" that NewsAPI
+appends, punctuation and case, so the same syndicated story under different
+urls (or with small wording edits) collapses onto one canonical article.
+"""
+import hashlib, random, re, struct, threading
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+import config
+
+# Prefer package import; fall back to relative when run as module
+try:
+    from storage import db as store
+except Exception:
+    from .storage import db as store  # type: ignore
+
+BANDS = 16
+ROWS = 2
+NUM_HASHES = BANDS * ROWS
+_PRIME = (1 << 61) - 1
+# Fixed, so signatures stored by earlier runs stay comparable
+_rng = random.Random(20240301)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_HASHES)]
+
+_SOURCE_SUFFIX_RE = re.compile(r"\s+[-|–—]\s+[^-|–—]{2,60}$")
+_TOKEN_RE = re.compile(r"[a-z0-9$%.]+")
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+
+def normalize_title(title: str) -> str:
+    title = _SOURCE_SUFFIX_RE.sub("", (title or "").strip())
+    return " ".join(t.strip(".") for t in _TOKEN_RE.findall(title.lower()) if t.strip("."))
+
+
+def words(title: str) -> FrozenSet[str]:
+    """The title's normalized words, without stop words."""
+    return frozenset(w for w in normalize_title(title).split() if w not in STOP_WORDS)
+
+
+def _word_hash(word: str) -> int:
+    return int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "big") % _PRIME
+
+
+def minhash(ws: FrozenSet[str]) -> Tuple[int, ...]:
+    """NUM_HASHES minimum hash values of a word set (empty for an empty one)."""
+    if not ws:
+        return ()
+    hashes = [_word_hash(w) for w in ws]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMS)
+
+
+def bands(signature: Tuple[int, ...]) -> Tuple[int, ...]:
+    """One signed 64-bit value per band of ROWS signature values (SQLite integers are signed)."""
+    out = []
+    for i in range(0, len(signature), ROWS):
+        digest = hashlib.blake2b(struct.pack(f">{ROWS}Q", *signature[i:i + ROWS]), digest_size=8).digest()
+        out.append(int.from_bytes(digest, "big", signed=True))
+    return tuple(out)
+
+
+def similar(a: FrozenSet[str], b: FrozenSet[str], *,
+            min_jaccard: float = config.NEAR_DUP_MIN_JACCARD,
+            min_containment: float = config.NEAR_DUP_MIN_CONTAINMENT) -> bool:
+    if not a or not b:
+        return False
+    shared = len(a & b)
+    return (shared / min(len(a), len(b)) >= min_containment
+            and shared / len(a | b) >= min_jaccard)
+
+
+def distance(a: FrozenSet[str], b: FrozenSet[str]) -> int:
+    """Words in one title but not the other."""
+    return len(a ^ b)
+
+
+def index_row(url: str, ws: FrozenSet[str], row_bands: Tuple[int, ...]) -> Tuple[Any, ...]:
+    """(url, space-joined words, bands) as stored in title_words / title_bands."""
+    return (url, " ".join(sorted(ws)), row_bands)
+
+
+class NearDuplicateIndex:
+    """
+    Decides, per row, whether a headline is new or a near copy of an
+    article already stored (title_words) or already accepted earlier in
+    this process but not yet written.
+    """
+    def __init__(
+        self,
+        st: "store.Store",
+        *,
+        min_jaccard: float = config.NEAR_DUP_MIN_JACCARD,
+        min_containment: float = config.NEAR_DUP_MIN_CONTAINMENT
+    ):
+        self.st = st
+        self.min_jaccard = min_jaccard
+        self.min_containment = min_containment
+        # Canonical titles accepted here but not yet written: url -> (words, bands),
+        # and the urls by (band no, band value)
+        self._pending: Dict[str, Tuple[FrozenSet[str], Tuple[int, ...]]] = {}
+        self._pending_bands: Dict[Tuple[int, int], set] = {}
+        self._lock = threading.Lock()
+
+    def _pending_candidates(self, row_bands: Tuple[int, ...]) -> List[Tuple[str, FrozenSet[str]]]:
+        urls: set = set()
+        for i, b in enumerate(row_bands):
+            urls.update(self._pending_bands.get((i, b), ()))
+        return [(url, self._pending[url][0]) for url in urls]
+
+    def forget(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Drop rows from the pending set once they are stored (and findable
+        in the DB), or once storing them failed so nothing links to them.
+        """
+        with self._lock:
+            for r in rows:
+                entry = self._pending.pop(r["url"], None)
+                if entry is None:
+                    continue
+                for i, b in enumerate(entry[1]):
+                    bucket = self._pending_bands.get((i, b))
+                    if bucket is not None:
+                        bucket.discard(r["url"])
+                        if not bucket:
+                            del self._pending_bands[(i, b)]
+
+    def classify(self, rows: List[Dict[str, Any]], *, known_urls: Optional[set] = None) -> None:
+        """
+        Set row["words"] and row["bands"], and row["duplicate_of"] /
+        row["distance"] for near copies. Rows whose url is already stored
+        (known_urls) are never marked, since they already are somebody's
+        canonical article. A link recorded earlier is reused only while its
+        canonical is stored or still pending; otherwise (its batch failed)
+        the row is classified again.
+        """
+        known_urls = known_urls or set()
+        for r in rows:
+            r["words"] = words(r.get("title") or "")
+            r["bands"] = bands(minhash(r["words"]))
+
+        stored = [
+            [(url, frozenset(text.split())) for url, text in candidates]
+            for candidates in self.st.find_title_candidates([r["bands"] for r in rows])
+        ]
+        linked = self.st.get_near_duplicate_links([r["url"] for r in rows])
+        canonical_stored = set(self.st.get_article_ids_by_url([c for c, _ in linked.values()]))
+
+        with self._lock:
+            for r, candidates in zip(rows, stored):
+                r["duplicate_of"] = None
+                if r["url"] in known_urls or not r["words"]:
+                    continue
+                link = linked.get(r["url"])
+                if link is not None and (link[0] in canonical_stored or link[0] in self._pending):
+                    r["duplicate_of"], r["distance"] = link
+                    continue
+                best: Optional[Tuple[int, str]] = None
+                for url, ws in candidates + self._pending_candidates(r["bands"]):
+                    if url == r["url"] or not similar(r["words"], ws, min_jaccard=self.min_jaccard,
+                                                      min_containment=self.min_containment):
+                        continue
+                    d = distance(r["words"], ws)
+                    if best is None or d < best[0]:
+                        best = (d, url)
+                if best is not None:
+                    r["distance"], r["duplicate_of"] = best
+                    continue
+                self._pending[r["url"]] = (r["words"], r["bands"])
+                for i, b in enumerate(r["bands"]):
+                    self._pending_bands.setdefault((i, b), set()).add(r["url"])
+
+
+def backfill_index(st: "store.Store", *, batch_size: int = 1000) -> int:
+    """Index stored articles missing from title_words. Returns rows added."""
+    added = 0
+    while True:
+        rows = st.articles_without_title_words(limit=batch_size)
+        if not rows:
+            return added
+        indexed = []
+        for url, title in rows:
+            ws = words(title or "")
+            indexed.append(index_row(url, ws, bands(minhash(ws))))
+        st.bulk_save_title_words(indexed)
+        added += len(rows)
@@ -1,5 +1,11 @@
-import os, time, requests
+import os, requests
 from typing import Any, Dict, Optional
+from .ratelimit import TokenBucket
+
+try:
+    from .. import metrics
+except ImportError:
+    import metrics  # type: ignore
 
 class BaseAPI:
     def __init__(
@@ -9,6 +15,7 @@ class BaseAPI:
         api_key_env: Optional[str] = None, 
         api_key: Optional[str] = None,
         rate_limit_s: float = 0.25, 
+        burst: int = 1,
         timeout_s: float = 15.0
     ):
         self.base_url = base_url.rstrip("/")
@@ -17,19 +24,21 @@ class BaseAPI:
             raise ValueError("API key not set")
         self.rate_limit_s = rate_limit_s
         self.timeout_s = timeout_s
-        self._last = 0.0
+        # Per-client bucket; safe to share across the ingestion worker threads
+        self.limiter = TokenBucket.from_interval(rate_limit_s, burst)
         self.s = requests.Session()
         self.s.headers.update({"User-Agent": "new_api/0.1"})
 
     def _throttle(self):
-        dt = time.time() - self._last
-        if dt < self.rate_limit_s:
-            time.sleep(self.rate_limit_s - dt)
-        self._last = time.time()
+        self.limiter.acquire()
 
     def _get(self, path: str, *, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        self._throttle()
+        client, endpoint = type(self).__name__, path.strip("/")
+        with metrics.timer("finnews_provider_throttle_seconds", client=client):
+            self._throttle()
         url = f"{self.base_url}/{path.lstrip('/')}"
-        r = self.s.get(url, params=params, timeout=self.timeout_s)
-        r.raise_for_status()
-        return r.json()
\ No newline at end of file
+        with metrics.timer("finnews_provider_request_seconds", client=client, endpoint=endpoint):
+            r = self.s.get(url, params=params, timeout=self.timeout_s)
+            metrics.inc("finnews_provider_responses_total", client=client, endpoint=endpoint, status=r.status_code)
+            r.raise_for_status()
+            return r.json()
\ No newline at end of file
@@ -1,4 +1,4 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from ..base import BaseAPI
 
 class MarketAuxClient(BaseAPI):
@@ -8,11 +8,20 @@ class MarketAuxClient(BaseAPI):
     Env: MARKETAUX_API_KEY
     Free tier ~100 req/day — keep limits small and filter by recency.
     """
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        *,
+        base_url: str = "https://api.marketaux.com/v1",
+        rate_limit_s: float = 0.25,
+        burst: int = 1
+    ):
         super().__init__(
-            "https://api.marketaux.com/v1", 
+            base_url, 
             api_key_env="MARKETAUX_API_KEY", 
-            api_key=api_key
+            api_key=api_key,
+            rate_limit_s=rate_limit_s,
+            burst=burst
         )
 
     def finance_market_news(
@@ -37,3 +46,23 @@ class MarketAuxClient(BaseAPI):
         if countries: params["countries"] = countries
         params.update(extra)  # allow published_after/before, industries, sources, sort, etc.
         return self._get("news/all", params=params)
+
+    def finance_market_news_normalized(self, **kwargs: Any) -> List[Dict[str, Any]]:
+        """finance_market_news, returning only the normalized article list."""
+        data = self.finance_market_news(**kwargs)
+        return [self._normalize_article(a) for a in (data.get("data") or [])]
+
+    @staticmethod
+    def _normalize_article(a: Dict[str, Any]) -> Dict[str, Any]:
+        """Same keys as NewsAPIClientAdapter._normalize_article."""
+        return {
+            "title": a.get("title"),
+            "url": a.get("url"),
+            "published_at": a.get("published_at"),
+            "source": a.get("source"),
+            "description": a.get("description"),
+            "tickers": [e["symbol"] for e in (a.get("entities") or []) if e.get("symbol")],
+            "language": a.get("language") or "en",
+            "external_id": a.get("uuid"),
+            "_raw": a,
+        }
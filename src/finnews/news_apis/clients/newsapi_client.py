@@ -2,18 +2,53 @@ import os
 from dotenv import load_dotenv
 from typing import Any, List, Dict, Optional
 from newsapi import NewsApiClient
+from ..ratelimit import TokenBucket
+
+try:
+    from ... import metrics
+except ImportError:
+    import metrics  # type: ignore
+
+_CLIENT = "NewsAPIClientAdapter"
 
 class NewsAPIClientAdapter:
     """
     Thin wrapper around newsapi-python that normalizes output to Article.
     Env: NEWSAPI_API_KEY
     """
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, *, rate_limit_s: float = 0.25, burst: int = 1):
         load_dotenv()
         key = api_key or os.getenv("NEWSAPI_API_KEY")
         if not key:
             raise ValueError("NEWSAPI_API_KEY not set")
         self._client = NewsApiClient(api_key=key)
+        self.limiter = TokenBucket.from_interval(rate_limit_s, burst)
+
+    def fetch_top_headlines(
+        self,
+        *,
+        category: str,
+        country: str,
+        language: str = "en",
+        page_size: int = 100,
+        page: int = 1
+    ) -> List[Dict[str, Any]]:
+        """One top-headlines request; raw articles, empty if the API did not return ok."""
+        with metrics.timer("finnews_provider_throttle_seconds", client=_CLIENT):
+            self.limiter.acquire()
+        with metrics.timer("finnews_provider_request_seconds", client=_CLIENT, endpoint="top-headlines"):
+            data: Dict[str, Any] = self._client.get_top_headlines(
+                category=category,
+                language=language,
+                country=country,
+                page_size=page_size,
+                page=page,
+            )
+        metrics.inc("finnews_provider_responses_total", client=_CLIENT, endpoint="top-headlines",
+                    status=data.get("status"))
+        if data.get("status") != "ok":
+            return []
+        return data.get("articles", []) or []
 
     def top_headlines(
         self,
@@ -30,16 +65,12 @@ class NewsAPIClientAdapter:
 
         for country in countries:
             for category in categories:
-                data: Dict[str, Any] = self._client.get_top_headlines(
+                for a in self.fetch_top_headlines(
                     category=category,
-                    language=language,
                     country=country,
+                    language=language,
                     page_size=page_size,
-                )
-                if data.get("status") != "ok":
-                    continue
-
-                for a in data.get("articles", []):
+                ):
                     title = (a or {}).get("title") or ""
                     if dedupe_by_title and (not title or title in seen):
                         continue
@@ -60,14 +91,19 @@ class NewsAPIClientAdapter:
         sort_by: str = "publishedAt",
         normalize: bool = False
     ) -> List[Dict[str, Any]]:
-        data = self._client.get_everything(
-            q=q,
-            language=language,
-            from_param=from_iso,
-            to=to_iso,
-            page_size=page_size,
-            sort_by=sort_by,
-        )
+        with metrics.timer("finnews_provider_throttle_seconds", client=_CLIENT):
+            self.limiter.acquire()
+        with metrics.timer("finnews_provider_request_seconds", client=_CLIENT, endpoint="everything"):
+            data = self._client.get_everything(
+                q=q,
+                language=language,
+                from_param=from_iso,
+                to=to_iso,
+                page_size=page_size,
+                sort_by=sort_by,
+            )
+        metrics.inc("finnews_provider_responses_total", client=_CLIENT, endpoint="everything",
+                    status=data.get("status"))
         articles = data.get("articles", []) or []
         if not normalize:
             return articles
@@ -0,0 +1,160 @@
+"""
+Concurrent multi-provider ingestion.
+
+Every (provider, country, category/symbol, page) request becomes one
+FetchRequest. fetch_all() runs them on an asyncio event loop, each blocking
+client call in a worker thread, capped per provider by a semaphore. Rate
+limits are enforced by each client's own TokenBucket, so a slow provider
+never delays the others. Wall-clock time is the slowest request chain rather
+than the sum of all requests.
+"""
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Max in-flight requests per provider when not overridden
+DEFAULT_CONCURRENCY: Dict[str, int] = {"newsapi": 4, "marketaux": 2}
+
+
+class FetchRequest:
+    """One provider call that returns a list of normalized articles."""
+    __slots__ = ("provider", "label", "fetch")
+
+    def __init__(self, provider: str, label: str, fetch: Callable[[], List[Dict[str, Any]]]):
+        self.provider = provider
+        self.label = label
+        self.fetch = fetch
+
+    def __repr__(self) -> str:
+        return f"FetchRequest({self.provider}:{self.label})"
+
+
+def newsapi_requests(
+    adapter: Any,
+    *,
+    categories: List[str],
+    countries: List[str],
+    language: str = "en",
+    page_size: int = 100,
+    pages: int = 1
+) -> List[FetchRequest]:
+    """Top-headline requests for every country x category x page."""
+    out: List[FetchRequest] = []
+    for country in countries:
+        for category in categories:
+            for page in range(1, pages + 1):
+                def fetch(country=country, category=category, page=page):
+                    raw = adapter.fetch_top_headlines(
+                        category=category, country=country, language=language,
+                        page_size=page_size, page=page,
+                    )
+                    return [adapter._normalize_article(a) for a in raw if a]
+                out.append(FetchRequest("newsapi", f"{country}/{category}/p{page}", fetch))
+    return out
+
+
+def marketaux_requests(
+    client: Any,
+    *,
+    symbols: Optional[List[str]] = None,
+    language: str = "en",
+    countries: Optional[str] = None,
+    limit: int = 25,
+    pages: int = 1,
+    **extra: Any
+) -> List[FetchRequest]:
+    """finance_market_news requests, one per symbol (or one unfiltered) x page."""
+    out: List[FetchRequest] = []
+    for symbol in (symbols or [None]):
+        for page in range(1, pages + 1):
+            def fetch(symbol=symbol, page=page):
+                return client.finance_market_news_normalized(
+                    symbols=symbol, language=language, countries=countries,
+                    limit=limit, page=page, **extra,
+                )
+            out.append(FetchRequest("marketaux", f"{symbol or '*'}/p{page}", fetch))
+    return out
+
+
+def _semaphores(
+    requests: List[FetchRequest], concurrency: Optional[Dict[str, int]]
+) -> Dict[str, asyncio.Semaphore]:
+    limits = dict(DEFAULT_CONCURRENCY, **(concurrency or {}))
+    return {p: asyncio.Semaphore(max(1, limits.get(p, 1))) for p in {r.provider for r in requests}}
+
+
+async def _run_one(req: FetchRequest, sem: asyncio.Semaphore) -> List[Dict[str, Any]]:
+    async with sem:
+        return await asyncio.to_thread(req.fetch)
+
+
+async def fetch_all_async(
+    requests: Iterable[FetchRequest],
+    *,
+    concurrency: Optional[Dict[str, int]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Run all requests concurrently and merge them into one stream.
+    Articles are tagged with their provider and de-duplicated by url; order
+    follows the request list, not completion order, so output is stable.
+    A failing request is reported and skipped rather than failing the batch.
+    """
+    requests = list(requests)
+    sems = _semaphores(requests, concurrency)
+
+    results = await asyncio.gather(
+        *(_run_one(r, sems[r.provider]) for r in requests),
+        return_exceptions=True,
+    )
+
+    seen: set[str] = set()
+    out: List[Dict[str, Any]] = []
+    for req, result in zip(requests, results):
+        if isinstance(result, BaseException):
+            print(f"  -> Fetch failed for {req}: {result}")
+            continue
+        for a in result:
+            url = a.get("url")
+            if not url or url in seen:
+                continue
+            seen.add(url)
+            a.setdefault("provider", req.provider)
+            out.append(a)
+    return out
+
+
+async def iter_fetch_async(
+    requests: Iterable[FetchRequest],
+    *,
+    concurrency: Optional[Dict[str, int]] = None
+) -> AsyncIterator[Tuple[FetchRequest, List[Dict[str, Any]]]]:
+    """
+    Yield (request, normalized articles) as each request completes, so
+    downstream stages can start before the slowest provider answers.
+    Failed requests are reported and skipped; no url de-duplication here.
+    """
+    requests = list(requests)
+    sems = _semaphores(requests, concurrency)
+
+    async def run(req: FetchRequest):
+        try:
+            return req, await _run_one(req, sems[req.provider])
+        except Exception as e:
+            return req, e
+
+    for fut in asyncio.as_completed([run(r) for r in requests]):
+        req, result = await fut
+        if isinstance(result, Exception):
+            print(f"  -> Fetch failed for {req}: {result}")
+            continue
+        for a in result:
+            a.setdefault("provider", req.provider)
+        yield req, result
+
+
+def fetch_all(
+    requests: Iterable[FetchRequest],
+    *,
+    concurrency: Optional[Dict[str, int]] = None
+) -> List[Dict[str, Any]]:
+    """Blocking wrapper around fetch_all_async for synchronous callers."""
+    return asyncio.run(fetch_all_async(requests, concurrency=concurrency))
@@ -0,0 +1,40 @@
+import threading, time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, up to `capacity`
+    banked for bursts. acquire() blocks only the calling thread, so workers
+    for different providers never wait on each other.
+    """
+    def __init__(self, rate: float, capacity: float = 1.0):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_interval(cls, interval_s: float, capacity: float = 1.0) -> "TokenBucket":
+        """Bucket allowing one request per interval_s (0 or less disables limiting)."""
+        return cls(1.0 / interval_s if interval_s > 0 else float("inf"), capacity)
+
+    def _reserve(self) -> float:
+        """Take a token, returning how long the caller must wait for it."""
+        if self.rate == float("inf"):
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self._tokens -= 1.0
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
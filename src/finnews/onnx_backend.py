@@ -0,0 +1,169 @@
+"""
+ONNX Runtime inference backend for CPU-only boxes.
+
+Export the fine-tuned model once (optionally with int8 dynamic quantization),
+then select it with FINNEWS_INFERENCE_BACKEND=onnx or onnx-int8:
+
+    python src/finnews/onnx_backend.py            # fp32 export + parity check
+    python src/finnews/onnx_backend.py --quantize # also write the int8 model
+
+Export refuses to finish if the exported model's labels disagree with the
+PyTorch path on more than --min-agreement of the parity sample. The export
+records the model_version() it came from, and the backend refuses to load
+an export whose source model has since been retrained.
+"""
+import argparse, os
+from typing import Any, Dict, List, Optional
+
+import predict_text
+
+try:
+    import config
+except Exception:
+    from . import config  # type: ignore
+
+ONNX_DIR = "onnx"
+FP32_FILE = "model.onnx"
+INT8_FILE = "model.int8.onnx"
+# predict_text.model_version() of the model the graphs were exported from
+SOURCE_VERSION_FILE = "source_version.txt"
+
+
+def onnx_path(model_path: str, *, quantized: bool = False) -> str:
+    return os.path.join(model_path, ONNX_DIR, INT8_FILE if quantized else FP32_FILE)
+
+
+def exported_version(model_path: str) -> Optional[str]:
+    """Source model version recorded by export(), None for older exports."""
+    try:
+        with open(os.path.join(model_path, ONNX_DIR, SOURCE_VERSION_FILE), "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def check_export(model_path: str, *, quantized: bool = False) -> str:
+    """Path of the export to load; raises if it is missing or was exported from another model."""
+    path = onnx_path(model_path, quantized=quantized)
+    rerun = f"run onnx_backend.py{' --quantize' if quantized else ''}"
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} not found; {rerun} first")
+    source, current = exported_version(model_path), predict_text.model_version(model_path)
+    if source != current:
+        raise RuntimeError(f"{path} was exported from model {source or 'unknown'}, but {model_path} "
+                           f"is now {current}; {rerun} again")
+    return path
+
+
+class OnnxSentimentPredictor(predict_text.SentimentPredictor):
+    """Same API as SentimentPredictor, running the exported graph in onnxruntime."""
+    tensor_type = "np"
+
+    def __init__(self, model_path: str, *, quantized: bool = False, num_threads: int = 0):
+        self.quantized = quantized
+        self.num_threads = num_threads
+        self.backend = "onnx-int8" if quantized else "onnx"
+        super().__init__(model_path)
+
+    def _load_model(self, model_path: str) -> Dict[int, str]:
+        path = check_export(model_path, quantized=self.quantized)
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("The ONNX backend needs onnxruntime: pip install onnxruntime") from e
+        from transformers import AutoConfig
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.num_threads:
+            opts.intra_op_num_threads = self.num_threads
+        self.session = ort.InferenceSession(path, opts, providers=["CPUExecutionProvider"])
+        self._input_names = [i.name for i in self.session.get_inputs()]
+        return dict(AutoConfig.from_pretrained(model_path, local_files_only=True).id2label)
+
+    def _logits(self, inputs: Dict[str, Any]):
+        feed = {name: inputs[name].astype("int64") for name in self._input_names}
+        return self.session.run(["logits"], feed)[0]
+
+
+def export(model_path: str, *, quantize: bool = False) -> List[str]:
+    """
+    Export model_path to ONNX (and optionally int8), recording the source
+    model's version. Returns the written paths.
+    """
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_path, local_files_only=True)
+    model = AutoModelForSequenceClassification.from_pretrained(model_path, local_files_only=True)
+    model.eval()
+    # Plain tuple outputs trace cleanly
+    model.config.return_dict = False
+
+    sample = tokenizer(["Shares rose after earnings."], return_tensors="pt")
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    axes = {n: {0: "batch", 1: "sequence"} for n in input_names}
+    axes["logits"] = {0: "batch"}
+
+    fp32 = onnx_path(model_path)
+    os.makedirs(os.path.dirname(fp32), exist_ok=True)
+    if os.path.exists(os.path.join(os.path.dirname(fp32), SOURCE_VERSION_FILE)):
+        os.remove(os.path.join(os.path.dirname(fp32), SOURCE_VERSION_FILE))
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[n] for n in input_names),
+            fp32,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=axes,
+            opset_version=17,
+            dynamo=False,
+        )
+    written = [fp32]
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        int8 = onnx_path(model_path, quantized=True)
+        quantize_dynamic(fp32, int8, weight_type=QuantType.QInt8)
+        written.append(int8)
+
+    # Last, so a half-finished export never passes check_export()
+    with open(os.path.join(os.path.dirname(fp32), SOURCE_VERSION_FILE), "w", encoding="utf-8") as f:
+        f.write(predict_text.model_version(model_path))
+    return written
+
+
+def parity(texts: List[str], *, quantized: bool = False, model_path: str = None) -> float:
+    """Fraction of texts where the ONNX backend's label matches PyTorch's."""
+    model_path = model_path or config.MODEL_PATH
+    reference = predict_text.SentimentPredictor(model_path).predict_batch(texts)
+    candidate = OnnxSentimentPredictor(model_path, quantized=quantized).predict_batch(texts)
+    return sum(a == b for a, b in zip(reference, candidate)) / max(1, len(texts))
+
+
+def load_parity_sample(n: int) -> List[str]:
+    import pandas as pd
+    df = pd.read_csv(config.PROJECT_ROOT / "dev" / "data" / "sentiment_data.csv", encoding="latin1").dropna()
+    return df["Sentence"].sample(n=min(n, len(df)), random_state=42).tolist()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the fine-tuned model to ONNX")
+    parser.add_argument("--quantize", action="store_true", help="also write an int8 dynamic-quantized model")
+    parser.add_argument("--parity-sample", type=int, default=500, help="sentences used for the label parity check")
+    parser.add_argument("--min-agreement", type=float, default=0.98, help="fail below this label agreement")
+    args = parser.parse_args()
+
+    for path in export(config.MODEL_PATH, quantize=args.quantize):
+        print(f"Wrote {path}")
+
+    sample = load_parity_sample(args.parity_sample)
+    failed = False
+    for quantized in ([False, True] if args.quantize else [False]):
+        agreement = parity(sample, quantized=quantized)
+        name = "onnx-int8" if quantized else "onnx"
+        print(f"{name}: label agreement with PyTorch {agreement:.2%} on {len(sample)} sentences")
+        failed |= agreement < args.min_agreement
+    if failed:
+        raise SystemExit(f"Parity below {args.min_agreement:.0%}; do not switch backends")
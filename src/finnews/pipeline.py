@@ -0,0 +1,438 @@
+"""
+Staged ingestion pipeline.
+
+    fetch -> dedupe/normalize -> [article bodies] -> ticker tagging -> batched inference -> batched DB writer
+
+Stages run in their own threads and are connected by bounded queues, so
+network, model and SQLite work overlap and a full queue pushes back on the
+stage feeding it. Steady-state throughput is set by the slowest stage.
+Pipeline.stop() (or Ctrl-C inside run()) stops the source and lets every
+item already in flight drain through to the writer.
+"""
+import asyncio, queue, threading, time
+from typing import Any, Callable, Dict, List, Optional
+
+import article_body
+import config
+import metrics
+import near_duplicates
+import predict_text
+import sentiment_cache
+import tickers
+from news_apis import ingest
+
+# Prefer package import; fall back to relative when run as module
+try:
+    from storage import db as store
+except Exception:
+    from .storage import db as store  # type: ignore
+
+_STOP = object()
+
+
+class Stage:
+    """
+    One pipeline step. fn receives a list of up to batch_size items (gathered
+    for at most max_wait_s after the first arrives) and returns the items to
+    pass downstream.
+
+    When fn raises, split_on_error retries the two halves of the batch (down
+    to single items) so one bad item does not take its neighbours with it.
+    Items that still fail go to on_error(items, exc), which returns what to
+    pass downstream instead; without it they are dropped. Either way the
+    failure counts in errors.
+
+    extra_stats() returns more entries for stats().
+    """
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[List[Any]], Optional[List[Any]]],
+        *,
+        workers: int = 1,
+        batch_size: int = 1,
+        max_wait_s: float = 0.05,
+        split_on_error: bool = False,
+        on_error: Optional[Callable[[List[Any], Exception], Optional[List[Any]]]] = None,
+        extra_stats: Optional[Callable[[], Dict[str, Any]]] = None
+    ):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.max_wait_s = max_wait_s
+        self.split_on_error = split_on_error
+        self.on_error = on_error
+        self.extra_stats = extra_stats
+        self.items_in = 0
+        self.items_out = 0
+        self.batches = 0
+        self.errors = 0
+        self.busy_s = 0.0
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def count(self, name: str, n: int = 1) -> None:
+        """Stage-specific counter, reported alongside the standard stats."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+        metrics.inc("finnews_stage_events_total", n, stage=self.name, event=name)
+
+    def process(self, batch: List[Any]) -> List[Any]:
+        """fn(batch), with the failure handling described on the class."""
+        try:
+            return self.fn(batch) or []
+        except Exception as e:
+            if self.split_on_error and len(batch) > 1:
+                mid = len(batch) // 2
+                return self.process(batch[:mid]) + self.process(batch[mid:])
+            with self._lock:
+                self.errors += 1
+            metrics.inc("finnews_errors_total", metric=f"stage_{self.name}", error=type(e).__name__)
+            print(f"  -> Stage '{self.name}' failed on a batch of {len(batch)}: {e}")
+            if self.on_error is None:
+                return []
+            try:
+                return list(self.on_error(batch, e) or [])
+            except Exception as e2:
+                print(f"  -> Stage '{self.name}' could not pass on its failed batch: {e2}")
+                return []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "items_in": self.items_in, "items_out": self.items_out, "batches": self.batches,
+            "errors": self.errors, "busy_s": round(self.busy_s, 3), **self.counters,
+            **(self.extra_stats() if self.extra_stats else {}),
+        }
+
+
+def _next_batch(q: "queue.Queue", batch_size: int, max_wait_s: float):
+    """Block for one item, then collect more until batch_size or max_wait_s. Returns (batch, stopped)."""
+    first = q.get()
+    if first is _STOP:
+        return [], True
+    batch = [first]
+    deadline = time.monotonic() + max_wait_s
+    while len(batch) < batch_size:
+        remaining = deadline - time.monotonic()
+        try:
+            item = q.get(timeout=remaining) if remaining > 0 else q.get_nowait()
+        except queue.Empty:
+            break
+        if item is _STOP:
+            return batch, True
+        batch.append(item)
+    return batch, False
+
+
+class Pipeline:
+    """
+    source(emit) produces items by calling emit(item), which blocks while the
+    first queue is full and returns False once the pipeline is stopping.
+    """
+    def __init__(self, source: Callable[[Callable[[Any], bool]], None], stages: List[Stage], *, queue_size: int = 256):
+        self.source = source
+        self.stages = stages
+        self.queues = [queue.Queue(maxsize=max(1, queue_size)) for _ in stages]
+        self._stopping = threading.Event()
+        self.source_errors = 0
+
+    def stop(self) -> None:
+        """Stop pulling from the source; items already queued still drain."""
+        self._stopping.set()
+
+    def _emit(self, item: Any) -> bool:
+        if self._stopping.is_set():
+            return False
+        self.queues[0].put(item)
+        return True
+
+    def _run_source(self) -> None:
+        try:
+            self.source(self._emit)
+        except Exception as e:
+            self.source_errors += 1
+            metrics.inc("finnews_errors_total", metric="pipeline_source", error=type(e).__name__)
+            print(f"  -> Source failed: {e}")
+
+    def _run_worker(self, idx: int) -> None:
+        stage = self.stages[idx]
+        q_in = self.queues[idx]
+        q_out = self.queues[idx + 1] if idx + 1 < len(self.queues) else None
+        while True:
+            batch, stopped = _next_batch(q_in, stage.batch_size, stage.max_wait_s)
+            if batch:
+                t0 = time.perf_counter()
+                out = stage.process(batch)
+                elapsed = time.perf_counter() - t0
+                with stage._lock:
+                    stage.items_in += len(batch)
+                    stage.items_out += len(out)
+                    stage.batches += 1
+                    stage.busy_s += elapsed
+                metrics.observe("finnews_stage_batch_seconds", elapsed, stage=stage.name)
+                metrics.inc("finnews_stage_items_total", len(batch), stage=stage.name)
+                if q_out is not None:
+                    for item in out:
+                        q_out.put(item)
+            if stopped:
+                return
+
+    def ok(self, stats: Dict[str, Dict[str, Any]]) -> bool:
+        """True if a finished run read its whole source and no stage failed a batch."""
+        return (not self._stopping.is_set() and self.source_errors == 0
+                and all(s["errors"] == 0 for s in stats.values()))
+
+    def run(self) -> Dict[str, Dict[str, Any]]:
+        """Run until the source is exhausted (or stop() is called) and every stage has drained."""
+        source = threading.Thread(target=self._run_source, name="pipeline-source", daemon=True)
+        groups = [
+            [threading.Thread(target=self._run_worker, args=(i,), name=f"pipeline-{s.name}-{w}", daemon=True)
+             for w in range(s.workers)]
+            for i, s in enumerate(self.stages)
+        ]
+        source.start()
+        for group in groups:
+            for t in group:
+                t.start()
+
+        try:
+            source.join()
+        except KeyboardInterrupt:
+            print("Stopping: draining in-flight items...")
+            self.stop()
+            source.join()
+
+        # Shut stages down in order so every item reaches the end
+        for i, group in enumerate(groups):
+            for _ in group:
+                self.queues[i].put(_STOP)
+            for t in group:
+                t.join()
+        return {s.name: s.stats() for s in self.stages}
+
+
+# ---------------------------------------------------------------------------
+# FinNews stages
+# ---------------------------------------------------------------------------
+
+def fetch_source(
+    requests: List["ingest.FetchRequest"],
+    *,
+    concurrency: Optional[Dict[str, int]] = None,
+    on_fetched: Optional[Callable[["ingest.FetchRequest", List[Dict[str, Any]]], None]] = None
+):
+    """
+    Pipeline source streaming articles as each provider request completes.
+    on_fetched(request, articles) is called once per successful request.
+    """
+    def source(emit: Callable[[Any], bool]) -> None:
+        async def pump():
+            async for req, articles in ingest.iter_fetch_async(requests, concurrency=concurrency):
+                if on_fetched is not None:
+                    on_fetched(req, articles)
+                for a in articles:
+                    # emit may block on a full queue; keep the event loop free meanwhile
+                    if not await asyncio.to_thread(emit, a):
+                        return
+        asyncio.run(pump())
+    return source
+
+
+def make_dedupe_stage(
+    st: "store.Store",
+    *,
+    index: Optional["near_duplicates.NearDuplicateIndex"] = None,
+    batch_size: int = 64,
+    workers: int = 1
+) -> Stage:
+    """
+    Drop repeated urls, build storage rows and flag rows that still need
+    scoring. With an index, near copies of a known headline are marked
+    duplicate_of their canonical url and never scored.
+    """
+    seen: set = set()
+    lock = threading.Lock()
+
+    def dedupe(articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        rows = []
+        with lock:
+            for article in articles:
+                url = article.get('url')
+                if not url or url in seen:
+                    continue
+                seen.add(url)
+                rows.append({
+                    "provider": article.get('provider', "newsapi"),
+                    "external_id": article.get('external_id'),
+                    "url": url,
+                    "title": article.get('title') or '',
+                    "description": article.get('description'),
+                    "published_at": article.get('published_at'),
+                    "source": article.get('source'),
+                    "language": article.get('language'),
+                    "tickers": article.get('tickers'),
+                    # Normalized fields are stored as columns; keep only the provider's own payload
+                    "raw_obj": article.get('_raw'),
+                })
+        if not rows:
+            return []
+        known = st.get_article_ids_by_url([r["url"] for r in rows])
+        if index is not None:
+            index.classify(rows, known_urls=set(known))
+        scored = st.article_ids_with_sentiment(list(known.values()))
+        for r in rows:
+            r["needs_sentiment"] = not r.get("duplicate_of") and known.get(r["url"]) not in scored
+        return rows
+
+    return Stage("dedupe", dedupe, workers=workers, batch_size=batch_size)
+
+
+def make_body_stage(
+    *, fetcher: Optional["article_body.BodyFetcher"] = None, workers: int = 4, batch_size: int = 8
+) -> Stage:
+    """Set row["body"] to the page text of each row that still needs scoring."""
+    def enrich(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        f = fetcher or article_body.get_fetcher()
+        for r in rows:
+            if r["needs_sentiment"]:
+                r["body"] = f.body(r["url"])
+                stage.count("bodies" if r["body"] else "bodies_missing")
+        return rows
+
+    # Fetching is network bound, so several small batches run side by side.
+    # Rows whose fetch failed are scored on their title alone.
+    stage = Stage("bodies", enrich, workers=workers, batch_size=batch_size, split_on_error=True,
+                  on_error=lambda rows, e: rows)
+    return stage
+
+
+def make_tagging_stage(*, matcher: Optional["tickers.TickerMatcher"] = None, batch_size: int = 64) -> Stage:
+    """Set row["symbols"]: provider tickers plus those named in the title or description."""
+    def tag(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        m = matcher or tickers.get_matcher()
+        for r in rows:
+            if not r.get("duplicate_of"):
+                r["symbols"] = m.tag(r)
+        return rows
+
+    # Untagged rows still carry the provider's tickers
+    return Stage("tagging", tag, batch_size=batch_size, on_error=lambda rows, e: rows)
+
+
+def make_inference_stage(*, batch_size: int = 32, max_wait_s: float = 0.2, workers: int = 1) -> Stage:
+    """
+    Score the rows that need it in one batched (and cached) model call: the
+    title, plus the body when the bodies stage fetched one.
+    """
+    def infer(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        todo = [r for r in rows if r["needs_sentiment"]]
+        results = sentiment_cache.predict_sentiment_scores_cached(
+            [article_body.document_text(r) for r in todo], batch_size=batch_size
+        )
+        version = predict_text.predictor_version()
+        for r, result in zip(todo, results):
+            r["sentiment"], r["sentiment_score"], r["probs"] = result["label"], result["score"], result["probs"]
+            r["model_version"], r["stage"] = version, result.get("stage")
+            if r["stage"]:
+                stage.count(f"decided_{r['stage']}")
+        return rows
+
+    def unscored(rows: List[Dict[str, Any]], e: Exception) -> List[Dict[str, Any]]:
+        # Stored without a sentiment, so the next run's dedupe flags them for scoring again
+        for r in rows:
+            for key in ("sentiment", "sentiment_score", "probs", "model_version", "stage"):
+                r.pop(key, None)
+        stage.count("unscored", sum(1 for r in rows if r["needs_sentiment"]))
+        return rows
+
+    def cascade_stats() -> Dict[str, Any]:
+        # Process-wide, so it spans every run so far (decided_* count this run)
+        import cascade
+        return {"cascade": cascade.stats()}
+
+    stage = Stage("inference", infer, workers=workers, batch_size=batch_size, max_wait_s=max_wait_s,
+                  on_error=unscored, extra_stats=cascade_stats if config.CASCADE else None)
+    return stage
+
+
+def make_writer_stage(
+    st: "store.Store",
+    *,
+    index: Optional["near_duplicates.NearDuplicateIndex"] = None,
+    batch_size: int = 128,
+    max_wait_s: float = 0.5
+) -> Stage:
+    """
+    Persist articles and their new sentiments, one transaction per call.
+    Near duplicates are only recorded as links to their canonical url.
+    """
+    def write(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        duplicates = [r for r in rows if r.get("duplicate_of")]
+        if duplicates:
+            st.bulk_save_near_duplicates([
+                {"url": r["url"], "canonical_url": r["duplicate_of"], "distance": r["distance"],
+                 "provider": r["provider"], "title": r["title"]}
+                for r in duplicates
+            ])
+            stage.count("near_duplicates", len(duplicates))
+            for r in duplicates:
+                print(f"  -> Near-duplicate skipped: {r['title']} (of {r['duplicate_of']})")
+        rows = [r for r in rows if not r.get("duplicate_of")]
+
+        results = st.bulk_upsert_articles(rows)
+        if index is not None:
+            st.bulk_save_title_words([near_duplicates.index_row(r["url"], r["words"], r["bands"]) for r in rows])
+            index.forget(rows)
+        sentiments = []
+        for row, (article_id, is_new) in zip(rows, results):
+            row["article_id"], row["is_new"] = article_id, is_new
+            if is_new:
+                stage.count("new_articles")
+                print(f"  -> New article added: {row['title']} (URL: {row['url']})")
+            label = row.get("sentiment")
+            if label is None:
+                continue
+            sentiments.append({
+                "article_id": article_id, "engine": store.SENTIMENT_ENGINE, "model_version": row.get("model_version"),
+                "label": label, "score": row.get("sentiment_score"), "probs": row.get("probs"),
+                "stage": row.get("stage"),
+            })
+            print(f"  -> Sentiment: {row['title']}: {label.upper()} ({row.get('sentiment_score') or 0:.2f})")
+            if label in ['positive', 'negative']:
+                print(f"  ALERT: {row['title']} has a {label} sentiment.")
+        stage.count("sentiments", st.bulk_save_sentiments(sentiments))
+        return rows
+
+    # SQLite allows one writer at a time, so this stage always has one worker. Every write
+    # is an upsert, so a failing batch is retried in halves to store all but the bad rows.
+    # Rows that still fail are dropped from the index's pending canonicals, so later rows are
+    # not linked to them (rows already linked are classified again on the next poll).
+    stage = Stage("writer", write, workers=1, batch_size=batch_size, max_wait_s=max_wait_s, split_on_error=True,
+                  on_error=(lambda rows, e: index.forget(rows)) if index is not None else None)
+    return stage
+
+
+def build_ingestion_pipeline(
+    requests: List["ingest.FetchRequest"],
+    *,
+    st: Optional["store.Store"] = None,
+    queue_size: int = config.PIPELINE_QUEUE_SIZE,
+    dedupe_workers: int = config.PIPELINE_DEDUPE_WORKERS,
+    inference_workers: int = config.PIPELINE_INFERENCE_WORKERS,
+    inference_batch_size: int = config.PIPELINE_INFERENCE_BATCH_SIZE,
+    writer_batch_size: int = config.PIPELINE_WRITER_BATCH_SIZE,
+    fetch_bodies: bool = config.FETCH_BODIES,
+    on_fetched: Optional[Callable[["ingest.FetchRequest", List[Dict[str, Any]]], None]] = None
+) -> Pipeline:
+    st = st or store.default_store()
+    index = near_duplicates.NearDuplicateIndex(st)
+    stages = [make_dedupe_stage(st, index=index, workers=dedupe_workers)]
+    if fetch_bodies:
+        stages.append(make_body_stage(fetcher=article_body.get_fetcher(), workers=config.BODY_FETCH_WORKERS))
+    stages += [
+        make_tagging_stage(),
+        make_inference_stage(batch_size=inference_batch_size, workers=inference_workers),
+        make_writer_stage(st, index=index, batch_size=writer_batch_size),
+    ]
+    return Pipeline(fetch_source(requests, on_fetched=on_fetched), stages, queue_size=queue_size)
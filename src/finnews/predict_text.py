@@ -1,26 +1,312 @@
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+import hashlib, os, threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
-# Convert to an absolute string and force forward slashes for Hugging Face
-model_path = "./final_model/model"
+if TYPE_CHECKING:
+    import numpy as np
 
-print(f"Loading model from: {model_path}")
+try:
+    import config
+    import metrics
+except Exception:
+    from . import config, metrics  # type: ignore
 
-# Load model and tokenizer
-# local_files_only=True prevents it from trying to check the internet
-tokenizer = AutoTokenizer.from_pretrained(model_path, local_files_only=True)
-model = AutoModelForSequenceClassification.from_pretrained(model_path, local_files_only=True)
+MAX_LENGTH = 512
+DEFAULT_BATCH_SIZE = 32
+# Separates a headline from its body (article_body.document_text); each part is windowed on its own
+SEGMENT_SEP = "\n\n"
+
+# Written next to the weights by train_model.py; identifies the model for caching
+MODEL_VERSION_FILE = "model_version.txt"
+
+# Intra-op threads for backends that size their own pool (onnx); 0 is the library
+# default of one per core. inference_pool workers set their share here.
+num_threads = 0
+
+
+def predictor_version() -> str:
+    """model_version() qualified by the configured backend (and cascade), so caches never mix them."""
+    if config.CASCADE:
+        import cascade
+        return f"{_backend_version()}+{cascade.version()}"
+    return _backend_version()
+
+
+def _backend_version() -> str:
+    if config.INFERENCE_BACKEND == "student":
+        import student_model
+        return f"student-{student_model.model_version(config.STUDENT_MODEL_PATH) or 'missing'}"
+    version = model_version()
+    return version if config.INFERENCE_BACKEND == "torch" else f"{version}+{config.INFERENCE_BACKEND}"
+
+
+def write_model_version(model_path: str) -> str:
+    """Hash the saved model files and record the digest in MODEL_VERSION_FILE."""
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(model_path)):
+        full = os.path.join(model_path, name)
+        if name == MODEL_VERSION_FILE or not os.path.isfile(full):
+            continue
+        digest.update(name.encode("utf-8"))
+        with open(full, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    version = digest.hexdigest()[:16]
+    with open(os.path.join(model_path, MODEL_VERSION_FILE), "w", encoding="utf-8") as f:
+        f.write(version)
+    return version
+
+
+def model_version(model_path: Optional[str] = None) -> str:
+    """
+    Identifier of the model currently on disk, without loading it.
+    Falls back to a size/mtime fingerprint for models saved before
+    MODEL_VERSION_FILE existed.
+    """
+    model_path = model_path or config.MODEL_PATH
+    try:
+        with open(os.path.join(model_path, MODEL_VERSION_FILE), "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        pass
+    digest = hashlib.sha256()
+    if os.path.isdir(model_path):
+        for name in sorted(os.listdir(model_path)):
+            full = os.path.join(model_path, name)
+            if not os.path.isfile(full):
+                continue
+            st = os.stat(full)
+            digest.update(f"{name}:{st.st_size}:{st.st_mtime_ns}".encode("utf-8"))
+    return "fs-" + digest.hexdigest()[:16]
+
+
+class SentimentPredictor:
+    """
+    Fine-tuned FinBERT tokenizer + model pair (PyTorch backend).
+    torch/transformers are imported here rather than at module import so that
+    importing predict_text stays cheap until something actually needs scoring.
+    Other backends subclass this and override _load_model/_logits.
+    """
+    backend = "torch"
+    # Tensor type the tokenizer should produce for _logits
+    tensor_type = "pt"
+
+    def __init__(self, model_path: str):
+        from transformers import AutoTokenizer
+
+        print(f"Loading model from: {model_path} ({self.backend})")
+        self.model_path = model_path
+        # local_files_only=True prevents it from trying to check the internet
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path, local_files_only=True)
+        self.id2label = self._load_model(model_path)
+        self._init_window_cache()
+
+    def _init_window_cache(self, size: int = config.CHUNK_CACHE_SIZE) -> None:
+        # Window token ids -> logits, so documents sharing content skip those forward passes
+        self._window_cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._window_cache_size = size
+        self._window_lock = threading.Lock()
+        self.windows_scored = 0
+        self.windows_cached = 0
+
+    def _load_model(self, model_path: str) -> Dict[int, str]:
+        """Load the network; returns the id -> label mapping."""
+        import torch
+        from transformers import AutoModelForSequenceClassification
+
+        self._torch = torch
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_path, local_files_only=True)
+        self.model.eval()
+        return dict(self.model.config.id2label)
+
+    def _logits(self, inputs: Dict[str, Any]) -> "np.ndarray":
+        with self._torch.no_grad():
+            return self.model(**inputs).logits.float().numpy()
+
+    def predict(self, text: str) -> str:
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts: List[str], batch_size: int = DEFAULT_BATCH_SIZE) -> List[str]:
+        """Labels in input order."""
+        return [r["label"] for r in self.predict_scores(texts, batch_size=batch_size)]
+
+    def predict_scores(self, texts: List[str], batch_size: int = DEFAULT_BATCH_SIZE) -> List[Dict[str, Any]]:
+        """
+        Per text, in input order: {"label", "score" (softmax probability of
+        the label), "probs" ({label: probability} for every label)}.
+
+        A text is split at its first SEGMENT_SEP into a headline and a
+        body, tokenized separately so that the body's windows do not depend
+        on the headline. Parts longer than MAX_LENGTH tokens are split into
+        windows that overlap by config.CHUNK_STRIDE tokens (at most
+        config.CHUNK_MAX_WINDOWS per text, headline first); their logits
+        are averaged, weighted by window length, into one document score.
+        Windows from every text are sorted by token length and each bucket
+        is padded only to its own longest sequence. Windows already scored
+        (the same body under another headline, say) are served from an
+        in-memory cache.
+        """
+        import numpy as np
+
+        if not texts:
+            return []
+        batch_size = max(1, int(batch_size))
+
+        segments, text_of = [], []
+        for i, text in enumerate(texts):
+            parts = [p for p in text.split(SEGMENT_SEP, 1) if p.strip()] or [text]
+            segments.extend(parts)
+            text_of.extend([i] * len(parts))
+
+        # Tokenize once without padding; lengths drive the bucketing
+        fast = getattr(self.tokenizer, "is_fast", False)
+        metrics.inc("finnews_inference_texts_total", len(texts), backend=self.backend)
+        with metrics.timer("finnews_inference_seconds", backend=self.backend, phase="tokenize"):
+            encoded = self.tokenizer(
+                segments, truncation=True, max_length=MAX_LENGTH,
+                **({"stride": config.CHUNK_STRIDE, "return_overflowing_tokens": True} if fast else {}),
+            )
+        segment_of = encoded.pop("overflow_to_sample_mapping", None) or list(range(len(segments)))
+        input_ids = encoded["input_ids"]
+
+        windows: List[List[int]] = [[] for _ in texts]
+        for w, segment in enumerate(segment_of):
+            doc = text_of[segment]
+            if len(windows[doc]) < max(1, config.CHUNK_MAX_WINDOWS):
+                windows[doc].append(w)
+
+        # Score each distinct window once, skipping those already cached
+        keys = {w: np.asarray(input_ids[w], dtype=np.int64).tobytes() for ws in windows for w in ws}
+        logits: Dict[bytes, "np.ndarray"] = {}
+        with self._window_lock:
+            for key in set(keys.values()):
+                if key in self._window_cache:
+                    self._window_cache.move_to_end(key)
+                    logits[key] = self._window_cache[key]
+        pending = list({keys[w]: w for w in keys if keys[w] not in logits}.values())
+        pending.sort(key=lambda w: len(input_ids[w]))
+
+        for start in range(0, len(pending), batch_size):
+            bucket = pending[start:start + batch_size]
+            features = [{key: encoded[key][w] for key in encoded.keys()} for w in bucket]
+            with metrics.timer("finnews_inference_seconds", backend=self.backend, phase="pad"):
+                inputs = self.tokenizer.pad(features, padding="longest", return_tensors=self.tensor_type)
+            with metrics.timer("finnews_inference_seconds", backend=self.backend, phase="forward"):
+                bucket_logits = self._logits(dict(inputs))
+            for w, row in zip(bucket, bucket_logits):
+                logits[keys[w]] = row
+        metrics.inc("finnews_inference_windows_total", len(pending), backend=self.backend, result="scored")
+        metrics.inc("finnews_inference_windows_total", len(keys) - len(pending), backend=self.backend, result="cached")
+        with self._window_lock:
+            self.windows_scored += len(pending)
+            self.windows_cached += len(keys) - len(pending)
+            for w in pending:
+                self._window_cache[keys[w]] = logits[keys[w]]
+            while len(self._window_cache) > self._window_cache_size:
+                self._window_cache.popitem(last=False)
+
+        pooled = np.stack([
+            np.average([logits[keys[w]] for w in ws], axis=0, weights=[len(input_ids[w]) for w in ws])
+            for ws in windows
+        ])
+        return [self._result(probs) for probs in softmax(pooled).tolist()]
+
+    def _result(self, probs: List[float]) -> Dict[str, Any]:
+        best = max(range(len(probs)), key=probs.__getitem__)
+        return {
+            "label": self.id2label[best],
+            "score": probs[best],
+            "probs": {self.id2label[j]: p for j, p in enumerate(probs)},
+        }
+
+
+def softmax(logits: "np.ndarray") -> "np.ndarray":
+    """Row-wise, numerically stable softmax."""
+    import numpy as np
+    z = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return z / z.sum(axis=1, keepdims=True)
+
+
+def _build_predictor() -> SentimentPredictor:
+    backend = config.INFERENCE_BACKEND
+    if backend == "torch":
+        return SentimentPredictor(config.MODEL_PATH)
+    if backend in ("onnx", "onnx-int8"):
+        import onnx_backend
+        return onnx_backend.OnnxSentimentPredictor(config.MODEL_PATH, quantized=backend == "onnx-int8",
+                                                   num_threads=num_threads)
+    if backend == "student":
+        import student_model
+        return student_model.StudentPredictor(config.STUDENT_MODEL_PATH)
+    raise ValueError(f"Unknown FINNEWS_INFERENCE_BACKEND: {backend!r}")
+
+
+_predictor: Optional[SentimentPredictor] = None
+# _backend_version() read just before _predictor was loaded
+_predictor_version: Optional[str] = None
+_predictor_lock = threading.Lock()
+
+
+def get_predictor() -> SentimentPredictor:
+    """
+    Return the process-wide predictor, loading it on first use and again
+    whenever the model on disk changes (train_model.py under --daemon), so
+    predictor_version() always names the model that is loaded.
+    """
+    global _predictor, _predictor_version
+    version = _backend_version()
+    if _predictor is None or _predictor_version != version:
+        with _predictor_lock:
+            if _predictor is None or _predictor_version != version:
+                if _predictor is not None:
+                    print(f"Model changed on disk ({_predictor_version} -> {version}); reloading.")
+                _predictor = _build_predictor()
+                _predictor_version = version
+    return _predictor
+
+
+def warmup() -> None:
+    """Load the model and run one tiny forward pass so the first real call is not slow."""
+    get_predictor().predict("warmup")
 
 
 def predict_sentiment(text):
     """Predicts sentiment for a given text using the loaded model."""
-    inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True, max_length=512)
-    with torch.no_grad():
-        logits = model(**inputs).logits
-    predicted_class_id = torch.argmax(logits, dim=1).item()
-    predicted_label = model.config.id2label[predicted_class_id]
-    # print(f"Predicted sentiment: {predicted_label}")
-    return predicted_label
+    return get_predictor().predict(text)
+
+
+def predict_sentiment_batch(texts: List[str], batch_size: int = DEFAULT_BATCH_SIZE) -> List[str]:
+    """
+    Predicts sentiment for many texts, returning labels in input order.
+    An empty input never loads the model.
+    """
+    return [r["label"] for r in predict_sentiment_scores(texts, batch_size=batch_size)]
+
+
+def predict_sentiment_scores(texts: List[str], batch_size: int = DEFAULT_BATCH_SIZE) -> List[Dict[str, Any]]:
+    """
+    Label, confidence score and full probability vector per text, in input
+    order (see SentimentPredictor.predict_scores). With FINNEWS_CASCADE
+    only texts the first stage is unsure about reach the model, and each
+    result also names the deciding "stage". An empty input never loads
+    the model.
+    """
+    if not texts:
+        return []
+    if config.CASCADE:
+        import cascade
+        return cascade.get_cascade().predict_scores(texts, batch_size=batch_size)
+    return model_scores(texts, batch_size=batch_size)
+
+
+def model_scores(texts: List[str], batch_size: int = DEFAULT_BATCH_SIZE) -> List[Dict[str, Any]]:
+    """predict_sentiment_scores on the configured backend alone (process pool if enabled)."""
+    if not texts:
+        return []
+    if config.INFERENCE_PROCESSES > 1:
+        import inference_pool
+        return inference_pool.get_pool().predict_scores(texts, batch_size=batch_size)
+    return get_predictor().predict_scores(texts, batch_size=batch_size)
 
 if __name__ == "__main__":
     sample_text = """
@@ -29,4 +315,4 @@ if __name__ == "__main__":
     This impressive performance was driven by robust demand for its new product line and successful expansion into international markets.
     Citing these positive trends, the management team has upwardly revised its forecast for the full fiscal year and remains confident in its ability to deliver strong shareholder value.
     """
-    predict_sentiment(sample_text)
+    print(f"Predicted sentiment: {predict_sentiment(sample_text)}")
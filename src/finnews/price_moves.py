@@ -0,0 +1,200 @@
+"""
+Batch computation of post-publication price moves.
+
+For every (article, symbol) in article_tickers and every horizon, t0 is the
+last bar at or before published_at and tN the last bar at or before
+published_at + horizon, both within PRICE_ASOF_TOLERANCE_MIN. Both lookups
+are pandas merge_asof joins over the whole batch, so a year of articles
+against minute bars is a couple of sorted passes rather than a query per
+row. Moves whose tN bar is not after the t0 bar (market closed for the
+whole horizon) are skipped.
+
+    python src/finnews/price_moves.py --bars data/minute_bars/ --horizons 5,15,60
+    python src/finnews/price_moves.py   # read bars from the bar store instead
+
+Bars come from a CSV/Parquet file or a directory of them, with columns
+symbol (or one file per symbol, named after it), timestamp and close, or
+from bar_store.BarStore, which answers the same as-of lookups by binary
+search over memory-mapped columns.
+"""
+import argparse, os
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+import bar_store
+import config
+
+# Prefer package import; fall back to relative when run as module
+try:
+    from storage import db as store
+except Exception:
+    from .storage import db as store  # type: ignore
+
+_TIME_COLUMNS = ("timestamp", "ts", "time", "datetime", "date")
+
+
+def to_utc(values: pd.Series) -> pd.Series:
+    """ISO strings or epoch seconds/milliseconds as tz-aware UTC timestamps."""
+    if pd.api.types.is_numeric_dtype(values):
+        unit = "ms" if values.abs().max() > 1e11 else "s"
+        return pd.to_datetime(values, unit=unit, utc=True)
+    return pd.to_datetime(values, utc=True, format="ISO8601", errors="coerce")
+
+
+def _read_bar_file(path: str) -> pd.DataFrame:
+    df = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+    df.columns = [c.lower() for c in df.columns]
+    if "symbol" not in df.columns:
+        df["symbol"] = os.path.splitext(os.path.basename(path))[0]
+    time_col = next((c for c in _TIME_COLUMNS if c in df.columns), None)
+    if time_col is None or "close" not in df.columns:
+        raise ValueError(f"{path}: bars need a timestamp column ({', '.join(_TIME_COLUMNS)}) and close")
+    out = pd.DataFrame({
+        "symbol": df["symbol"].astype(str).str.upper(),
+        "ts": to_utc(df[time_col]),
+        "close": df["close"].astype("float64"),
+    })
+    for c in ("open", "high", "low", "volume"):
+        if c in df.columns:
+            out[c] = df[c].astype("float64")
+    return out
+
+
+def load_bars(path: str, *, symbols: Optional[List[str]] = None) -> pd.DataFrame:
+    """symbol, ts (UTC), close (and any of open/high/low/volume) from a bar file or directory, sorted by ts."""
+    if os.path.isdir(path):
+        files = sorted(os.path.join(path, f) for f in os.listdir(path) if f.endswith((".csv", ".parquet")))
+    else:
+        files = [path]
+    bars = pd.concat([_read_bar_file(f) for f in files], ignore_index=True) if files else \
+        pd.DataFrame({"symbol": pd.Series(dtype=str), "ts": pd.Series(dtype="datetime64[ns, UTC]"), "close": []})
+    if symbols is not None:
+        bars = bars[bars["symbol"].isin({s.upper() for s in symbols})]
+    return bars.dropna(subset=["ts", "close"]).sort_values("ts", kind="stable").reset_index(drop=True)
+
+
+def compute_moves(
+    events: pd.DataFrame,
+    bars: pd.DataFrame,
+    *,
+    horizons: List[int] = config.PRICE_HORIZONS_MIN,
+    tolerance_min: float = config.PRICE_ASOF_TOLERANCE_MIN
+) -> pd.DataFrame:
+    """
+    events: article_id, symbol, published_at. bars: as from load_bars.
+    Returns one row per (article_id, symbol, horizon_min) with the
+    price_moves columns.
+    """
+    columns = ["article_id", "symbol", "t0_utc", "t0_px", "tN_utc", "tN_px", "delta_pct", "horizon_min"]
+    tolerance = pd.Timedelta(minutes=tolerance_min)
+    ev = events.assign(t0=to_utc(events["published_at"]), symbol=events["symbol"].str.upper())
+    ev = ev.dropna(subset=["t0"]).sort_values("t0", kind="stable")
+    if ev.empty or bars.empty or not horizons:
+        return pd.DataFrame(columns=columns)
+    # Match resolutions so merge_asof compares like with like
+    ev["t0"] = ev["t0"].astype(bars["ts"].dtype)
+    bars = bars[["symbol", "ts", "close"]]
+
+    start = pd.merge_asof(
+        ev, bars.rename(columns={"ts": "t0_ts", "close": "t0_px"}),
+        left_on="t0", right_on="t0_ts", by="symbol", direction="backward", tolerance=tolerance,
+    ).dropna(subset=["t0_px"])
+
+    h = np.asarray(horizons, dtype="int64")
+    moves = start.loc[start.index.repeat(len(h))].reset_index(drop=True)
+    moves["horizon_min"] = np.tile(h, len(start))
+    moves["target"] = moves["t0"] + pd.to_timedelta(moves["horizon_min"], unit="min")
+    moves = pd.merge_asof(
+        moves.sort_values("target", kind="stable"), bars.rename(columns={"ts": "tN_ts", "close": "tN_px"}),
+        left_on="target", right_on="tN_ts", by="symbol", direction="backward", tolerance=tolerance,
+    ).dropna(subset=["tN_px"])
+    moves = moves[moves["tN_ts"] > moves["t0_ts"]]
+
+    return pd.DataFrame({
+        "article_id": moves["article_id"].astype("int64"),
+        "symbol": moves["symbol"],
+        "t0_utc": moves["t0_ts"].dt.strftime(store.ISO_FMT),
+        "t0_px": moves["t0_px"],
+        "tN_utc": moves["tN_ts"].dt.strftime(store.ISO_FMT),
+        "tN_px": moves["tN_px"],
+        "delta_pct": (moves["tN_px"] / moves["t0_px"] - 1.0) * 100.0,
+        "horizon_min": moves["horizon_min"].astype("int64"),
+    }, columns=columns).reset_index(drop=True)
+
+
+def compute_moves_from_store(
+    events: pd.DataFrame,
+    bars: "bar_store.BarStore",
+    *,
+    horizons: List[int] = config.PRICE_HORIZONS_MIN,
+    tolerance_min: float = config.PRICE_ASOF_TOLERANCE_MIN
+) -> pd.DataFrame:
+    """compute_moves against a BarStore: as-of binary searches over memory-mapped bars."""
+    columns = ["article_id", "symbol", "t0_utc", "t0_px", "tN_utc", "tN_px", "delta_pct", "horizon_min"]
+    ev = events.assign(t0=to_utc(events["published_at"]), symbol=events["symbol"].str.upper()).dropna(subset=["t0"])
+    if ev.empty or not horizons:
+        return pd.DataFrame(columns=columns)
+    tolerance_s = tolerance_min * 60
+    symbols = ev["symbol"].to_numpy()
+    t0 = ev["t0"].to_numpy("datetime64[s]").astype("int64")
+    t0_ts, t0_px = bars.asof_many(symbols, t0, tolerance_s=tolerance_s)
+
+    frames = []
+    for h in horizons:
+        tN_ts, tN_px = bars.asof_many(symbols, t0 + h * 60, tolerance_s=tolerance_s)
+        ok = (t0_ts >= 0) & (tN_ts > t0_ts)
+        frames.append(pd.DataFrame({
+            "article_id": ev["article_id"].to_numpy()[ok].astype("int64"),
+            "symbol": symbols[ok],
+            "t0_utc": pd.to_datetime(t0_ts[ok], unit="s").strftime(store.ISO_FMT),
+            "t0_px": t0_px[ok],
+            "tN_utc": pd.to_datetime(tN_ts[ok], unit="s").strftime(store.ISO_FMT),
+            "tN_px": tN_px[ok],
+            "delta_pct": (tN_px[ok] / t0_px[ok] - 1.0) * 100.0,
+            "horizon_min": np.full(int(ok.sum()), h, dtype="int64"),
+        }, columns=columns))
+    return pd.concat(frames, ignore_index=True)
+
+
+def backfill(
+    st: "store.Store",
+    bars,
+    *,
+    horizons: List[int] = config.PRICE_HORIZONS_MIN,
+    since: Optional[str] = None
+) -> int:
+    """
+    Compute and upsert moves for every tagged article with bars, from a
+    load_bars frame or a BarStore. Returns rows written.
+    """
+    from_store = isinstance(bars, bar_store.BarStore)
+    symbols = bars.symbols() if from_store else bars["symbol"].unique().tolist()
+    events = pd.DataFrame(
+        st.article_symbol_events(since=since, symbols=symbols),
+        columns=["article_id", "symbol", "published_at"],
+    )
+    if from_store:
+        moves = compute_moves_from_store(events, bars, horizons=horizons)
+    else:
+        moves = compute_moves(events, bars, horizons=horizons)
+    return st.bulk_save_price_moves(moves.itertuples(index=False, name=None))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill price_moves from local OHLCV bars")
+    parser.add_argument("--bars", help="CSV/Parquet bar file or a directory of them (default: the bar store)")
+    parser.add_argument("--horizons", default=",".join(map(str, config.PRICE_HORIZONS_MIN)), help="minutes, comma-separated")
+    parser.add_argument("--since", help="only articles published at or after this ISO time")
+    args = parser.parse_args()
+
+    store.init_db()
+    if args.bars:
+        bars = load_bars(args.bars)
+        print(f"Loaded {len(bars)} bars for {bars['symbol'].nunique()} symbol(s).")
+    else:
+        bars = bar_store.BarStore()
+        print(f"Using {len(bars.symbols())} symbol(s) from {bars.root}.")
+    written = backfill(store.default_store(), bars, horizons=[int(h) for h in args.horizons.split(",")], since=args.since)
+    print(f"Wrote {written} price move(s).")
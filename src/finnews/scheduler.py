@@ -0,0 +1,253 @@
+"""
+Continuous ingestion daemon.
+
+Each Feed is one (provider, query) stream. The scheduler keeps a watermark
+per feed in the fetch_watermarks table (newest published_at seen, poll
+interval, next due time) and only asks providers for items newer than it:
+NewsAPI /everything gets it as from_iso and MarketAux as published_after.
+Top headlines have no server-side filter, so they are filtered on arrival
+before dedupe/inference. Busy feeds are polled more often, quiet ones back
+off, within [POLL_MIN_S, POLL_MAX_S].
+
+The first poll of a feed reads one page and starts from its newest item.
+After that, a feed with more new items than one page walks back in time: each further
+request asks for items older than the oldest one received (NewsAPI `to`,
+MarketAux published_before), up to POLL_MAX_REQUESTS per poll. A poll cut
+off there saves where it stopped (resume_until) and the newest item it saw
+(pending_published_at); the next polls keep paging back from that point
+until they reach the watermark, which then jumps to the pending item.
+Nothing is saved unless every stage of the pipeline stored what was
+fetched; otherwise the next poll repeats the same range and url dedupe
+skips what is already stored.
+"""
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import config
+import metrics
+import pipeline
+from news_apis import ingest
+
+# Prefer package import; fall back to relative when run as module
+try:
+    from storage import db as store
+except Exception:
+    from .storage import db as store  # type: ignore
+
+
+def parse_iso(value: Optional[str]) -> Optional[datetime]:
+    """Parse provider timestamps ('...Z', '...+00:00', fractional seconds) as aware UTC."""
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def to_iso(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).strftime(store.ISO_FMT)
+
+
+class Feed:
+    """
+    One incrementally polled stream. fetch(since, until) returns up to
+    page_size normalized articles, newest first, published after since and
+    not after until (timestamps as '%Y-%m-%dT%H:%M:%SZ', None when unbounded).
+    page_size None means the endpoint cannot be filtered by time, so one
+    request is all there is (top headlines).
+    """
+    def __init__(
+        self,
+        provider: str,
+        query: str,
+        fetch: Callable[[Optional[str], Optional[str]], List[Dict[str, Any]]],
+        *,
+        page_size: Optional[int] = None
+    ):
+        self.provider = provider
+        self.query = query
+        self.fetch = fetch
+        self.page_size = page_size
+        # Set by the last request(): False if more new items were left unread,
+        # and then the `until` to resume paging back from
+        self.complete = True
+        self.resume_until: Optional[str] = None
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return (self.provider, self.query)
+
+    def _read(self, since: Optional[str], until: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Pages until one comes back short, stepping `until` back to the oldest item received."""
+        out: List[Dict[str, Any]] = []
+        for _ in range(max(1, config.POLL_MAX_REQUESTS)):
+            page = self.fetch(since, to_iso(until) if until else None)
+            out += page
+            if self.page_size is None or since is None or len(page) < self.page_size:
+                return out
+            dated = [t for t in (parse_iso(a.get("published_at")) for a in page) if t]
+            oldest = min(dated, default=None)
+            if oldest is None:
+                print(f"  [{self.provider}:{self.query}] a full page of undated items; cannot page further back")
+                return out
+            if until is not None and oldest >= until:
+                # One timestamp fills a whole page: step past it, skipping its items beyond this page
+                oldest = until - timedelta(seconds=1)
+            until = oldest
+        self.complete = False
+        self.resume_until = to_iso(until)
+        return out
+
+    def request(self, since: Optional[str], until: Optional[str] = None) -> "ingest.FetchRequest":
+        """Fetch items after since; until (a saved resume_until) continues a cut-off poll."""
+        cutoff = parse_iso(since)
+
+        def fetch() -> List[Dict[str, Any]]:
+            self.complete, self.resume_until = True, None
+            articles = self._read(since, parse_iso(until))
+            # Provider filters are inclusive (or absent); keep strictly newer items,
+            # plus undated ones, which url dedupe still catches downstream
+            out, seen = [], set()
+            for a in articles:
+                published = parse_iso(a.get("published_at"))
+                if (cutoff is None or published is None or published > cutoff) and a.get("url") not in seen:
+                    seen.add(a.get("url"))
+                    out.append(a)
+            return out
+
+        return ingest.FetchRequest(self.provider, self.query, fetch)
+
+
+def newsapi_feeds(
+    adapter: Any,
+    *,
+    queries: List[str],
+    categories: List[str],
+    countries: List[str],
+    page_size: int = 100
+) -> List[Feed]:
+    feeds: List[Feed] = []
+    for q in queries:
+        def everything(since, until, q=q):
+            # NewsAPI expects naive ISO timestamps for `from` and `to`
+            return adapter.search_everything(
+                q, from_iso=since.rstrip("Z") if since else None, to_iso=until.rstrip("Z") if until else None,
+                page_size=page_size, sort_by="publishedAt", normalize=True,
+            )
+        feeds.append(Feed("newsapi", f"everything:{q}", everything, page_size=page_size))
+    for country in countries:
+        for category in categories:
+            def headlines(since, until, country=country, category=category):
+                raw = adapter.fetch_top_headlines(category=category, country=country, page_size=page_size)
+                return [adapter._normalize_article(a) for a in raw if a]
+            feeds.append(Feed("newsapi", f"top:{country}/{category}", headlines))
+    return feeds
+
+
+def marketaux_feeds(client: Any, *, symbols: List[str], limit: int = 50) -> List[Feed]:
+    feeds: List[Feed] = []
+    for symbol in (symbols or [None]):
+        def news(since, until, symbol=symbol):
+            extra = {"published_after": since.rstrip("Z")} if since else {}
+            if until:
+                extra["published_before"] = until.rstrip("Z")
+            return client.finance_market_news_normalized(symbols=symbol, limit=limit, **extra)
+        feeds.append(Feed("marketaux", f"symbols:{symbol or '*'}", news, page_size=limit))
+    return feeds
+
+
+def next_interval(current_s: float, new_items: int) -> float:
+    """Halve the interval after a busy poll, back off by 1.5x after an empty one."""
+    if new_items >= config.POLL_BUSY_ITEMS:
+        current_s /= 2
+    elif new_items == 0:
+        current_s *= 1.5
+    return min(config.POLL_MAX_S, max(config.POLL_MIN_S, current_s))
+
+
+class Scheduler:
+    def __init__(self, feeds: List[Feed], *, st: Optional["store.Store"] = None):
+        self.feeds = feeds
+        self.st = st or store.default_store()
+
+    def poll_once(self, now: Optional[datetime] = None) -> int:
+        """Run one pipeline pass over every feed that is due. Returns the number of feeds polled."""
+        now = now or datetime.now(timezone.utc)
+        marks = self.st.get_watermarks()
+        due = [f for f in self.feeds
+               if f.key not in marks or (parse_iso(marks[f.key]["next_poll_at"]) or now) <= now]
+        if not due:
+            return 0
+
+        fetched: Dict[Tuple[str, str], Tuple[int, Optional[datetime]]] = {}
+
+        def on_fetched(req: "ingest.FetchRequest", articles: List[Dict[str, Any]]) -> None:
+            times = [t for t in (parse_iso(a.get("published_at")) for a in articles) if t]
+            fetched[(req.provider, req.label)] = (len(articles), max(times) if times else None)
+
+        requests = []
+        for f in due:
+            mark = marks.get(f.key) or {}
+            requests.append(f.request(mark.get("last_published_at"), mark.get("resume_until")))
+        p = pipeline.build_ingestion_pipeline(requests, st=self.st, on_fetched=on_fetched)
+        stats = p.run()
+        # Only move watermarks forward once everything fetched is safely stored: a batch
+        # failing in any stage, or a stopped run, leaves its articles for the next poll
+        committed = p.ok(stats)
+        if not committed:
+            print("  -> Not every item was stored; watermarks stay put until a clean poll.")
+
+        for f in due:
+            mark = marks.get(f.key) or {}
+            interval = mark.get("poll_interval_s") or config.POLL_DEFAULT_S
+            count, newest = fetched.get(f.key, (0, None))
+            if f.key in fetched:
+                interval = next_interval(interval, count)
+            pending = [t for t in (parse_iso(mark.get("pending_published_at")), newest) if t]
+            reached = to_iso(max(pending)) if pending else None
+            if not committed:
+                last, resume_until, pending_at = None, mark.get("resume_until"), mark.get("pending_published_at")
+            elif f.complete:
+                last, resume_until, pending_at = reached, None, None
+            else:
+                last, resume_until, pending_at = None, f.resume_until, reached
+                print(f"  [{f.provider}:{f.query}] more than {config.POLL_MAX_REQUESTS} page(s) of new items; "
+                      f"the next poll resumes from {resume_until}")
+                metrics.inc("finnews_feed_truncated_total", provider=f.provider, query=f.query)
+            self.st.save_watermark(
+                provider=f.provider,
+                query=f.query,
+                last_published_at=last,
+                last_count=count,
+                poll_interval_s=interval,
+                next_poll_at=to_iso(now + timedelta(seconds=interval)),
+                resume_until=resume_until,
+                pending_published_at=pending_at,
+            )
+            print(f"  [{f.provider}:{f.query}] {count} new item(s); next poll in {interval:.0f}s")
+        return len(due)
+
+    def seconds_until_next_poll(self) -> float:
+        now = datetime.now(timezone.utc)
+        marks = self.st.get_watermarks()
+        waits = []
+        for f in self.feeds:
+            mark = marks.get(f.key)
+            due = parse_iso(mark["next_poll_at"]) if mark else None
+            waits.append(0.0 if due is None else (due - now).total_seconds())
+        return max(0.0, min(waits, default=config.POLL_DEFAULT_S))
+
+    def run_forever(self) -> None:
+        print(f"Polling {len(self.feeds)} feed(s); Ctrl-C to stop.")
+        try:
+            while True:
+                with metrics.timer("finnews_cycle_seconds", mode="poll"):
+                    self.poll_once()
+                if config.METRICS_PATH:
+                    metrics.write_textfile(config.METRICS_PATH)
+                time.sleep(max(1.0, self.seconds_until_next_poll()))
+        except KeyboardInterrupt:
+            print("Scheduler stopped.")
@@ -0,0 +1,121 @@
+import hashlib, re, threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import config
+import predict_text
+
+# Prefer package import; fall back to relative when run as module
+try:
+    from storage import db as store
+except Exception:
+    from .storage import db as store  # type: ignore
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Case- and whitespace-insensitive form used for cache keys."""
+    return _WS_RE.sub(" ", (text or "").strip().lower())
+
+
+def cache_key(text: str, version: str) -> str:
+    return hashlib.sha256(f"{version}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class SentimentCache:
+    """
+    Two-level inference cache: an in-memory LRU in front of the
+    sentiment_cache table. Keys include the model version, so a newly
+    trained model simply misses every old entry.
+    """
+    def __init__(self, max_entries: int = 10000, persist: bool = True):
+        self.max_entries = max_entries
+        self.persist = persist
+        self._mem: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._purged_version: Optional[str] = None
+
+    def get_many(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Return {key: {"label", "score", "probs", "stage"}} for the cached keys."""
+        found: Dict[str, Dict[str, Any]] = {}
+        missing: List[str] = []
+        with self._lock:
+            for k in keys:
+                result = self._mem.get(k)
+                if result is None:
+                    missing.append(k)
+                else:
+                    self._mem.move_to_end(k)
+                    found[k] = result
+        if missing and self.persist:
+            from_db = store.get_cached_sentiments(missing)
+            self._remember(from_db)
+            found.update(from_db)
+        return found
+
+    def put_many(self, results: Dict[str, Dict[str, Any]], version: str) -> None:
+        self._remember(results)
+        if results and self.persist:
+            if self._purged_version != version:
+                # First write under this model: rows from older models can never hit again
+                store.purge_cached_sentiments(keep_version=version)
+                self._purged_version = version
+            store.save_cached_sentiments(results, model_version=version)
+
+    def _remember(self, results: Dict[str, Dict[str, Any]]) -> None:
+        with self._lock:
+            for k, result in results.items():
+                self._mem[k] = result
+                self._mem.move_to_end(k)
+            while len(self._mem) > self.max_entries:
+                self._mem.popitem(last=False)
+
+
+_default_cache = SentimentCache()
+
+
+def predict_sentiment_scores_cached(
+    texts: List[str],
+    *,
+    cache: Optional[SentimentCache] = None,
+    batch_size: int = predict_text.DEFAULT_BATCH_SIZE
+) -> List[Dict[str, Any]]:
+    """
+    Same contract as predict_text.predict_sentiment_scores, but texts already
+    scored by the current model (in this process or a previous run) skip
+    inference. Duplicate texts within one call are scored once.
+    """
+    if not texts:
+        return []
+    cache = cache or _default_cache
+    version = predict_text.predictor_version()
+    keys = [cache_key(t, version) for t in texts]
+    known = cache.get_many(list(dict.fromkeys(keys)))
+
+    pending: Dict[str, str] = {}
+    for k, t in zip(keys, texts):
+        if k not in known and k not in pending:
+            pending[k] = t
+    if config.CASCADE:
+        import cascade
+        cascade.record_cached([known[k].get("stage") for k in keys if k in known])
+    if pending:
+        results = predict_text.predict_sentiment_scores(list(pending.values()), batch_size=batch_size)
+        fresh = dict(zip(pending.keys(), results))
+        # A model swapped in during the call may have scored these; cache only what is certain
+        if predict_text.predictor_version() == version:
+            cache.put_many(fresh, version)
+        known.update(fresh)
+
+    return [known[k] for k in keys]
+
+
+def predict_sentiment_batch_cached(
+    texts: List[str],
+    *,
+    cache: Optional[SentimentCache] = None,
+    batch_size: int = predict_text.DEFAULT_BATCH_SIZE
+) -> List[str]:
+    """Labels only, from predict_sentiment_scores_cached."""
+    return [r["label"] for r in predict_sentiment_scores_cached(texts, cache=cache, batch_size=batch_size)]
@@ -1,6 +1,15 @@
-import os, sqlite3, json
+import os, re, sqlite3, json, threading
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional, List
+from typing import Any, Dict, Iterable, Optional, List, Set, Tuple
+
+try:
+    from . import payloads
+except ImportError:
+    from storage import payloads  # type: ignore
+try:
+    from .. import metrics
+except ImportError:
+    import metrics  # type: ignore
 
 # Resolve paths
 DB_PATH = "src/finnews/storage/finnews.db"
@@ -9,45 +18,1082 @@ os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
 
 ISO_FMT = "%Y-%m-%dT%H:%M:%SZ"
 
+# Keep IN (...) lists well below SQLite's bound-parameter limit
+_IN_CHUNK = 500
+
+# Class probabilities are stored one REAL column per label
+SENTIMENT_LABELS = ("positive", "negative", "neutral")
+
+# Words of a search box query; everything else (FTS5 operators included) is dropped
+_FTS_WORD_RE = re.compile(r"\w+")
+
+# Rollup resolutions and the strftime pattern of each bucket's start
+ROLLUP_RESOLUTIONS = {
+    "minute": "%Y-%m-%dT%H:%M:00Z",
+    "hour": "%Y-%m-%dT%H:00:00Z",
+    "day": "%Y-%m-%dT00:00:00Z",
+}
+# Rollup ticker value that counts every article once, tagged or not
+ALL_TICKERS = "*"
+# Engine name of the sentiments the pipeline stores (and the dashboard trend shows)
+SENTIMENT_ENGINE = "predict_text"
+
+# Columns added after a table first shipped; CREATE TABLE IF NOT EXISTS won't add them
+_ADDED_COLUMNS = {
+    "articles": [("description", "TEXT")],
+    "sentiments": [("p_positive", "REAL"), ("p_negative", "REAL"), ("p_neutral", "REAL"),
+                   ("model_version", "TEXT NOT NULL DEFAULT ''"), ("stage", "TEXT")],
+    "sentiment_cache": [("score", "REAL"), ("p_positive", "REAL"), ("p_negative", "REAL"), ("p_neutral", "REAL"),
+                        ("stage", "TEXT")],
+    "sentiment_rollups": [("n_scored", "INTEGER NOT NULL DEFAULT 0"), ("n_probs", "INTEGER NOT NULL DEFAULT 0")],
+    "fetch_watermarks": [("resume_until", "TEXT"), ("pending_published_at", "TEXT")],
+}
+
 def now_iso() -> str:
     """Return current UTC time as ISO8601 string with Z suffix."""
     return datetime.now(timezone.utc).replace(microsecond=0).strftime(ISO_FMT)
 
-def get_conn() -> sqlite3.Connection:
-    """Connect to the local SQLite database with WAL and foreign keys enabled."""
-    conn = sqlite3.connect(DB_PATH)
+def _connect(path: str, *, check_same_thread: bool = True) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=check_same_thread)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA foreign_keys = ON;")
     conn.execute("PRAGMA journal_mode = WAL;")
+    # In WAL mode NORMAL only syncs at checkpoints and is still crash-safe
+    conn.execute("PRAGMA synchronous = NORMAL;")
+    conn.execute("PRAGMA busy_timeout = 5000;")
     return conn
 
-def init_db() -> None:
-    """Initialize tables and indices."""
-    with get_conn() as conn:
+def get_conn() -> sqlite3.Connection:
+    """Connect to the local SQLite database with WAL and foreign keys enabled."""
+    return _connect(DB_PATH)
+
+def _chunks(items: List[Any], size: int = _IN_CHUNK) -> Iterable[List[Any]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def _placeholders(n: int) -> str:
+    return ",".join("?" * n)
+
+def _migrate(conn: sqlite3.Connection) -> Tuple[int, bool]:
+    """
+    Bring tables created by older schema.sql versions up to date. Runs
+    before the schema script. Returns the duplicate sentiments removed and
+    whether the rollups must be rebuilt.
+    """
+    stale_rollups = False
+    for table, columns in _ADDED_COLUMNS.items():
+        have = {r["name"] for r in conn.execute(f"PRAGMA table_info({table})")}
+        if not have:
+            continue
+        for name, decl in columns:
+            if name not in have:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+                if (table, name) == ("articles", "description"):
+                    conn.execute("UPDATE articles SET description = json_extract(raw_json, '$.description')")
+                if table == "sentiment_rollups":
+                    stale_rollups = True
+    has_moves = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'price_moves'").fetchone()
+    has_unique = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'ux_moves_article_symbol_horizon'"
+    ).fetchone()
+    if has_moves and not has_unique:
+        # Keep the newest row per key so the unique index can be created
+        conn.execute("""
+            DELETE FROM price_moves WHERE id NOT IN (
+                SELECT MAX(id) FROM price_moves GROUP BY article_id, symbol, horizon_min
+            )
+        """)
+    removed = 0
+    has_sentiments = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sentiments'").fetchone()
+    has_unique = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'ux_sentiments_article_engine_version'"
+    ).fetchone()
+    if has_sentiments and not has_unique:
+        # Sentiments used to be appended on every run; keep the newest per key
+        removed = conn.execute("""
+            DELETE FROM sentiments WHERE id NOT IN (
+                SELECT MAX(id) FROM sentiments GROUP BY article_id, engine, model_version
+            )
+        """).rowcount
+    conn.commit()
+    return removed, stale_rollups
+
+def _migrate_raw_json(conn: sqlite3.Connection, *, chunk: int = 1000) -> int:
+    """
+    Move articles.raw_json (older schemas) into compressed article_raw rows
+    and drop the column. Runs after the schema script. Returns rows moved.
+    """
+    if "raw_json" not in {r["name"] for r in conn.execute("PRAGMA table_info(articles)")}:
+        return 0
+    moved = 0
+    last_id = 0
+    with conn:
+        while True:
+            rows = conn.execute(
+                "SELECT id, raw_json FROM articles WHERE id > ? ORDER BY id LIMIT ?", (last_id, chunk)
+            ).fetchall()
+            if not rows:
+                break
+            conn.executemany(
+                "INSERT OR IGNORE INTO article_raw(article_id, codec, dict_id, payload) VALUES (?, ?, NULL, ?)",
+                [(r["id"], payloads.DEFAULT_CODEC, payloads.compress(r["raw_json"].encode("utf-8")))
+                 for r in rows if r["raw_json"] and r["raw_json"] != "{}"],
+            )
+            moved += len(rows)
+            last_id = rows[-1]["id"]
+        conn.execute("ALTER TABLE articles DROP COLUMN raw_json")
+    return moved
+
+def _prob_params(probs: Optional[Dict[str, float]]) -> Tuple[Optional[float], ...]:
+    probs = probs or {}
+    return tuple(probs.get(label) for label in SENTIMENT_LABELS)
+
+def _probs_from_row(row: sqlite3.Row) -> Dict[str, float]:
+    return {label: row[f"p_{label}"] for label in SENTIMENT_LABELS if row[f"p_{label}"] is not None}
+
+def _parse_ts(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+def _fts_query(text: str) -> str:
+    """User text as an FTS5 query: every word must match, the last as a prefix."""
+    words = _FTS_WORD_RE.findall(text or "")
+    return " ".join(f'"{w}"' for w in words) + ("*" if words else "")
+
+def _replace_article_tickers(conn: sqlite3.Connection, symbols: Dict[int, List[str]]) -> None:
+    """Make article_tickers hold exactly the given symbols for each article id."""
+    for chunk in _chunks(list(symbols)):
+        conn.execute(f"DELETE FROM article_tickers WHERE article_id IN ({_placeholders(len(chunk))})", chunk)
+    conn.executemany("""
+        INSERT OR IGNORE INTO article_tickers(article_id, symbol, published_at)
+        SELECT id, ?, published_at FROM articles WHERE id = ?
+    """, [(symbol.upper(), article_id) for article_id, syms in symbols.items() for symbol in syms if symbol])
+
+_LATEST_PER_ENGINE_SQL = """
+    SELECT s.id, s.article_id, s.engine, s.label, s.score, s.p_positive, s.p_negative, s.p_neutral
+    FROM sentiments s
+    WHERE {where} AND s.id = (
+        SELECT s2.id FROM sentiments s2
+        WHERE s2.article_id = s.article_id AND s2.engine = s.engine
+        ORDER BY s2.inserted_at DESC, s2.id DESC LIMIT 1
+    )
+"""
+
+def _latest_per_engine(conn: sqlite3.Connection, article_ids: List[int]) -> List[Dict[str, Any]]:
+    """The current sentiment of each (article, engine) among article_ids, as rollup rows."""
+    out = []
+    for chunk in _chunks(list(dict.fromkeys(article_ids))):
+        for r in conn.execute(
+            _LATEST_PER_ENGINE_SQL.format(where=f"s.article_id IN ({_placeholders(len(chunk))})"), chunk
+        ):
+            out.append({"article_id": r["article_id"], "engine": r["engine"], "label": r["label"],
+                        "score": r["score"], "probs": _probs_from_row(r)})
+    return out
+
+def _apply_rollups(
+    conn: sqlite3.Connection, rows: List[Dict[str, Any]], removed: List[Dict[str, Any]] = ()
+) -> None:
+    """
+    Add sentiment rows (article_id, engine, label, score, probs) to
+    sentiment_rollups and take the removed ones out. Runs on the caller's
+    connection so it commits or rolls back together with the sentiments
+    themselves.
+    """
+    signed = [(r, 1) for r in rows if r.get("label")] + [(r, -1) for r in removed if r.get("label")]
+    if not signed:
+        return
+    articles: Dict[int, sqlite3.Row] = {}
+    symbols: Dict[int, List[str]] = {}
+    for chunk in _chunks(list({r["article_id"] for r, _ in signed})):
+        for a in conn.execute(f"""
+            SELECT id, published_at, inserted_at, source FROM articles
+            WHERE id IN ({_placeholders(len(chunk))})
+        """, chunk):
+            articles[a["id"]] = a
+        for t in conn.execute(f"""
+            SELECT article_id, symbol FROM article_tickers
+            WHERE article_id IN ({_placeholders(len(chunk))})
+        """, chunk):
+            symbols.setdefault(t["article_id"], []).append(t["symbol"])
+
+    deltas: Dict[Tuple[str, ...], List[float]] = {}
+    for r, sign in signed:
+        a = articles.get(r["article_id"])
+        if a is None:
+            continue
+        ts = _parse_ts(a["published_at"]) or _parse_ts(a["inserted_at"])
+        tickers = [ALL_TICKERS] + sorted(symbols.get(a["id"], []))
+        probs = r.get("probs") or {}
+        # Rows without a score (or probabilities) still count in n, but not in n_scored /
+        # score_sum (n_probs / p_*_sum)
+        scored = r.get("score") is not None
+        add = [sign * v for v in [1, int(scored), int(bool(probs)), r["score"] if scored else 0.0]
+               + [probs.get(label) or 0.0 for label in SENTIMENT_LABELS]]
+        for resolution, fmt in ROLLUP_RESOLUTIONS.items():
+            bucket = ts.strftime(fmt)
+            for ticker in tickers:
+                acc = deltas.setdefault((resolution, bucket, a["source"] or "", ticker, r["engine"], r["label"]), [0] * 7)
+                for i, v in enumerate(add):
+                    acc[i] += v
+
+    conn.executemany("""
+        INSERT INTO sentiment_rollups(
+          resolution, bucket, source, ticker, engine, label,
+          n, n_scored, n_probs, score_sum, p_positive_sum, p_negative_sum, p_neutral_sum
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(resolution, bucket, source, ticker, engine, label) DO UPDATE SET
+          n = n + excluded.n,
+          n_scored = n_scored + excluded.n_scored,
+          n_probs = n_probs + excluded.n_probs,
+          score_sum = score_sum + excluded.score_sum,
+          p_positive_sum = p_positive_sum + excluded.p_positive_sum,
+          p_negative_sum = p_negative_sum + excluded.p_negative_sum,
+          p_neutral_sum = p_neutral_sum + excluded.p_neutral_sum
+    """, [(*key, *acc) for key, acc in deltas.items()])
+    if removed:
+        conn.executemany("""
+            DELETE FROM sentiment_rollups
+            WHERE resolution = ? AND bucket = ? AND source = ? AND ticker = ? AND engine = ? AND label = ?
+              AND n <= 0
+        """, [key for key, acc in deltas.items() if acc[0] <= 0])
+
+
+class Store:
+    """
+    Long-lived handle on the SQLite database.
+    Each thread gets one connection, opened (and PRAGMA-configured) on first
+    use and reused afterwards. Writes commit once per call, so the bulk_*
+    methods cost a single transaction per batch.
+    """
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or DB_PATH
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._conns: List[sqlite3.Connection] = []
+        # Raw payload dictionaries by id (never modified once stored)
+        self._raw_dicts: Dict[int, Tuple[str, bytes]] = {}
+
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Only the opening thread uses it, but close() may run on another thread
+            conn = _connect(self.db_path, check_same_thread=False)
+            self._local.conn = conn
+            with self._lock:
+                self._conns.append(conn)
+        return conn
+
+    def close(self) -> None:
+        """
+        Close every connection opened by this store, from any thread. Only
+        safe once the threads using the store have finished (after a
+        pipeline's run() returns); a thread still using it afterwards gets
+        a fresh connection.
+        """
+        with self._lock:
+            conns, self._conns = self._conns, []
+        for conn in conns:
+            conn.close()
+        self._local = threading.local()
+
+    def init_db(self) -> None:
+        """Initialize tables and indices."""
+        conn = self.conn()
+        new_fts = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'articles_fts'"
+        ).fetchone() is None
+        removed, stale_rollups = _migrate(conn)
         with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
             conn.executescript(f.read())
+        if removed or stale_rollups:
+            counted = self.rebuild_rollups()
+            print(f"Removed {removed} duplicate sentiment(s); rollups rebuilt from {counted}.")
+        if new_fts:
+            # Index rows stored before articles_fts existed
+            with conn:
+                conn.execute("INSERT INTO articles_fts(articles_fts) VALUES ('rebuild')")
+        moved = _migrate_raw_json(conn)
+        if moved:
+            print(f"Moved {moved} raw payload(s) to article_raw; VACUUM to reclaim the space.")
 
-# ---------------------------------------------------------------------------
-# Introspection helpers (for orchestration)
-# ---------------------------------------------------------------------------
+    # -----------------------------------------------------------------------
+    # Introspection helpers (for orchestration)
+    # -----------------------------------------------------------------------
 
-def get_article_id_by_url(url: str) -> Optional[int]:
-    with get_conn() as conn:
-        row = conn.execute("SELECT id FROM articles WHERE url = ?", (url,)).fetchone()
+    def get_article_id_by_url(self, url: str) -> Optional[int]:
+        row = self.conn().execute("SELECT id FROM articles WHERE url = ?", (url,)).fetchone()
         return int(row["id"]) if row else None
 
-def has_sentiment(article_id: int) -> bool:
-    with get_conn() as conn:
-        row = conn.execute(
+    def get_article_ids_by_url(self, urls: List[str]) -> Dict[str, int]:
+        """Return {url: article_id} for the urls already stored."""
+        out: Dict[str, int] = {}
+        conn = self.conn()
+        for chunk in _chunks(list(dict.fromkeys(urls))):
+            rows = conn.execute(
+                f"SELECT id, url FROM articles WHERE url IN ({_placeholders(len(chunk))})", chunk
+            )
+            out.update({r["url"]: int(r["id"]) for r in rows})
+        return out
+
+    def has_sentiment(self, article_id: int) -> bool:
+        row = self.conn().execute(
             "SELECT 1 FROM sentiments WHERE article_id = ? LIMIT 1",
             (article_id,),
         ).fetchone()
         return row is not None
 
+    def article_ids_with_sentiment(self, article_ids: List[int]) -> Set[int]:
+        """Subset of article_ids that already have at least one sentiment."""
+        out: Set[int] = set()
+        conn = self.conn()
+        for chunk in _chunks(list(dict.fromkeys(article_ids))):
+            rows = conn.execute(
+                f"SELECT DISTINCT article_id FROM sentiments WHERE article_id IN ({_placeholders(len(chunk))})",
+                chunk,
+            )
+            out.update(int(r["article_id"]) for r in rows)
+        return out
+
+    # -----------------------------------------------------------------------
+    # Upsert/save
+    # -----------------------------------------------------------------------
+
+    _UPSERT_ARTICLE_SQL = """
+        INSERT INTO articles (
+            provider, external_id, url, title, description, published_at, source,
+            language, tickers_json, inserted_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(url) DO UPDATE SET
+            provider=excluded.provider, external_id=excluded.external_id,
+            title=excluded.title, description=excluded.description,
+            published_at=excluded.published_at,
+            source=excluded.source, language=excluded.language,
+            tickers_json=excluded.tickers_json
+    """
+
+    @staticmethod
+    def _article_params(a: Dict[str, Any], now: str) -> Tuple[Any, ...]:
+        return (
+            a["provider"], a.get("external_id"), a["url"], a.get("title") or "",
+            a.get("description") or (a.get("raw_obj") or {}).get("description"),
+            a.get("published_at"), a.get("source"), a.get("language"),
+            json.dumps(a.get("tickers") or []),
+            now,
+        )
+
+    def upsert_article(
+        self,
+        *,
+        provider: str,
+        external_id: Optional[str],
+        url: str,
+        title: str,
+        published_at: Optional[str],
+        source: Optional[str],
+        language: Optional[str],
+        tickers: Optional[List[str]],
+        raw_obj: Dict[str, Any]
+    ) -> int:
+        params = self._article_params({
+            "provider": provider, "external_id": external_id, "url": url, "title": title,
+            "published_at": published_at, "source": source, "language": language,
+            "tickers": tickers, "raw_obj": raw_obj,
+        }, now_iso())
+        conn = self.conn()
+        with conn:
+            row = conn.execute(self._UPSERT_ARTICLE_SQL + " RETURNING id", params).fetchone()
+            _replace_article_tickers(conn, {int(row["id"]): tickers or []})
+            self._save_raw_payloads(conn, {int(row["id"]): raw_obj})
+        return int(row["id"])
+
+    def bulk_upsert_articles(self, articles: List[Dict[str, Any]]) -> List[Tuple[int, bool]]:
+        """
+        Upsert many articles in one transaction.
+        Each item takes the same keys as upsert_article's keyword arguments
+        (raw_obj may be omitted when there is no provider payload to keep),
+        plus optional "symbols" (tagged tickers, default the provider's
+        tickers) for article_tickers.
+        Returns (article_id, inserted) per input item, in input order;
+        inserted is True only for the first occurrence of a url not yet stored.
+        """
+        if not articles:
+            return []
+        now = now_iso()
+        urls = [a["url"] for a in articles]
+        conn = self.conn()
+        with conn:
+            existing = self.get_article_ids_by_url(urls)
+            conn.executemany(self._UPSERT_ARTICLE_SQL, [self._article_params(a, now) for a in articles])
+            ids = self.get_article_ids_by_url(urls)
+            _replace_article_tickers(conn, {
+                ids[a["url"]]: a["symbols"] if a.get("symbols") is not None else (a.get("tickers") or [])
+                for a in articles
+            })
+            self._save_raw_payloads(conn, {ids[a["url"]]: a.get("raw_obj") for a in articles})
+
+        out: List[Tuple[int, bool]] = []
+        seen: Set[str] = set()
+        for url in urls:
+            out.append((ids[url], url not in existing and url not in seen))
+            seen.add(url)
+        return out
+
+    # One row per (article, engine, model version): re-scoring replaces it
+    _UPSERT_SENTIMENT_SQL = """
+        INSERT INTO sentiments(
+            article_id, engine, model_version, score, label, p_positive, p_negative, p_neutral, stage, inserted_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(article_id, engine, model_version) DO UPDATE SET
+            score=excluded.score, label=excluded.label, p_positive=excluded.p_positive,
+            p_negative=excluded.p_negative, p_neutral=excluded.p_neutral, stage=excluded.stage,
+            inserted_at=excluded.inserted_at
+        RETURNING id
+    """
+
+    def save_sentiment(
+        self,
+        article_id: int,
+        engine: str,
+        score: float,
+        label: str,
+        probs: Optional[Dict[str, float]] = None,
+        *,
+        model_version: str = ""
+    ) -> int:
+        """Upsert one sentiment and return its id."""
+        return self._save_sentiments([{
+            "article_id": article_id, "engine": engine, "model_version": model_version,
+            "score": score, "label": label, "probs": probs,
+        }])[0]
+
+    def bulk_save_sentiments(self, rows: List[Dict[str, Any]]) -> int:
+        """
+        Upsert many sentiments (dicts with article_id, engine, score, label
+        and optionally model_version, probs {label: p} and the cascade
+        stage that decided the label) in one
+        transaction, together with their rollup counts. Returns the number
+        of rows written.
+        """
+        return len(self._save_sentiments(rows)) if rows else 0
+
+    def _save_sentiments(self, rows: List[Dict[str, Any]]) -> List[int]:
+        # Rollups count the current sentiment of each (article, engine):
+        # take out the ones being superseded and add whatever is current after
+        now = now_iso()
+        article_ids = [r["article_id"] for r in rows]
+        conn = self.conn()
+        with conn:
+            before = _latest_per_engine(conn, article_ids)
+            ids = [
+                conn.execute(self._UPSERT_SENTIMENT_SQL, (
+                    r["article_id"], r["engine"], r.get("model_version") or "", r.get("score"), r.get("label"),
+                    *_prob_params(r.get("probs")), r.get("stage"), now,
+                )).fetchone()[0]
+                for r in rows
+            ]
+            _apply_rollups(conn, _latest_per_engine(conn, article_ids), removed=before)
+        return ids
+
+    _UPSERT_PRICE_MOVE_SQL = """
+        INSERT INTO price_moves(
+            article_id, symbol, t0_utc, t0_px, tN_utc, tN_px,
+            delta_pct, horizon_min, inserted_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(article_id, symbol, horizon_min) DO UPDATE SET
+            t0_utc=excluded.t0_utc, t0_px=excluded.t0_px,
+            tN_utc=excluded.tN_utc, tN_px=excluded.tN_px,
+            delta_pct=excluded.delta_pct, inserted_at=excluded.inserted_at
+    """
+
+    def save_price_move(
+        self,
+        article_id: int, symbol: str,
+        t0_utc: str, t0_px: float,
+        tN_utc: str, tN_px: float,
+        delta_pct: float, horizon_min: int
+    ) -> int:
+        conn = self.conn()
+        with conn:
+            row = conn.execute(self._UPSERT_PRICE_MOVE_SQL + " RETURNING id", (
+                article_id, symbol, t0_utc, t0_px, tN_utc, tN_px, delta_pct, horizon_min, now_iso()
+            )).fetchone()
+        return int(row["id"])
+
+    def bulk_save_price_moves(self, rows: Iterable[Tuple[Any, ...]]) -> int:
+        """
+        Upsert many price moves in one transaction. rows are
+        (article_id, symbol, t0_utc, t0_px, tN_utc, tN_px, delta_pct, horizon_min).
+        Returns the number of rows written.
+        """
+        now = now_iso()
+        conn = self.conn()
+        with conn:
+            cur = conn.executemany(self._UPSERT_PRICE_MOVE_SQL, ((*r, now) for r in rows))
+        return max(cur.rowcount, 0)
+
+    def article_symbol_events(
+        self, *, since: Optional[str] = None, symbols: Optional[List[str]] = None
+    ) -> List[Tuple[int, str, str]]:
+        """(article_id, symbol, published_at) for every tagged, dated article."""
+        where, params = ["published_at IS NOT NULL"], []
+        if since is not None:
+            where.append("published_at >= ?")
+            params.append(since)
+        if symbols:
+            where.append(f"symbol IN ({_placeholders(len(symbols))})")
+            params.extend(s.upper() for s in symbols)
+        rows = self.conn().execute(
+            f"SELECT article_id, symbol, published_at FROM article_tickers WHERE {' AND '.join(where)}",
+            params,
+        )
+        return [(r["article_id"], r["symbol"], r["published_at"]) for r in rows]
+
+    # -----------------------------------------------------------------------
+    # Raw provider payloads
+    # -----------------------------------------------------------------------
+
+    def _raw_dictionary(self, dict_id: Optional[int]) -> Optional[bytes]:
+        if dict_id is None:
+            return None
+        if dict_id not in self._raw_dicts:
+            row = self.conn().execute("SELECT codec, data FROM raw_dictionaries WHERE id = ?", (dict_id,)).fetchone()
+            self._raw_dicts[dict_id] = (row["codec"], bytes(row["data"]))
+        return self._raw_dicts[dict_id][1]
+
+    def _save_raw_payloads(self, conn: sqlite3.Connection, raws: Dict[int, Any]) -> None:
+        """
+        Compress with the newest dictionary for the default codec. Called
+        inside the caller's write transaction, so the dictionary is looked up
+        under the write lock: another Store's compaction can add a newer one
+        but never deletes the newest (see compact_raw_payloads).
+        """
+        raws = {article_id: raw for article_id, raw in raws.items() if raw}
+        if not raws:
+            return
+        row = conn.execute(
+            "SELECT id FROM raw_dictionaries WHERE codec = ? ORDER BY id DESC LIMIT 1",
+            (payloads.DEFAULT_CODEC,),
+        ).fetchone()
+        dict_id = row["id"] if row else None
+        dictionary = self._raw_dictionary(dict_id)
+        conn.executemany(
+            "INSERT OR REPLACE INTO article_raw(article_id, codec, dict_id, payload) VALUES (?, ?, ?, ?)",
+            [(article_id, payloads.DEFAULT_CODEC, dict_id,
+              payloads.compress(payloads.encode(raw), dictionary=dictionary))
+             for article_id, raw in raws.items()],
+        )
+
+    def get_raw_payloads(self, article_ids: List[int]) -> Dict[int, Any]:
+        """{article_id: decoded provider payload} for the ids that have one."""
+        out: Dict[int, Any] = {}
+        conn = self.conn()
+        for chunk in _chunks(list(dict.fromkeys(article_ids))):
+            rows = conn.execute(f"""
+                SELECT article_id, codec, dict_id, payload FROM article_raw
+                WHERE article_id IN ({_placeholders(len(chunk))})
+            """, chunk)
+            for r in rows:
+                data = payloads.decompress(
+                    r["payload"], codec=r["codec"], dictionary=self._raw_dictionary(r["dict_id"])
+                )
+                out[r["article_id"]] = payloads.decode(data)
+        return out
+
+    def get_raw_payload(self, article_id: int) -> Optional[Any]:
+        return self.get_raw_payloads([article_id]).get(article_id)
+
+    def compact_raw_payloads(self, *, samples: int = 2000, batch_size: int = 1000) -> Tuple[int, int]:
+        """
+        Train a shared dictionary on recent payloads and recompress every
+        row with it. Returns (dictionary id, rows recompressed); VACUUM
+        afterwards to return the freed pages to the filesystem.
+        """
+        conn = self.conn()
+        ids = [r["article_id"] for r in conn.execute(
+            "SELECT article_id FROM article_raw ORDER BY article_id DESC LIMIT ?", (samples,)
+        )]
+        sample = [payloads.encode(p) for p in self.get_raw_payloads(ids).values()]
+        data = payloads.train_dictionary(sample[::-1])
+        with conn:
+            dict_id = conn.execute(
+                "INSERT INTO raw_dictionaries(codec, data, created_at) VALUES (?, ?, ?)",
+                (payloads.DEFAULT_CODEC, data, now_iso()),
+            ).lastrowid
+
+        rewritten = 0
+        last_id = 0
+        while True:
+            ids = [r["article_id"] for r in conn.execute(
+                "SELECT article_id FROM article_raw WHERE article_id > ? ORDER BY article_id LIMIT ?",
+                (last_id, batch_size),
+            )]
+            if not ids:
+                break
+            with conn:
+                self._save_raw_payloads(conn, self.get_raw_payloads(ids))
+            rewritten += len(ids)
+            last_id = ids[-1]
+        # Writers compress with the newest dictionary per codec (possibly
+        # newer than this one, from a concurrent compaction), so that is kept
+        with conn:
+            conn.execute("""
+                DELETE FROM raw_dictionaries
+                WHERE id NOT IN (SELECT MAX(id) FROM raw_dictionaries GROUP BY codec)
+                  AND id NOT IN (SELECT DISTINCT dict_id FROM article_raw WHERE dict_id IS NOT NULL)
+            """)
+        return dict_id, rewritten
+
+    def vacuum(self) -> None:
+        self.conn().execute("VACUUM")
+
+    # -----------------------------------------------------------------------
+    # Ticker mapping
+    # -----------------------------------------------------------------------
+
+    def bulk_save_article_tickers(self, symbols: Dict[int, List[str]]) -> None:
+        """Replace the article_tickers rows of each {article_id: [symbol]}."""
+        if not symbols:
+            return
+        conn = self.conn()
+        with conn:
+            _replace_article_tickers(conn, symbols)
+
+    def articles_for_tagging(self, *, after_id: int = 0, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Articles with id > after_id, oldest first: id, title, description and provider tickers."""
+        rows = self.conn().execute("""
+            SELECT id, title, description, tickers_json
+            FROM articles WHERE id > ? ORDER BY id LIMIT ?
+        """, (after_id, limit))
+        return [
+            {"id": r["id"], "title": r["title"], "description": r["description"],
+             "tickers": json.loads(r["tickers_json"] or "[]")}
+            for r in rows
+        ]
+
+    def articles_for_symbol(
+        self, symbol: str, *, since: Optional[str] = None, limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Newest articles tagged with symbol, optionally published at or after since."""
+        where, params = ["t.symbol = ?"], [symbol.upper()]
+        if since is not None:
+            where.append("t.published_at >= ?")
+            params.append(since)
+        rows = self.conn().execute(f"""
+            SELECT a.id, a.provider, a.url, a.title, a.published_at, a.source
+            FROM article_tickers t JOIN articles a ON a.id = t.article_id
+            WHERE {" AND ".join(where)}
+            ORDER BY t.published_at DESC
+            LIMIT ?
+        """, (*params, limit))
+        return [dict(r) for r in rows]
+
+    # -----------------------------------------------------------------------
+    # Dashboard feed
+    # -----------------------------------------------------------------------
+
+    # Must match the ix_articles_feed expression for the index to be used
+    _SORT_AT = "COALESCE(a.published_at, a.inserted_at)"
+
+    def _feed_query(
+        self,
+        where: List[str],
+        params: List[Any],
+        *,
+        source: Optional[str],
+        label: Optional[str],
+        ticker: Optional[str],
+        since: Optional[str],
+        until: Optional[str],
+        order: str,
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        for clause, value in ((f"{self._SORT_AT} >= ?", since), (f"{self._SORT_AT} < ?", until),
+                              ("a.source = ?", source)):
+            if value is not None:
+                where.append(clause)
+                params.append(value)
+        if ticker:
+            where.append("a.id IN (SELECT article_id FROM article_tickers WHERE symbol = ?)")
+            params.append(ticker.strip().upper())
+        if label:
+            where.append("s.label = ?")
+            params.append(label)
+        rows = self.conn().execute(f"""
+            SELECT a.id, {self._SORT_AT} AS sort_at, a.published_at, a.source, a.title, a.url,
+                   s.label AS sentiment, s.score
+            FROM articles a
+            LEFT JOIN latest_sentiment s ON s.article_id = a.id
+            WHERE {" AND ".join(where) or "1"}
+            ORDER BY {order}
+            LIMIT ?
+        """, (*params, limit))
+        return [dict(r) for r in rows]
+
+    def articles_page(
+        self,
+        *,
+        after: Optional[Tuple[str, int]] = None,
+        limit: int = 50,
+        source: Optional[str] = None,
+        label: Optional[str] = None,
+        ticker: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Newest-first articles with their latest sentiment. Pages are keyed on
+        (sort_at, id): pass the last row's pair as after to get the next page,
+        which costs the same however deep it is. sort_at is published_at
+        (inserted_at when missing); since is inclusive, until exclusive.
+        """
+        where: List[str] = []
+        params: List[Any] = []
+        if after is not None:
+            # Spelled out rather than as a row value so SQLite seeks the index instead of scanning to the cursor
+            where.append(f"{self._SORT_AT} <= ? AND ({self._SORT_AT} < ? OR a.id < ?)")
+            params.extend([after[0], after[0], after[1]])
+        return self._feed_query(
+            where, params, source=source, label=label, ticker=ticker, since=since, until=until,
+            order=f"{self._SORT_AT} DESC, a.id DESC", limit=limit,
+        )
+
+    def articles_since_id(
+        self,
+        last_id: int,
+        *,
+        limit: int = 1000,
+        source: Optional[str] = None,
+        label: Optional[str] = None,
+        ticker: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Articles stored after last_id (ids only grow), oldest first, with the same filters."""
+        return self._feed_query(
+            ["a.id > ?"], [last_id], source=source, label=label, ticker=ticker, since=since, until=until,
+            order="a.id", limit=limit,
+        )
+
+    def sources(self) -> List[str]:
+        return [r["source"] for r in self.conn().execute(
+            "SELECT DISTINCT source FROM articles WHERE source IS NOT NULL ORDER BY source"
+        )]
+
+    def recent_titles(self, limit: int = 10000) -> List[str]:
+        """Distinct non-empty headlines, newest first (for distillation and benchmarks)."""
+        return [r["title"] for r in self.conn().execute(
+            "SELECT title FROM articles WHERE title != '' GROUP BY title ORDER BY MAX(id) DESC LIMIT ?", (limit,)
+        )]
+
+    # -----------------------------------------------------------------------
+    # Full-text search
+    # -----------------------------------------------------------------------
+
+    def search_articles(
+        self,
+        query: str,
+        *,
+        limit: int = 50,
+        offset: int = 0,
+        mark: Tuple[str, str] = ("[", "]")
+    ) -> List[Dict[str, Any]]:
+        """
+        BM25-ranked articles matching every word of query (the last one as a
+        prefix), best first. Each result carries a highlighted title and a
+        snippet of the best-matching column, wrapped in mark.
+        """
+        match = _fts_query(query)
+        if not match:
+            return []
+        rows = self.conn().execute("""
+            SELECT a.id, a.url, a.title, a.source, a.published_at,
+                   highlight(articles_fts, 0, ?, ?) AS title_hl,
+                   snippet(articles_fts, -1, ?, ?, '…', 16) AS snippet,
+                   bm25(articles_fts, 10.0, 2.0, 1.0) AS rank
+            FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid
+            WHERE articles_fts MATCH ?
+            ORDER BY rank
+            LIMIT ? OFFSET ?
+        """, (*mark, *mark, match, limit, offset))
+        return [dict(r) for r in rows]
+
+    # -----------------------------------------------------------------------
+    # Near-duplicate index
+    # -----------------------------------------------------------------------
+
+    def find_title_candidates(self, band_sets: List[Tuple[int, ...]]) -> List[List[Tuple[str, str]]]:
+        """For each tuple of LSH band values, the stored (url, words) titles sharing any band."""
+        conn = self.conn()
+        out: List[List[Tuple[str, str]]] = []
+        for b in band_sets:
+            if not b:
+                out.append([])
+                continue
+            rows = conn.execute(f"""
+                SELECT DISTINCT t.url, t.words FROM title_bands b JOIN title_words t ON t.url = b.url
+                WHERE {" OR ".join(["(b.band = ? AND b.value = ?)"] * len(b))}
+            """, [v for pair in enumerate(b) for v in pair])
+            out.append([(r["url"], r["words"]) for r in rows])
+        return out
+
+    def get_near_duplicate_links(self, urls: List[str]) -> Dict[str, Tuple[str, int]]:
+        """Return {url: (canonical_url, distance)} for urls already linked as duplicates."""
+        out: Dict[str, Tuple[str, int]] = {}
+        conn = self.conn()
+        for chunk in _chunks(list(dict.fromkeys(urls))):
+            rows = conn.execute(
+                f"SELECT url, canonical_url, distance FROM near_duplicates WHERE url IN ({_placeholders(len(chunk))})",
+                chunk,
+            )
+            out.update({r["url"]: (r["canonical_url"], int(r["distance"])) for r in rows})
+        return out
+
+    def bulk_save_title_words(self, rows: List[Tuple[str, str, Tuple[int, ...]]]) -> None:
+        """rows are (url, space-joined title words, LSH band values)."""
+        if not rows:
+            return
+        conn = self.conn()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO title_words(url, words) VALUES (?, ?)",
+                             [(url, ws) for url, ws, _ in rows])
+            conn.executemany("DELETE FROM title_bands WHERE url = ?", [(url,) for url, _, _ in rows])
+            conn.executemany("INSERT OR IGNORE INTO title_bands(band, value, url) VALUES (?, ?, ?)",
+                             [(i, v, url) for url, _, bs in rows for i, v in enumerate(bs)])
+
+    def bulk_save_near_duplicates(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        rows have url, canonical_url, distance and optionally provider, title.
+        A url linked again (its earlier canonical was never stored) gets the new link.
+        """
+        if not rows:
+            return
+        now = now_iso()
+        conn = self.conn()
+        with conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO near_duplicates(url, canonical_url, provider, title, distance, inserted_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, [(r["url"], r["canonical_url"], r.get("provider"), r.get("title"), r["distance"], now)
+                  for r in rows])
+
+    def articles_without_title_words(self, *, limit: int = 1000) -> List[Tuple[str, str]]:
+        rows = self.conn().execute("""
+            SELECT a.url, a.title FROM articles a
+            LEFT JOIN title_words t ON t.url = a.url
+            WHERE t.url IS NULL
+            LIMIT ?
+        """, (limit,))
+        return [(r["url"], r["title"]) for r in rows]
+
+    # -----------------------------------------------------------------------
+    # Fetch watermarks
+    # -----------------------------------------------------------------------
+
+    def get_watermarks(self) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Return {(provider, query): row dict} for every stored watermark."""
+        rows = self.conn().execute("SELECT * FROM fetch_watermarks")
+        return {(r["provider"], r["query"]): dict(r) for r in rows}
+
+    def save_watermark(
+        self,
+        *,
+        provider: str,
+        query: str,
+        last_published_at: Optional[str],
+        last_count: int,
+        poll_interval_s: float,
+        next_poll_at: str,
+        resume_until: Optional[str] = None,
+        pending_published_at: Optional[str] = None
+    ) -> None:
+        """
+        Upsert one watermark; a NULL last_published_at never overwrites a
+        stored one, while resume_until / pending_published_at are always set.
+        """
+        conn = self.conn()
+        with conn:
+            conn.execute("""
+                INSERT INTO fetch_watermarks(
+                    provider, query, last_published_at, last_count, resume_until, pending_published_at,
+                    poll_interval_s, next_poll_at, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(provider, query) DO UPDATE SET
+                    last_published_at=COALESCE(excluded.last_published_at, last_published_at),
+                    last_count=excluded.last_count,
+                    resume_until=excluded.resume_until,
+                    pending_published_at=excluded.pending_published_at,
+                    poll_interval_s=excluded.poll_interval_s,
+                    next_poll_at=excluded.next_poll_at,
+                    updated_at=excluded.updated_at
+            """, (provider, query, last_published_at, last_count, resume_until, pending_published_at,
+                  poll_interval_s, next_poll_at, now_iso()))
+
+    # -----------------------------------------------------------------------
+    # Inference cache
+    # -----------------------------------------------------------------------
+
+    def get_cached_sentiments(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Return {key: {"label", "score", "probs", "stage"}} for the keys
+        present in sentiment_cache. Label-only rows from before scores were
+        cached count as misses.
+        """
+        out: Dict[str, Dict[str, Any]] = {}
+        conn = self.conn()
+        for chunk in _chunks(keys):
+            rows = conn.execute(f"""
+                SELECT key, label, score, p_positive, p_negative, p_neutral, stage FROM sentiment_cache
+                WHERE key IN ({_placeholders(len(chunk))}) AND score IS NOT NULL
+            """, chunk)
+            out.update({
+                r["key"]: {"label": r["label"], "score": r["score"], "probs": _probs_from_row(r), "stage": r["stage"]}
+                for r in rows
+            })
+        return out
+
+    def save_cached_sentiments(self, results: Dict[str, Dict[str, Any]], *, model_version: str) -> None:
+        """Store {key: {"label", "score", "probs", optionally "stage"}} for model_version."""
+        now = now_iso()
+        conn = self.conn()
+        with conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO sentiment_cache(
+                  key, model_version, label, score, p_positive, p_negative, p_neutral, stage, inserted_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (k, model_version, r["label"], r.get("score"), *_prob_params(r.get("probs")), r.get("stage"), now)
+                for k, r in results.items()
+            ])
+
+    def purge_cached_sentiments(self, *, keep_version: str) -> int:
+        """Drop cache rows written by any model other than keep_version."""
+        conn = self.conn()
+        with conn:
+            return conn.execute(
+                "DELETE FROM sentiment_cache WHERE model_version != ?", (keep_version,)
+            ).rowcount
+
+    def sentiment_stage_counts(self, *, since: Optional[str] = None) -> Dict[str, int]:
+        """
+        {stage: sentiments} for sentiments written at or after since, by the
+        cascade stage that decided them ("" for those scored outside the cascade).
+        """
+        rows = self.conn().execute("""
+            SELECT COALESCE(stage, '') AS stage, COUNT(*) AS n FROM sentiments
+            WHERE ? IS NULL OR inserted_at >= ? GROUP BY 1
+        """, (since, since))
+        return {r["stage"]: r["n"] for r in rows}
+
+    # -----------------------------------------------------------------------
+    # Sentiment rollups
+    # -----------------------------------------------------------------------
+
+    def rebuild_rollups(self, *, batch_size: int = 5000) -> int:
+        """
+        Recompute sentiment_rollups from the current sentiment of every
+        (article, engine). Returns sentiments counted.
+        """
+        conn = self.conn()
+        counted = 0
+        last_id = 0
+        with conn:
+            conn.execute("DELETE FROM sentiment_rollups")
+            while True:
+                batch = conn.execute(
+                    _LATEST_PER_ENGINE_SQL.format(where="s.id > ?") + " ORDER BY s.id LIMIT ?",
+                    (last_id, batch_size),
+                ).fetchall()
+                if not batch:
+                    return counted
+                _apply_rollups(conn, [
+                    {"article_id": r["article_id"], "engine": r["engine"], "label": r["label"],
+                     "score": r["score"], "probs": _probs_from_row(r)}
+                    for r in batch
+                ])
+                counted += len(batch)
+                last_id = batch[-1]["id"]
+
+    def sentiment_trend(
+        self,
+        resolution: str = "day",
+        *,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        ticker: str = ALL_TICKERS,
+        source: Optional[str] = None,
+        engine: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Per (bucket, label): n, and the mean score and class probabilities
+        of the rows that have them, oldest bucket first. since/until bound bucket starts, inclusive.
+        """
+        if resolution not in ROLLUP_RESOLUTIONS:
+            raise ValueError(f"resolution must be one of {sorted(ROLLUP_RESOLUTIONS)}")
+        where, params = ["resolution = ?", "ticker = ?"], [resolution, ticker]
+        for clause, value in (("bucket >= ?", since), ("bucket <= ?", until),
+                              ("source = ?", source), ("engine = ?", engine)):
+            if value is not None:
+                where.append(clause)
+                params.append(value)
+        rows = self.conn().execute(f"""
+            SELECT bucket, label, SUM(n) AS n,
+                   SUM(score_sum) / NULLIF(SUM(n_scored), 0) AS score,
+                   SUM(p_positive_sum) / NULLIF(SUM(n_probs), 0) AS p_positive,
+                   SUM(p_negative_sum) / NULLIF(SUM(n_probs), 0) AS p_negative,
+                   SUM(p_neutral_sum) / NULLIF(SUM(n_probs), 0) AS p_neutral
+            FROM sentiment_rollups
+            WHERE {" AND ".join(where)}
+            GROUP BY bucket, label
+            ORDER BY bucket, label
+        """, params)
+        return [dict(r) for r in rows]
+
+
+# Every Store operation, and so every module-level function below, is timed
+metrics.instrument_methods(Store, "finnews_db_seconds", exclude=("conn", "close"))
+
+
 # ---------------------------------------------------------------------------
-# Simple upsert/save functions
+# Module-level API, backed by a shared default Store
 # ---------------------------------------------------------------------------
 
+_default_store: Optional[Store] = None
+_default_lock = threading.Lock()
+
+def default_store() -> Store:
+    """
+    Shared Store for DB_PATH; recreated if DB_PATH is reassigned, which
+    closes the previous one (reassign only while no other thread uses it).
+    """
+    global _default_store
+    with _default_lock:
+        if _default_store is None or _default_store.db_path != DB_PATH:
+            if _default_store is not None:
+                _default_store.close()
+            _default_store = Store(DB_PATH)
+        return _default_store
+
+def init_db() -> None:
+    """Initialize tables and indices."""
+    default_store().init_db()
+
+def get_article_id_by_url(url: str) -> Optional[int]:
+    return default_store().get_article_id_by_url(url)
+
+def has_sentiment(article_id: int) -> bool:
+    return default_store().has_sentiment(article_id)
+
+def get_article_ids_by_url(urls: List[str]) -> Dict[str, int]:
+    return default_store().get_article_ids_by_url(urls)
+
+def article_ids_with_sentiment(article_ids: List[int]) -> Set[int]:
+    return default_store().article_ids_with_sentiment(article_ids)
+
 def upsert_article(
     *,
     provider: str,
@@ -60,38 +1106,23 @@ def upsert_article(
     tickers: Optional[List[str]],
     raw_obj: Dict[str, Any]
 ) -> int:
-    tickers_json = json.dumps(tickers or [])
-    raw_json = json.dumps(raw_obj, ensure_ascii=False)
-    now = now_iso()
+    return default_store().upsert_article(
+        provider=provider, external_id=external_id, url=url, title=title,
+        published_at=published_at, source=source, language=language,
+        tickers=tickers, raw_obj=raw_obj,
+    )
 
-    with get_conn() as conn:
-        row = conn.execute("SELECT id FROM articles WHERE url = ?", (url,)).fetchone()
-        if row:
-            conn.execute("""
-                UPDATE articles SET
-                    provider=?, external_id=?, title=?, published_at=?, source=?,
-                    language=?, tickers_json=?, raw_json=?
-                WHERE id=?
-            """, (provider, external_id, title, published_at, source,
-                  language, tickers_json, raw_json, row["id"]))
-            return row["id"]
-
-        cur = conn.execute("""
-            INSERT INTO articles (
-                provider, external_id, url, title, published_at, source,
-                language, tickers_json, raw_json, inserted_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (provider, external_id, url, title, published_at, source,
-              language, tickers_json, raw_json, now))
-        return cur.lastrowid
-
-def save_sentiment(article_id: int, engine: str, score: float, label: str) -> int:
-    with get_conn() as conn:
-        cur = conn.execute("""
-            INSERT INTO sentiments(article_id, engine, score, label, inserted_at)
-            VALUES (?, ?, ?, ?, ?)
-        """, (article_id, engine, score, label, now_iso()))
-        return cur.lastrowid
+def bulk_upsert_articles(articles: List[Dict[str, Any]]) -> List[Tuple[int, bool]]:
+    return default_store().bulk_upsert_articles(articles)
+
+def save_sentiment(
+    article_id: int, engine: str, score: float, label: str, probs: Optional[Dict[str, float]] = None,
+    *, model_version: str = ""
+) -> int:
+    return default_store().save_sentiment(article_id, engine, score, label, probs, model_version=model_version)
+
+def bulk_save_sentiments(rows: List[Dict[str, Any]]) -> int:
+    return default_store().bulk_save_sentiments(rows)
 
 def save_price_move(
     article_id: int, symbol: str,
@@ -99,12 +1130,89 @@ def save_price_move(
     tN_utc: str, tN_px: float,
     delta_pct: float, horizon_min: int
 ) -> int:
-    with get_conn() as conn:
-        cur = conn.execute("""
-            INSERT INTO price_moves(
-                article_id, symbol, t0_utc, t0_px, tN_utc, tN_px,
-                delta_pct, horizon_min, inserted_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (article_id, symbol, t0_utc, t0_px, tN_utc, tN_px,
-              delta_pct, horizon_min, now_iso()))
-        return cur.lastrowid
+    return default_store().save_price_move(
+        article_id, symbol, t0_utc, t0_px, tN_utc, tN_px, delta_pct, horizon_min
+    )
+
+def articles_page(
+    *,
+    after: Optional[Tuple[str, int]] = None,
+    limit: int = 50,
+    source: Optional[str] = None,
+    label: Optional[str] = None,
+    ticker: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    return default_store().articles_page(
+        after=after, limit=limit, source=source, label=label, ticker=ticker, since=since, until=until
+    )
+
+def recent_titles(limit: int = 10000) -> List[str]:
+    return default_store().recent_titles(limit)
+
+def get_raw_payload(article_id: int) -> Optional[Any]:
+    return default_store().get_raw_payload(article_id)
+
+def get_raw_payloads(article_ids: List[int]) -> Dict[int, Any]:
+    return default_store().get_raw_payloads(article_ids)
+
+def search_articles(query: str, *, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+    return default_store().search_articles(query, limit=limit, offset=offset)
+
+def bulk_save_price_moves(rows: Iterable[Tuple[Any, ...]]) -> int:
+    return default_store().bulk_save_price_moves(rows)
+
+def bulk_save_article_tickers(symbols: Dict[int, List[str]]) -> None:
+    default_store().bulk_save_article_tickers(symbols)
+
+def articles_for_symbol(symbol: str, *, since: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+    return default_store().articles_for_symbol(symbol, since=since, limit=limit)
+
+def get_watermarks() -> Dict[Tuple[str, str], Dict[str, Any]]:
+    return default_store().get_watermarks()
+
+def save_watermark(
+    *,
+    provider: str,
+    query: str,
+    last_published_at: Optional[str],
+    last_count: int,
+    poll_interval_s: float,
+    next_poll_at: str,
+    resume_until: Optional[str] = None,
+    pending_published_at: Optional[str] = None
+) -> None:
+    default_store().save_watermark(
+        provider=provider, query=query, last_published_at=last_published_at,
+        last_count=last_count, poll_interval_s=poll_interval_s, next_poll_at=next_poll_at,
+        resume_until=resume_until, pending_published_at=pending_published_at,
+    )
+
+def rebuild_rollups() -> int:
+    return default_store().rebuild_rollups()
+
+def sentiment_trend(
+    resolution: str = "day",
+    *,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    ticker: str = ALL_TICKERS,
+    source: Optional[str] = None,
+    engine: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    return default_store().sentiment_trend(
+        resolution, since=since, until=until, ticker=ticker, source=source, engine=engine
+    )
+
+def get_cached_sentiments(keys: List[str]) -> Dict[str, Dict[str, Any]]:
+    return default_store().get_cached_sentiments(keys)
+
+def save_cached_sentiments(results: Dict[str, Dict[str, Any]], *, model_version: str) -> None:
+    default_store().save_cached_sentiments(results, model_version=model_version)
+
+def purge_cached_sentiments(*, keep_version: str) -> int:
+    return default_store().purge_cached_sentiments(keep_version=keep_version)
+
+def sentiment_stage_counts(*, since: Optional[str] = None) -> Dict[str, int]:
+    return default_store().sentiment_stage_counts(since=since)
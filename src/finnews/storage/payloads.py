@@ -0,0 +1,74 @@
+"""
+Compression for raw provider payloads kept in article_raw.
+
+zstd (the optional `zstandard` package) when installed, zlib otherwise. Both
+can use a shared dictionary built from earlier payloads: provider JSON
+repeats the same keys and boilerplate in every article, which is most of
+what a single small payload cannot compress on its own.
+"""
+import json, zlib
+from typing import Any, List, Optional
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+DEFAULT_CODEC = "zstd" if zstandard is not None else "zlib"
+# zlib only looks back 32 KiB, so a longer preset dictionary is wasted
+ZLIB_MAX_DICT = 32 * 1024
+
+
+def _zstd():
+    if zstandard is None:
+        raise ImportError("This payload is zstd-compressed: pip install zstandard")
+    return zstandard
+
+
+def encode(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def decode(data: bytes) -> Any:
+    return json.loads(data.decode("utf-8"))
+
+
+def compress(data: bytes, *, codec: str = DEFAULT_CODEC, dictionary: Optional[bytes] = None) -> bytes:
+    if codec == "zstd":
+        zd = _zstd()
+        d = zd.ZstdCompressionDict(dictionary) if dictionary else None
+        return zd.ZstdCompressor(level=10, dict_data=d).compress(data)
+    if codec == "zlib":
+        c = zlib.compressobj(9, zdict=dictionary) if dictionary else zlib.compressobj(9)
+        return c.compress(data) + c.flush()
+    raise ValueError(f"unknown codec {codec!r}")
+
+
+def decompress(blob: bytes, *, codec: str, dictionary: Optional[bytes] = None) -> bytes:
+    if codec == "zstd":
+        zd = _zstd()
+        d = zd.ZstdCompressionDict(dictionary) if dictionary else None
+        return zd.ZstdDecompressor(dict_data=d).decompress(blob)
+    if codec == "zlib":
+        d = zlib.decompressobj(zdict=dictionary) if dictionary else zlib.decompressobj()
+        return d.decompress(blob) + d.flush()
+    raise ValueError(f"unknown codec {codec!r}")
+
+
+def train_dictionary(samples: List[bytes], *, codec: str = DEFAULT_CODEC, size: int = 16 * 1024) -> bytes:
+    """
+    A shared dictionary for codec from sample payloads. zstd trains one;
+    zlib takes a preset window of sample text, with the most recent samples
+    last since zlib matches nearer bytes more cheaply.
+    """
+    if codec == "zstd":
+        return _zstd().train_dictionary(size, samples).as_bytes()
+    if codec == "zlib":
+        window = min(size, ZLIB_MAX_DICT)
+        out = b""
+        for s in reversed(samples):
+            if len(out) >= window:
+                break
+            out = s + out
+        return out[-window:]
+    raise ValueError(f"unknown codec {codec!r}")
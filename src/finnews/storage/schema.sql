@@ -4,25 +4,88 @@ CREATE TABLE IF NOT EXISTS articles(
   external_id TEXT,
   url TEXT NOT NULL UNIQUE,
   title TEXT NOT NULL,
+  description TEXT,
   published_at TEXT,
   source TEXT,
   language TEXT,
   tickers_json TEXT,
-  raw_json TEXT NOT NULL,
   inserted_at TEXT NOT NULL
 );
 CREATE INDEX IF NOT EXISTS ix_articles_published ON articles(published_at);
 CREATE INDEX IF NOT EXISTS ix_articles_provider ON articles(provider);
+-- Dashboard feed: keyset pages on (sort time, id), overall and per source
+CREATE INDEX IF NOT EXISTS ix_articles_feed ON articles(COALESCE(published_at, inserted_at), id);
+CREATE INDEX IF NOT EXISTS ix_articles_source_feed ON articles(source, COALESCE(published_at, inserted_at), id);
+
+-- Full-text index over articles (external content: stores only the index)
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+  title, description, source,
+  content='articles', content_rowid='id',
+  tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN
+  INSERT INTO articles_fts(rowid, title, description, source)
+  VALUES (new.id, new.title, new.description, new.source);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN
+  INSERT INTO articles_fts(articles_fts, rowid, title, description, source)
+  VALUES ('delete', old.id, old.title, old.description, old.source);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_fts_update AFTER UPDATE OF title, description, source ON articles BEGIN
+  INSERT INTO articles_fts(articles_fts, rowid, title, description, source)
+  VALUES ('delete', old.id, old.title, old.description, old.source);
+  INSERT INTO articles_fts(rowid, title, description, source)
+  VALUES (new.id, new.title, new.description, new.source);
+END;
+
+-- Raw provider payloads, compressed (see storage/payloads.py) and read only on demand
+CREATE TABLE IF NOT EXISTS article_raw(
+  article_id INTEGER PRIMARY KEY REFERENCES articles(id) ON DELETE CASCADE,
+  codec TEXT NOT NULL,
+  dict_id INTEGER REFERENCES raw_dictionaries(id),
+  payload BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS raw_dictionaries(
+  id INTEGER PRIMARY KEY,
+  codec TEXT NOT NULL,
+  data BLOB NOT NULL,
+  created_at TEXT NOT NULL
+);
+
+-- Provider and tagged symbols per article (published_at copied for range scans)
+CREATE TABLE IF NOT EXISTS article_tickers(
+  article_id INTEGER NOT NULL REFERENCES articles(id) ON DELETE CASCADE,
+  symbol TEXT NOT NULL,
+  published_at TEXT,
+  PRIMARY KEY(article_id, symbol)
+);
+CREATE INDEX IF NOT EXISTS ix_article_tickers_symbol ON article_tickers(symbol, published_at);
 
 CREATE TABLE IF NOT EXISTS sentiments(
   id INTEGER PRIMARY KEY,
   article_id INTEGER NOT NULL REFERENCES articles(id) ON DELETE CASCADE,
   engine TEXT NOT NULL,
+  model_version TEXT NOT NULL DEFAULT '',
   score REAL,
   label TEXT,
+  p_positive REAL,
+  p_negative REAL,
+  p_neutral REAL,
+  stage TEXT,                 -- cascade stage that decided the label ("fast" or "model")
   inserted_at TEXT NOT NULL
 );
-CREATE INDEX IF NOT EXISTS ix_sentiments_article ON sentiments(article_id);
+-- One current row per article, engine and model; re-scoring upserts it
+CREATE UNIQUE INDEX IF NOT EXISTS ux_sentiments_article_engine_version ON sentiments(article_id, engine, model_version);
+CREATE INDEX IF NOT EXISTS ix_sentiments_latest ON sentiments(article_id, inserted_at);
+DROP INDEX IF EXISTS ix_sentiments_article;
+
+-- The most recently written sentiment of each article (any engine or model)
+CREATE VIEW IF NOT EXISTS latest_sentiment AS
+SELECT s.* FROM sentiments s
+WHERE s.id = (
+  SELECT s2.id FROM sentiments s2 WHERE s2.article_id = s.article_id
+  ORDER BY s2.inserted_at DESC, s2.id DESC LIMIT 1
+);
 
 CREATE TABLE IF NOT EXISTS price_moves(
   id INTEGER PRIMARY KEY,
@@ -38,3 +101,80 @@ CREATE TABLE IF NOT EXISTS price_moves(
 );
 CREATE INDEX IF NOT EXISTS ix_moves_article ON price_moves(article_id);
 CREATE INDEX IF NOT EXISTS ix_moves_symbol ON price_moves(symbol);
+-- One move per article, symbol and horizon, so backfills can be re-run
+CREATE UNIQUE INDEX IF NOT EXISTS ux_moves_article_symbol_horizon ON price_moves(article_id, symbol, horizon_min);
+
+-- Inference results keyed by sha256(model version, normalized text)
+CREATE TABLE IF NOT EXISTS sentiment_cache(
+  key TEXT PRIMARY KEY,
+  model_version TEXT NOT NULL,
+  label TEXT NOT NULL,
+  score REAL,
+  p_positive REAL,
+  p_negative REAL,
+  p_neutral REAL,
+  stage TEXT,
+  inserted_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_sentiment_cache_version ON sentiment_cache(model_version);
+
+-- Incremental fetch state per (provider, query) for the polling daemon
+CREATE TABLE IF NOT EXISTS fetch_watermarks(
+  provider TEXT NOT NULL,
+  query TEXT NOT NULL,
+  last_published_at TEXT,
+  last_count INTEGER NOT NULL DEFAULT 0,
+  -- A poll cut off at POLL_MAX_REQUESTS: where the next one resumes paging back,
+  -- and the newest item seen since last_published_at, which it becomes once drained
+  resume_until TEXT,
+  pending_published_at TEXT,
+  poll_interval_s REAL NOT NULL,
+  next_poll_at TEXT NOT NULL,
+  updated_at TEXT NOT NULL,
+  PRIMARY KEY(provider, query)
+);
+
+-- Normalized words of each stored article title and its MinHash LSH bands, for near-duplicate lookups
+CREATE TABLE IF NOT EXISTS title_words(
+  url TEXT PRIMARY KEY,
+  words TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS title_bands(
+  band INTEGER NOT NULL,
+  value INTEGER NOT NULL,
+  url TEXT NOT NULL,
+  PRIMARY KEY(band, value, url)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_title_bands_url ON title_bands(url);
+
+-- Redundant copies linked to their canonical article instead of being stored/scored
+CREATE TABLE IF NOT EXISTS near_duplicates(
+  url TEXT PRIMARY KEY,
+  canonical_url TEXT NOT NULL,
+  provider TEXT,
+  title TEXT,
+  distance INTEGER NOT NULL,
+  inserted_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_near_duplicates_canonical ON near_duplicates(canonical_url);
+
+-- Sentiment counts per time bucket, maintained alongside every sentiments insert.
+-- ticker '*' counts every article once; per-symbol rows overlap it.
+-- score_sum covers the n_scored rows that have a score, p_*_sum the n_probs rows with probabilities.
+CREATE TABLE IF NOT EXISTS sentiment_rollups(
+  resolution TEXT NOT NULL,
+  bucket TEXT NOT NULL,
+  source TEXT NOT NULL,
+  ticker TEXT NOT NULL,
+  engine TEXT NOT NULL,
+  label TEXT NOT NULL,
+  n INTEGER NOT NULL,
+  n_scored INTEGER NOT NULL DEFAULT 0,
+  n_probs INTEGER NOT NULL DEFAULT 0,
+  score_sum REAL NOT NULL DEFAULT 0,
+  p_positive_sum REAL NOT NULL DEFAULT 0,
+  p_negative_sum REAL NOT NULL DEFAULT 0,
+  p_neutral_sum REAL NOT NULL DEFAULT 0,
+  PRIMARY KEY(resolution, bucket, source, ticker, engine, label)
+);
+CREATE INDEX IF NOT EXISTS ix_rollups_ticker ON sentiment_rollups(resolution, ticker, bucket);
@@ -0,0 +1,205 @@
+"""
+Small CPU-only sentiment model: softmax regression over hashed n-grams.
+
+Features are word unigrams and bigrams plus character trigrams of each
+word, hashed into a fixed number of buckets (no vocabulary to store), with
+log counts scaled to unit length. Scoring a batch is one sparse matrix
+product, so it runs orders of magnitude faster than the transformer and
+needs neither torch nor transformers.
+
+The weights are trained by distill.py on the fine-tuned model's soft
+labels. StudentPredictor serves them through the same interface as
+predict_text.SentimentPredictor; select it with
+FINNEWS_INFERENCE_BACKEND=student.
+"""
+import hashlib, os, re, zlib
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+try:
+    import metrics
+except ImportError:
+    from . import metrics  # type: ignore
+
+N_FEATURES = 1 << 18
+_WORD_RE = re.compile(r"[a-z0-9]+(?:['.,][a-z0-9]+)*|[$%+-]")
+
+
+# word -> hashed buckets of the word and its character trigrams, per n_features
+_word_buckets: Dict[Tuple[int, str], List[int]] = {}
+_WORD_CACHE_SIZE = 200_000
+
+
+def _hash(gram: str, mask: int) -> int:
+    return zlib.crc32(gram.encode("utf-8")) & mask
+
+
+def _buckets(text: str, mask: int) -> List[int]:
+    """Hashed word unigrams, bigrams and in-word character trigrams of text."""
+    words = _WORD_RE.findall(text.lower())
+    out = [_hash(f"b:{a} {b}", mask) for a, b in zip(words, words[1:])]
+    for w in words:
+        cached = _word_buckets.get((mask, w))
+        if cached is None:
+            padded = f"<{w}>"
+            cached = [_hash(f"w:{w}", mask)] + [_hash(f"c:{padded[i:i + 3]}", mask) for i in range(len(padded) - 2)]
+            if len(_word_buckets) >= _WORD_CACHE_SIZE:
+                _word_buckets.clear()
+            _word_buckets[(mask, w)] = cached
+        out += cached
+    return out
+
+
+def _rows(texts: Sequence[str], n_features: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """CSR (indptr, indices, values): one L2-normalized row of log(1 + count) per text."""
+    indptr, indices, values = [0], [], []
+    mask = n_features - 1
+    for text in texts:
+        counts = Counter(_buckets(text or "", mask))
+        row = np.log1p(np.fromiter(counts.values(), dtype="float32", count=len(counts)))
+        norm = float(np.sqrt((row * row).sum())) or 1.0
+        indices.extend(counts.keys())
+        values.extend((row / norm).tolist())
+        indptr.append(len(indices))
+    return np.asarray(indptr, dtype="int64"), np.asarray(indices, dtype="int64"), np.asarray(values, dtype="float32")
+
+
+def featurize(texts: Sequence[str], n_features: int = N_FEATURES) -> sparse.csr_matrix:
+    """Hashed n-gram features of texts as a (len(texts), n_features) sparse matrix."""
+    indptr, indices, values = _rows(texts, n_features)
+    return sparse.csr_matrix((values, indices, indptr), shape=(len(texts), n_features))
+
+
+def _softmax(z: np.ndarray) -> np.ndarray:
+    z = np.exp(z - z.max(axis=1, keepdims=True))
+    return z / z.sum(axis=1, keepdims=True)
+
+
+class HashedLinearModel:
+    def __init__(self, labels: Sequence[str], n_features: int = N_FEATURES,
+                 W: Optional[np.ndarray] = None, b: Optional[np.ndarray] = None):
+        if n_features & (n_features - 1):
+            raise ValueError("n_features must be a power of two")
+        self.labels = list(labels)
+        self.n_features = n_features
+        self.W = W if W is not None else np.zeros((n_features, len(self.labels)), dtype="float32")
+        self.b = b if b is not None else np.zeros(len(self.labels), dtype="float32")
+
+    @property
+    def version(self) -> str:
+        digest = hashlib.sha256(self.W.tobytes())
+        digest.update(self.b.tobytes())
+        digest.update("\0".join(self.labels).encode("utf-8"))
+        return digest.hexdigest()[:16]
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        """(len(texts), len(labels)) class probabilities."""
+        if not len(texts):
+            return np.zeros((0, len(self.labels)), dtype="float32")
+        # Gather and sum the weight rows directly; a sparse matrix costs more than it saves here
+        indptr, indices, values = _rows(texts, self.n_features)
+        logits = np.tile(self.b, (len(texts), 1))
+        rows = np.flatnonzero(np.diff(indptr))
+        if len(rows):
+            weighted = self.W[indices] * values[:, None]
+            logits[rows] += np.add.reduceat(weighted, indptr[rows], axis=0)
+        return _softmax(logits)
+
+    def fit(
+        self,
+        texts: Sequence[str],
+        targets: np.ndarray,
+        *,
+        epochs: int = 10,
+        batch_size: int = 256,
+        lr: float = 0.02,
+        weight_decay: float = 1e-6,
+        seed: int = 42
+    ) -> "HashedLinearModel":
+        """
+        Minimize cross-entropy against targets, a (len(texts), len(labels))
+        array of probabilities (soft teacher labels or one-hot gold), with
+        Adam over minibatches.
+        """
+        X = featurize(texts, self.n_features)
+        Y = np.asarray(targets, dtype="float32")
+        rng = np.random.default_rng(seed)
+        params = [self.W, self.b]
+        m = [np.zeros_like(p) for p in params]
+        v = [np.zeros_like(p) for p in params]
+        beta1, beta2, eps, step = 0.9, 0.999, 1e-8, 0
+        for _ in range(epochs):
+            order = rng.permutation(X.shape[0])
+            for start in range(0, len(order), batch_size):
+                idx = order[start:start + batch_size]
+                Xb = X[idx]
+                G = (_softmax(Xb @ self.W + self.b) - Y[idx]) / len(idx)
+                grads = [np.asarray(Xb.T @ G, dtype="float32"), G.sum(axis=0)]
+                step += 1
+                for p, g, mi, vi in zip(params, grads, m, v):
+                    mi *= beta1
+                    mi += (1 - beta1) * g
+                    vi *= beta2
+                    vi += (1 - beta2) * g * g
+                    p -= lr * ((mi / (1 - beta1 ** step)) / (np.sqrt(vi / (1 - beta2 ** step)) + eps) + weight_decay * p)
+        return self
+
+    def save(self, path: str) -> str:
+        """Write the weights (compressed .npz) and return the model version."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        version = self.version
+        with open(path, "wb") as f:
+            np.savez_compressed(f, W=self.W, b=self.b, labels=np.asarray(self.labels),
+                                n_features=self.n_features, version=version)
+        return version
+
+    @classmethod
+    def load(cls, path: str) -> "HashedLinearModel":
+        with np.load(path) as z:
+            return cls([str(x) for x in z["labels"]], int(z["n_features"]), W=z["W"], b=z["b"])
+
+
+def model_version(path: str) -> Optional[str]:
+    """Version recorded in a saved model, without loading the weights; None if missing."""
+    try:
+        with np.load(path) as z:
+            return str(z["version"])
+    except OSError:
+        return None
+
+
+class StudentPredictor:
+    """predict_text.SentimentPredictor's interface over a HashedLinearModel."""
+    backend = "student"
+
+    def __init__(self, model_path: str):
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"{model_path} not found; run distill.py first")
+        print(f"Loading model from: {model_path} ({self.backend})")
+        self.model_path = model_path
+        self.model = HashedLinearModel.load(model_path)
+        self.id2label = dict(enumerate(self.model.labels))
+
+    def predict(self, text: str) -> str:
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts: List[str], batch_size: int = 32) -> List[str]:
+        return [r["label"] for r in self.predict_scores(texts, batch_size=batch_size)]
+
+    def predict_scores(self, texts: List[str], batch_size: int = 32) -> List[Dict[str, Any]]:
+        """Same result dicts as SentimentPredictor.predict_scores; batch_size is unused."""
+        metrics.inc("finnews_inference_texts_total", len(texts), backend=self.backend)
+        with metrics.timer("finnews_inference_seconds", backend=self.backend, phase="forward"):
+            proba = self.model.predict_proba(list(texts))
+        out = []
+        for probs in proba.tolist():
+            best = max(range(len(probs)), key=probs.__getitem__)
+            out.append({
+                "label": self.id2label[best],
+                "score": probs[best],
+                "probs": {self.id2label[j]: p for j, p in enumerate(probs)},
+            })
+        return out
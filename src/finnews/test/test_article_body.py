@@ -0,0 +1,84 @@
+"""
+Offline check of article body extraction and the HTML cache (recorded
+pages under test/fixtures/html, temporary cache directory only).
+
+Run:
+  python src/finnews/test/test_article_body.py
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "html")
+CHIPMAKER = "https://example.com/markets/chipmaker-beats-estimates"
+RETAILER = "https://example.com/markets/retailer-cuts-guidance"
+
+
+# Robust imports to support different run modes
+def _import_article_body():
+    try:
+        from finnews import article_body
+        return article_body
+    except Exception:
+        try:
+            import article_body  # type: ignore
+            return article_body
+        except Exception:
+            import sys
+            from pathlib import Path
+            sys.path.append(str(Path(__file__).resolve().parents[1]))  # add .../src/finnews
+            import article_body  # type: ignore
+            return article_body
+
+
+article_body = _import_article_body()
+
+
+def test_extracts_article_paragraphs_only():
+    with open(os.path.join(FIXTURES, "chipmaker-beats-estimates.html"), encoding="utf-8") as f:
+        text = article_body.extract_text(f.read())
+    paragraphs = text.split("\n\n")
+    assert len(paragraphs) == 3
+    assert paragraphs[0].startswith("The chipmaker reported quarterly revenue")
+    assert "improve through the year & that" in paragraphs[2]
+    for chrome in ("analytics", "Subscribe", "Read more", "Copyright", "Revenue by segment", "By Staff"):
+        assert chrome not in text
+
+
+def test_falls_back_to_all_paragraphs_without_article():
+    with open(os.path.join(FIXTURES, "retailer-cuts-guidance.html"), encoding="utf-8") as f:
+        text = article_body.extract_text(f.read())
+    paragraphs = text.split("\n\n")
+    assert len(paragraphs) == 2 and paragraphs[1].startswith("Shares fell")
+
+
+def test_pages_are_cached_after_first_fetch():
+    with tempfile.TemporaryDirectory() as root:
+        source = article_body.FixtureSource(FIXTURES)
+        fetcher = article_body.BodyFetcher(article_body.HtmlCache(root), source)
+        body = fetcher.body(CHIPMAKER)
+        assert body and fetcher.body("https://example.com/unknown") is None
+
+        # A cache-only fetcher now serves the same page without the source
+        cached = article_body.BodyFetcher(article_body.HtmlCache(root))
+        assert cached.body(CHIPMAKER) == body
+        assert cached.body(RETAILER) is None
+
+
+def test_document_text():
+    assert article_body.document_text({"title": "Headline", "body": None}) == "Headline"
+    assert article_body.document_text({"title": "Headline", "body": "Text."}) == "Headline\n\nText."
+
+
+def main() -> None:
+    print("=== Article Body Tester ===")
+    test_extracts_article_paragraphs_only()
+    test_falls_back_to_all_paragraphs_without_article()
+    test_pages_are_cached_after_first_fetch()
+    test_document_text()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Offline check of the memory-mapped bar store (temporary directory only).
+
+Run:
+  python src/finnews/test/test_bar_store.py
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+
+import numpy as np
+
+
+# Robust imports to support different run modes
+def _import_bar_store():
+    try:
+        from finnews import bar_store
+        return bar_store
+    except Exception:
+        try:
+            import bar_store  # type: ignore
+            return bar_store
+        except Exception:
+            import sys
+            from pathlib import Path
+            sys.path.append(str(Path(__file__).resolve().parents[1]))  # add .../src/finnews
+            import bar_store  # type: ignore
+            return bar_store
+
+
+bar_store = _import_bar_store()
+
+
+def test_append_is_ordered_and_append_only():
+    with tempfile.TemporaryDirectory() as root:
+        bs = bar_store.BarStore(root)
+        assert bs.append("aapl", [120, 60, 180], close=[2.0, 1.0, 3.0]) == 3
+        # Already stored (or out of order) bars are dropped
+        assert bs.append("AAPL", [60, 180, 240], close=[9.0, 9.0, 4.0]) == 1
+        cols = bs.bars("AAPL")
+        assert cols["ts"].tolist() == [60, 120, 180, 240]
+        assert cols["close"].tolist() == [1.0, 2.0, 3.0, 4.0]
+        assert np.isnan(cols["open"]).all()
+        assert bs.bars("AAPL", start=100, end=200)["ts"].tolist() == [120, 180]
+
+
+def test_asof_lookups():
+    with tempfile.TemporaryDirectory() as root:
+        bs = bar_store.BarStore(root)
+        bs.append("AAPL", [60, 120, 180], close=[1.0, 2.0, 3.0])
+        bs.append("MSFT", [100], close=[10.0])
+        bar_ts, px = bs.asof_many(["AAPL", "AAPL", "MSFT", "AAPL", "NONE"], [59, 150, 5000, 5000, 100])
+        assert bar_ts.tolist() == [-1, 120, 100, 180, -1]
+        assert np.isnan(px[0]) and px[1] == 2.0 and px[2] == 10.0 and np.isnan(px[4])
+        # Too stale within a tolerance
+        bar_ts, px = bs.asof("AAPL", [200, 5000], tolerance_s=60)
+        assert bar_ts.tolist() == [180, -1]
+
+
+def test_append_drops_rows_left_by_an_interrupted_append():
+    with tempfile.TemporaryDirectory() as root:
+        bs = bar_store.BarStore(root)
+        bs.append("AAPL", [60, 120], close=[1.0, 2.0], volume=[10.0, 20.0])
+        # Crash after the value columns were written but before ts.i64 (plus a torn ts write)
+        d = os.path.join(root, "AAPL")
+        for c in bar_store.VALUE_COLUMNS:
+            with open(os.path.join(d, f"{c}.f32"), "ab") as f:
+                f.write(np.array([99.0, 99.0], dtype="float32").tobytes())
+        with open(os.path.join(d, bar_store.TS_FILE), "ab") as f:
+            f.write(b"\x01\x02\x03")
+        assert bs.bars("AAPL")["close"].tolist() == [1.0, 2.0]
+
+        assert bs.append("AAPL", [180, 240], close=[3.0, 4.0], volume=[30.0, 40.0]) == 2
+        cols = bs.bars("AAPL")
+        assert cols["ts"].tolist() == [60, 120, 180, 240]
+        assert cols["close"].tolist() == [1.0, 2.0, 3.0, 4.0]
+        assert cols["volume"].tolist() == [10.0, 20.0, 30.0, 40.0]
+        for c in bar_store.VALUE_COLUMNS:
+            assert os.path.getsize(os.path.join(d, f"{c}.f32")) == 4 * 4
+
+
+def main() -> None:
+    print("=== Bar Store Tester ===")
+    test_append_is_ordered_and_append_only()
+    test_asof_lookups()
+    test_append_drops_rows_left_by_an_interrupted_append()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
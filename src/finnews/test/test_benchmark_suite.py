@@ -0,0 +1,76 @@
+"""
+Offline check of the benchmark suite: synthetic articles, the storage
+benchmarks on a small run (temporary database only) and the baseline
+comparison.
+
+Run:
+  python src/finnews/test/test_benchmark_suite.py
+"""
+from __future__ import annotations
+
+
+# Robust imports to support different run modes
+def _import_benchmark_suite():
+    try:
+        from finnews import benchmark_suite
+        return benchmark_suite
+    except Exception:
+        try:
+            import benchmark_suite  # type: ignore
+            return benchmark_suite
+        except Exception:
+            import sys
+            from pathlib import Path
+            sys.path.append(str(Path(__file__).resolve().parents[1]))  # add .../src/finnews
+            import benchmark_suite  # type: ignore
+            return benchmark_suite
+
+
+benchmark_suite = _import_benchmark_suite()
+
+
+def test_synthetic_articles_are_reproducible_and_normalize():
+    a = benchmark_suite.synthetic_payloads(20, seed=7)
+    assert a == benchmark_suite.synthetic_payloads(20, seed=7)
+    assert a != benchmark_suite.synthetic_payloads(20, seed=8)
+    articles = [benchmark_suite.normalize(*p) for p in a]
+    assert len({r["url"] for r in articles}) == 20
+    assert {r["provider"] for r in articles} == {"newsapi", "marketaux"}
+    assert all(r["title"] and r["published_at"] for r in articles)
+    assert all(r["tickers"] for r in articles if r["provider"] == "marketaux")
+
+
+def test_storage_benchmarks_run_on_a_temporary_database():
+    articles = [benchmark_suite.normalize(*p) for p in benchmark_suite.synthetic_payloads(250)]
+    results = benchmark_suite.bench_storage(articles, repeats=3)
+    assert results["upsert_article"]["calls"] == 250 and results["save_sentiment"]["calls"] == 250
+    assert results["dashboard_keyset_pages"]["calls"] == 3
+    for r in results.values():
+        assert r["p50_ms"] <= r["p99_ms"] and r["throughput_per_s"] > 0
+
+
+def test_compare_flags_only_regressions_beyond_thresholds():
+    def report(p50, p99, throughput):
+        return {"results": {"upsert_article": {"p50_ms": p50, "p99_ms": p99, "throughput_per_s": throughput}}}
+
+    baseline = report(2.0, 10.0, 500.0)
+    assert benchmark_suite.compare(report(2.4, 14.0, 420.0), baseline) == []
+    regressions = benchmark_suite.compare(report(3.0, 16.0, 300.0), baseline)
+    assert [r.split(":")[0] for r in regressions] == [
+        "upsert_article p50_ms", "upsert_article p99_ms", "upsert_article throughput_per_s"]
+    # Sub-threshold absolute changes are timer noise
+    assert benchmark_suite.compare(report(0.002, 0.004, 500.0), report(0.001, 0.002, 500.0)) == []
+    # Stages skipped in this run are not compared
+    assert benchmark_suite.compare({"results": {}}, baseline) == []
+
+
+def main() -> None:
+    print("=== Benchmark Suite Tester ===")
+    test_synthetic_articles_are_reproducible_and_normalize()
+    test_storage_benchmarks_run_on_a_temporary_database()
+    test_compare_flags_only_regressions_beyond_thresholds()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Offline check of the confidence-gated cascade (fake stages, no model files).
+
+Run:
+  python src/finnews/test/test_cascade.py
+"""
+from __future__ import annotations
+
+
+# Robust imports to support different run modes
+def _import_cascade():
+    try:
+        from finnews import cascade
+        return cascade
+    except Exception:
+        try:
+            import cascade  # type: ignore
+            return cascade
+        except Exception:
+            import sys
+            from pathlib import Path
+            sys.path.append(str(Path(__file__).resolve().parents[1]))  # add .../src/finnews
+            import cascade  # type: ignore
+            return cascade
+
+
+cascade = _import_cascade()
+
+
+class FirstStage:
+    """Confident only about texts containing "rose" or "fell"."""
+    def predict_scores(self, texts, batch_size=32):
+        out = []
+        for t in texts:
+            if "rose" in t or "fell" in t:
+                label = "positive" if "rose" in t else "negative"
+                out.append({"label": label, "score": 0.95, "probs": {label: 0.95}})
+            else:
+                out.append({"label": "neutral", "score": 0.5, "probs": {"neutral": 0.5}})
+        return out
+
+
+def test_only_uncertain_texts_are_escalated():
+    seen = []
+
+    def escalate(texts, batch_size=32):
+        seen.append(list(texts))
+        return [{"label": "neutral", "score": 0.99, "probs": {"neutral": 0.99}} for _ in texts]
+
+    c = cascade.CascadePredictor(FirstStage(), escalate, threshold=0.9)
+    texts = ["Profit rose", "Meeting in May", "Shares fell", "Report on Tuesday"]
+    results = c.predict_scores(texts)
+    assert seen == [["Meeting in May", "Report on Tuesday"]]
+    assert [r["stage"] for r in results] == ["fast", "model", "fast", "model"]
+    assert [r["label"] for r in results] == ["positive", "neutral", "negative", "neutral"]
+    assert results[1]["score"] == 0.99
+    assert c.stats() == {"items": 4, "escalated": 2, "threshold": 0.9, "escalation_rate": 0.5}
+
+
+def test_nothing_escalated_when_all_confident():
+    def escalate(texts, batch_size=32):
+        raise AssertionError("escalated a confident text")
+
+    c = cascade.CascadePredictor(FirstStage(), escalate, threshold=0.9)
+    assert c.predict_scores([]) == []
+    assert [r["stage"] for r in c.predict_scores(["Profit rose"])] == ["fast"]
+    assert c.stats()["escalation_rate"] == 0.0
+
+
+def test_stats_count_cache_hits():
+    import sentiment_cache
+
+    def escalate(texts, batch_size=32):
+        return [{"label": "neutral", "score": 0.99, "probs": {"neutral": 0.99}} for _ in texts]
+
+    saved = cascade.config.CASCADE, cascade._cascade, dict(cascade._cached), cascade._cascade_version
+    cascade.config.CASCADE = True
+    cascade._cascade = cascade.CascadePredictor(FirstStage(), escalate, threshold=0.9)
+    cascade._cascade_version = cascade.version()
+    cascade._cached.update({cascade.FAST: 0, cascade.MODEL: 0})
+    try:
+        cache = sentiment_cache.SentimentCache(persist=False)
+        texts = ["Profit rose", "Meeting in May", "Shares fell", "Report on Tuesday"]
+        sentiment_cache.predict_sentiment_scores_cached(texts, cache=cache)
+        # Served from the cache: the cascade never sees them, but stats() still counts them
+        sentiment_cache.predict_sentiment_scores_cached(texts[:2], cache=cache)
+        stats = cascade.stats()
+        assert (stats["items"], stats["escalated"], stats["escalation_rate"]) == (4, 2, 0.5)
+        assert (stats["cached"], stats["cached_escalated"], stats["model_rate"]) == (2, 1, 0.5)
+    finally:
+        cascade.config.CASCADE, cascade._cascade = saved[0], saved[1]
+        cascade._cached.update(saved[2])
+        cascade._cascade_version = saved[3]
+
+
+def main() -> None:
+    print("=== Cascade Tester ===")
+    test_only_uncertain_texts_are_escalated()
+    test_nothing_escalated_when_all_confident()
+    test_stats_count_cache_hits()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
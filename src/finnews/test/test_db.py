@@ -1,4 +1,8 @@
 # src/finnews/test_db_storage.py
+import os
+import sqlite3
+import tempfile
+import threading
 from pathlib import Path
 from pprint import pprint
 
@@ -17,6 +21,274 @@ except Exception:
         sys.path.append(str(_P(__file__).resolve().parents[2]))  # .../src
         from finnews.storage import db as store  # type: ignore
 
+def _store(root):
+    st = store.Store(os.path.join(root, "t.db"))
+    st.init_db()
+    return st
+
+
+def _article(i, **extra):
+    a = {"provider": "newsapi", "external_id": None, "url": f"https://example.com/{i}", "title": f"Story {i}",
+         "published_at": f"2024-03-01T12:{i:02d}:00Z", "source": "Example Wire", "language": "en",
+         "tickers": ["AAPL"], "raw_obj": {"n": i}}
+    a.update(extra)
+    return a
+
+
+def test_each_thread_gets_its_own_connection_and_close_works_from_any_thread():
+    with tempfile.TemporaryDirectory() as root:
+        st = _store(root)
+        conns = []
+
+        def work(i):
+            conns.append(st.conn())
+            assert st.conn() is conns[-1]
+            st.upsert_article(**_article(i))
+
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len({id(c) for c in conns}) == 4 and st.conn() not in conns
+        assert len(st.get_article_ids_by_url([f"https://example.com/{i}" for i in range(4)])) == 4
+
+        # Connections opened by the finished worker threads close from this one
+        st.close()
+        for c in conns:
+            try:
+                c.execute("SELECT 1")
+            except sqlite3.ProgrammingError:
+                pass
+            else:
+                raise AssertionError("connection left open")
+        # The store stays usable and opens a fresh connection
+        assert st.get_article_id_by_url("https://example.com/0") is not None
+        st.close()
+
+
+def test_bulk_methods_write_one_batch_and_report_new_rows():
+    with tempfile.TemporaryDirectory() as root:
+        st = _store(root)
+        results = st.bulk_upsert_articles([_article(0), _article(1), _article(0, title="Story 0 updated")])
+        assert [inserted for _, inserted in results] == [True, True, False]
+        assert results[0][0] == results[2][0] != results[1][0]
+        a0, a1 = results[0][0], results[1][0]
+        assert st.bulk_upsert_articles([_article(1, symbols=["MSFT"])]) == [(a1, False)]
+        assert sorted((aid, sym) for aid, sym, _ in st.article_symbol_events()) == [(a0, "AAPL"), (a1, "MSFT")]
+        st.bulk_save_article_tickers({a0: ["AAPL", "NVDA"]})
+        assert sorted(sym for aid, sym, _ in st.article_symbol_events(symbols=["nvda"])) == ["NVDA"]
+        assert st.get_raw_payloads([a0, a1]) == {a0: {"n": 0}, a1: {"n": 1}}
+
+        written = st.bulk_save_sentiments([
+            {"article_id": a0, "engine": "predict_text", "model_version": "v1", "label": "positive", "score": 0.9,
+             "probs": {"positive": 0.9, "negative": 0.05, "neutral": 0.05}},
+            {"article_id": a1, "engine": "predict_text", "model_version": "v1", "label": "neutral", "score": 0.6},
+        ])
+        assert written == 2 and st.bulk_save_sentiments([]) == 0
+        assert st.article_ids_with_sentiment([a0, a1, 999]) == {a0, a1} and st.has_sentiment(a0)
+
+        move = (a0, "AAPL", "2024-03-01T12:00:00Z", 100.0, "2024-03-01T12:30:00Z", 101.0, 1.0, 30)
+        assert st.bulk_save_price_moves([move, move[:6] + (2.0, 60)]) == 2
+        assert st.conn().execute("SELECT COUNT(*) FROM price_moves").fetchone()[0] == 2
+        st.close()
+
+
+def _feed_store(root):
+    """Seven articles: five tied on published_at, one later, one undated (sorted by inserted_at)."""
+    st = _store(root)
+    tied = "2024-03-01T12:00:00Z"
+    articles = [_article(i, published_at=tied, source="Wire A" if i % 2 else "Wire B",
+                         tickers=["AAPL"] if i < 2 else ["MSFT"]) for i in range(5)]
+    articles.append(_article(5, published_at="2024-03-02T09:00:00Z", source="Wire A", tickers=[]))
+    articles.append(_article(6, published_at=None, source="Wire B", tickers=[]))
+    ids = [aid for aid, _ in st.bulk_upsert_articles(articles)]
+    with st.conn() as conn:
+        conn.execute("UPDATE articles SET inserted_at = '2024-03-01T11:00:00Z' WHERE id = ?", (ids[6],))
+    st.bulk_save_sentiments([
+        {"article_id": aid, "engine": "predict_text", "label": "positive" if i % 3 == 0 else "negative", "score": 0.9}
+        for i, aid in enumerate(ids)
+    ])
+    return st, ids
+
+
+def _pages(st, size, **filters):
+    rows, after = [], None
+    while True:
+        page = st.articles_page(after=after, limit=size, **filters)
+        rows.extend(page)
+        if len(page) < size:
+            return rows
+        after = (page[-1]["sort_at"], page[-1]["id"])
+
+
+def test_keyset_pages_cover_ties_and_undated_articles_once():
+    with tempfile.TemporaryDirectory() as root:
+        st, ids = _feed_store(root)
+        expected = [ids[5], ids[4], ids[3], ids[2], ids[1], ids[0], ids[6]]
+        for size in (1, 2, 3, 50):
+            assert [r["id"] for r in _pages(st, size)] == expected
+        last = st.articles_page(limit=6)[-1]
+        undated = st.articles_page(after=(last["sort_at"], last["id"]))
+        assert [(r["id"], r["published_at"], r["sort_at"]) for r in undated] == [
+            (ids[6], None, "2024-03-01T11:00:00Z")]
+        st.close()
+
+
+def test_feed_filters():
+    with tempfile.TemporaryDirectory() as root:
+        st, ids = _feed_store(root)
+
+        def feed(**filters):
+            return sorted(r["id"] for r in _pages(st, 2, **filters))
+
+        assert feed(source="Wire A") == sorted([ids[1], ids[3], ids[5]])
+        assert feed(label="positive") == sorted([ids[0], ids[3], ids[6]])
+        assert feed(ticker=" aapl") == sorted(ids[:2])
+        # since is inclusive, until exclusive, both on sort_at
+        assert feed(since="2024-03-01T12:00:00Z", until="2024-03-02T09:00:00Z") == sorted(ids[:5])
+        assert feed(until="2024-03-01T12:00:00Z") == [ids[6]]
+        assert feed(source="Wire B", label="positive", ticker="MSFT") == []
+        assert [r["sentiment"] for r in st.articles_page(limit=1)] == ["negative"]
+        st.close()
+
+
+def test_incremental_refresh_returns_only_new_articles():
+    with tempfile.TemporaryDirectory() as root:
+        st, ids = _feed_store(root)
+        last_id = max(ids)
+        assert st.articles_since_id(last_id) == []
+        new = [aid for aid, _ in st.bulk_upsert_articles([
+            _article(7, source="Wire A"), _article(8, source="Wire B"), _article(0, title="Story 0 updated")])]
+        assert [r["id"] for r in st.articles_since_id(last_id)] == new[:2]
+        assert [r["id"] for r in st.articles_since_id(last_id, source="Wire B")] == [new[1]]
+        assert [r["id"] for r in st.articles_since_id(last_id, limit=1)] == [new[0]]
+        st.close()
+
+
+# articles and sentiments as created by the first schema.sql, when every run appended a sentiment
+OLD_SCHEMA = """
+CREATE TABLE articles(
+  id INTEGER PRIMARY KEY, provider TEXT NOT NULL, external_id TEXT, url TEXT NOT NULL UNIQUE,
+  title TEXT NOT NULL, published_at TEXT, source TEXT, language TEXT, tickers_json TEXT,
+  raw_json TEXT NOT NULL, inserted_at TEXT NOT NULL
+);
+CREATE TABLE sentiments(
+  id INTEGER PRIMARY KEY, article_id INTEGER NOT NULL REFERENCES articles(id) ON DELETE CASCADE,
+  engine TEXT NOT NULL, score REAL, label TEXT, inserted_at TEXT NOT NULL
+);
+"""
+
+
+def _day_counts(st, engine="predict_text"):
+    rows = st.conn().execute("""
+        SELECT label, SUM(n) AS n, SUM(score_sum) AS score_sum FROM sentiment_rollups
+        WHERE resolution = 'day' AND ticker = '*' AND engine = ? GROUP BY label
+    """, (engine,))
+    return {r["label"]: (r["n"], round(r["score_sum"], 6)) for r in rows if r["n"]}
+
+
+def test_duplicate_sentiment_migration_keeps_the_newest_row():
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "old.db")
+        conn = sqlite3.connect(path)
+        conn.executescript(OLD_SCHEMA)
+        conn.executemany(
+            "INSERT INTO articles(id, provider, url, title, published_at, raw_json, inserted_at) "
+            "VALUES (?, 'newsapi', ?, ?, '2024-03-01T12:00:00Z', '{}', '2024-03-01T12:05:00Z')",
+            [(1, "https://example.com/1", "Story 1"), (2, "https://example.com/2", "Story 2")],
+        )
+        conn.executemany(
+            "INSERT INTO sentiments(article_id, engine, score, label, inserted_at) VALUES (?, ?, ?, ?, ?)",
+            [(1, "predict_text", 0.6, "negative", "2024-03-01T12:05:00Z"),
+             (1, "predict_text", 0.7, "neutral", "2024-03-01T13:05:00Z"),
+             (2, "predict_text", 0.8, "negative", "2024-03-01T13:05:00Z"),
+             (1, "predict_text", 0.9, "positive", "2024-03-01T14:05:00Z")],
+        )
+        conn.commit()
+        conn.close()
+
+        st = store.Store(path)
+        st.init_db()
+        rows = st.conn().execute("SELECT article_id, label, score FROM sentiments ORDER BY article_id").fetchall()
+        assert [tuple(r) for r in rows] == [(1, "positive", 0.9), (2, "negative", 0.8)]
+        # Rollups are rebuilt from the surviving rows only
+        assert _day_counts(st) == {"positive": (1, 0.9), "negative": (1, 0.8)}
+        st.close()
+
+
+def test_rescoring_moves_rollup_counts():
+    with tempfile.TemporaryDirectory() as root:
+        st = _store(root)
+        aid = st.upsert_article(**_article(0))
+        st.save_sentiment(aid, "predict_text", 0.9, "positive", model_version="v1")
+        assert _day_counts(st) == {"positive": (1, 0.9)}
+        # Same article, engine and version: the count moves to the new label
+        st.save_sentiment(aid, "predict_text", 0.8, "negative", model_version="v1")
+        assert _day_counts(st) == {"negative": (1, 0.8)}
+        st.bulk_save_sentiments([{"article_id": aid, "engine": "predict_text", "model_version": "v1",
+                                  "label": "negative", "score": 0.7}])
+        assert _day_counts(st) == {"negative": (1, 0.7)}
+        # A new model version supersedes the old one for the same engine
+        st.save_sentiment(aid, "predict_text", 0.6, "neutral", model_version="v2")
+        assert _day_counts(st) == {"neutral": (1, 0.6)}
+        # Per-symbol rollups move too
+        rows = st.conn().execute("""
+            SELECT label, n FROM sentiment_rollups WHERE resolution = 'day' AND ticker = 'AAPL' AND n != 0
+        """).fetchall()
+        assert [tuple(r) for r in rows] == [("neutral", 1)]
+        # Rebuilding from scratch agrees with the incremental counts
+        st.rebuild_rollups()
+        assert _day_counts(st) == {"neutral": (1, 0.6)}
+        st.close()
+
+
+def test_latest_sentiment_has_one_row_per_article():
+    with tempfile.TemporaryDirectory() as root:
+        st = _store(root)
+        a0, a1 = (aid for aid, _ in st.bulk_upsert_articles([_article(0), _article(1)]))
+        st.save_sentiment(a0, "predict_text", 0.9, "positive", model_version="v1")
+        st.save_sentiment(a0, "predict_text", 0.6, "neutral", model_version="v2")
+        st.save_sentiment(a0, "student", 0.7, "negative")
+        st.save_sentiment(a1, "predict_text", 0.8, "negative", model_version="v1")
+        rows = st.conn().execute("SELECT article_id, COUNT(*) AS n FROM latest_sentiment GROUP BY article_id")
+        assert {r["article_id"]: r["n"] for r in rows} == {a0: 1, a1: 1}
+        feed = {r["id"]: r["sentiment"] for r in st.articles_page()}
+        assert feed == {a0: "negative", a1: "negative"}
+        st.close()
+
+
+def test_trend_means_skip_missing_scores():
+    with tempfile.TemporaryDirectory() as root:
+        st = _store(root)
+        a0, a1, a2 = (aid for aid, _ in st.bulk_upsert_articles([_article(i) for i in range(3)]))
+        st.save_sentiment(a0, "predict_text", 0.9, "positive", {"positive": 0.9, "negative": 0.04, "neutral": 0.06})
+        st.save_sentiment(a1, "predict_text", None, "positive")
+        st.save_sentiment(a2, "student", 0.5, "positive")
+        [day] = st.sentiment_trend("day", engine="predict_text")
+        assert (day["n"], day["score"]) == (2, 0.9)
+        # Probability means skip the row without probabilities too
+        assert (day["p_positive"], day["p_negative"], day["p_neutral"]) == (0.9, 0.04, 0.06)
+        assert st.sentiment_trend("day", since="2024-03-02T00:00:00Z", engine="predict_text") == []
+
+        # Rollups from before n_scored existed are rebuilt on init_db
+        with st.conn() as conn:
+            conn.execute("DROP TABLE sentiment_rollups")
+            conn.execute("""
+                CREATE TABLE sentiment_rollups(
+                  resolution TEXT NOT NULL, bucket TEXT NOT NULL, source TEXT NOT NULL, ticker TEXT NOT NULL,
+                  engine TEXT NOT NULL, label TEXT NOT NULL, n INTEGER NOT NULL,
+                  score_sum REAL NOT NULL DEFAULT 0, p_positive_sum REAL NOT NULL DEFAULT 0,
+                  p_negative_sum REAL NOT NULL DEFAULT 0, p_neutral_sum REAL NOT NULL DEFAULT 0,
+                  PRIMARY KEY(resolution, bucket, source, ticker, engine, label)
+                )
+            """)
+        st.init_db()
+        [day] = st.sentiment_trend("day", engine="predict_text")
+        assert (day["n"], day["score"], day["p_positive"]) == (2, 0.9, 0.9)
+        st.close()
+
+
 def main():
     # Fresh start for the demo (delete DB file)
     db_file = Path("src/finnews/storage/finnews.db")
@@ -63,6 +335,8 @@ def main():
     sid = store.save_sentiment(article_id=aid1, engine="unit-test", score=0.87, label="positive")
     print("Inserted sentiment_id:", sid)
     print("Has sentiment:", store.has_sentiment(aid1))
+    sid2 = store.save_sentiment(article_id=aid1, engine="unit-test", score=0.12, label="negative")
+    print("Re-scoring updated the same sentiment:", sid2 == sid)
 
     # 6) Insert a price move
     pmid = store.save_price_move(
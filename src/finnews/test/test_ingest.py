@@ -0,0 +1,137 @@
+"""
+Offline check of the concurrent ingestion layer.
+
+Serves MarketAux-shaped JSON from a local stub HTTP server (each response is
+delayed) and verifies that fan-out runs requests concurrently, respects the
+per-provider concurrency cap and merges results into one de-duplicated stream.
+No API keys or network access needed.
+
+Run:
+  python src/finnews/test/test_ingest.py
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+# Robust imports to support different run modes
+def _import_modules():
+    try:
+        from finnews.news_apis import ingest
+        from finnews.news_apis.clients.marketaux_client import MarketAuxClient
+        return ingest, MarketAuxClient
+    except Exception:
+        try:
+            from news_apis import ingest  # type: ignore
+            from news_apis.clients.marketaux_client import MarketAuxClient  # type: ignore
+            return ingest, MarketAuxClient
+        except Exception:
+            import sys
+            from pathlib import Path
+            sys.path.append(str(Path(__file__).resolve().parents[2]))  # add .../src
+            from finnews.news_apis import ingest  # type: ignore
+            from finnews.news_apis.clients.marketaux_client import MarketAuxClient  # type: ignore
+            return ingest, MarketAuxClient
+
+
+ingest, MarketAuxClient = _import_modules()
+
+DELAY_S = 0.3
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.peak = max(cls.peak, cls.in_flight)
+        try:
+            time.sleep(DELAY_S)
+            qs = parse_qs(urlparse(self.path).query)
+            symbol = qs.get("symbols", ["ALL"])[0]
+            page = qs.get("page", ["1"])[0]
+            body = {"data": [
+                {
+                    "uuid": f"{symbol}-{page}",
+                    "title": f"{symbol} headline page {page}",
+                    "url": f"https://stub.local/{symbol}/{page}",
+                    "published_at": "2024-01-02T03:04:05.000000Z",
+                    "source": "stub.local",
+                    "entities": [{"symbol": symbol}],
+                },
+                # Shared story returned by every request; must be merged to one row
+                {"uuid": "shared", "title": "Shared story", "url": "https://stub.local/shared"},
+            ]}
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_fan_out_is_concurrent_and_merged():
+    server = _serve()
+    try:
+        _StubHandler.peak = 0
+        client = MarketAuxClient(
+            api_key="stub",
+            base_url=f"http://127.0.0.1:{server.server_port}/v1",
+            rate_limit_s=0.0,
+        )
+        requests = ingest.marketaux_requests(client, symbols=["AAPL", "TSLA", "MSFT", "NVDA"], pages=2)
+
+        t0 = time.perf_counter()
+        articles = ingest.fetch_all(requests, concurrency={"marketaux": 4})
+        elapsed = time.perf_counter() - t0
+
+        # 8 requests at 0.3s each: serial would take 2.4s, 4-wide about 0.6s
+        assert elapsed < len(requests) * DELAY_S / 2, elapsed
+        assert _StubHandler.peak <= 4, _StubHandler.peak
+        assert len(articles) == len(requests) + 1
+        assert all(a["provider"] == "marketaux" for a in articles)
+        assert articles[0]["tickers"] == ["AAPL"]
+        print(f"[ingest] {len(requests)} requests in {elapsed:.2f}s, peak concurrency {_StubHandler.peak}")
+    finally:
+        server.shutdown()
+
+
+def test_failed_request_is_skipped():
+    def boom():
+        raise RuntimeError("provider down")
+
+    ok = ingest.FetchRequest("newsapi", "ok", lambda: [{"url": "https://x/1", "title": "x"}])
+    bad = ingest.FetchRequest("newsapi", "bad", boom)
+    articles = ingest.fetch_all([bad, ok])
+    assert [a["url"] for a in articles] == ["https://x/1"]
+
+
+def main() -> None:
+    print("=== Ingestion Tester ===")
+    test_fan_out_is_concurrent_and_merged()
+    test_failed_request_is_skipped()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
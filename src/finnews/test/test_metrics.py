@@ -0,0 +1,127 @@
+"""
+Offline check of the metrics registry, Prometheus rendering, method
+instrumentation and trace mode (temporary files only).
+
+Run:
+  python src/finnews/test/test_metrics.py
+"""
+from __future__ import annotations
+
+import os
+import pstats
+import tempfile
+import threading
+
+
+# Robust imports to support different run modes
+def _import_metrics():
+    try:
+        from finnews import metrics
+        return metrics
+    except Exception:
+        try:
+            import metrics  # type: ignore
+            return metrics
+        except Exception:
+            import sys
+            from pathlib import Path
+            sys.path.append(str(Path(__file__).resolve().parents[1]))  # add .../src/finnews
+            import metrics  # type: ignore
+            return metrics
+
+
+metrics = _import_metrics()
+
+
+def test_render_counters_and_cumulative_histograms():
+    reg = metrics.Registry(buckets=(0.1, 1.0))
+    reg.inc("finnews_stage_items_total", 3, stage="writer")
+    reg.inc("finnews_stage_items_total", stage="writer")
+    reg.inc("finnews_stage_items_total", stage='say "hi"')
+    for v in (0.05, 0.5, 5.0):
+        reg.observe("finnews_db_seconds", v, op="upsert_article")
+    lines = reg.render().splitlines()
+    assert "# TYPE finnews_stage_items_total counter" in lines
+    assert 'finnews_stage_items_total{stage="writer"} 4' in lines
+    assert 'finnews_stage_items_total{stage="say \\"hi\\""} 1' in lines
+    assert [l.rsplit(" ", 1)[1] for l in lines if l.startswith("finnews_db_seconds_bucket")] == ["1", "2", "3"]
+    assert 'finnews_db_seconds_bucket{op="upsert_article",le="+Inf"} 3' in lines
+    assert 'finnews_db_seconds_count{op="upsert_article"} 3' in lines
+    assert reg.totals()[0][:3] == ("finnews_db_seconds", {"op": "upsert_article"}, 3)
+
+
+def test_snapshots_from_workers_merge_into_the_parent():
+    import pickle
+
+    parent, worker = metrics.Registry(buckets=(0.1, 1.0)), metrics.Registry(buckets=(0.1, 1.0))
+    parent.inc("finnews_inference_texts_total", 2, backend="torch")
+    parent.observe("finnews_inference_seconds", 0.05, backend="torch", phase="forward")
+    worker.inc("finnews_inference_texts_total", 3, backend="torch")
+    worker.observe("finnews_inference_seconds", 0.5, backend="torch", phase="forward")
+    worker.observe("finnews_inference_seconds", 0.01, backend="torch", phase="tokenize")
+    # Snapshots cross process boundaries pickled
+    parent.merge(pickle.loads(pickle.dumps(worker.snapshot())))
+    lines = parent.render().splitlines()
+    assert 'finnews_inference_texts_total{backend="torch"} 5' in lines
+    assert 'finnews_inference_seconds_count{backend="torch",phase="forward"} 2' in lines
+    assert 'finnews_inference_seconds_bucket{backend="torch",phase="forward",le="0.1"} 1' in lines
+    assert 'finnews_inference_seconds_count{backend="torch",phase="tokenize"} 1' in lines
+    # The worker's own series are untouched
+    assert 'finnews_inference_texts_total{backend="torch"} 3' in worker.render().splitlines()
+
+
+def test_instrumented_methods_are_timed_and_count_errors():
+    class Repo:
+        def save(self, x):
+            return x * 2
+
+        def fail(self):
+            raise KeyError("missing")
+
+        def _private(self):
+            return 1
+
+    metrics.instrument_methods(Repo, "finnews_test_seconds")
+    repo = Repo()
+    assert repo.save(2) == 4 and repo._private() == 1
+    try:
+        repo.fail()
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("exception swallowed")
+    ops = {labels["op"]: count for name, labels, count, _ in metrics.totals() if name == "finnews_test_seconds"}
+    assert ops == {"save": 1, "fail": 1}
+    errors = metrics.REGISTRY.counters("finnews_errors_total")
+    assert errors[(("error", "KeyError"), ("metric", "finnews_test_seconds"))] >= 1
+
+
+def test_textfile_and_trace_cover_threads():
+    def work():
+        return sum(i * i for i in range(20000))
+
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "out", "finnews.prom")
+        metrics.write_textfile(path)
+        with open(path, encoding="utf-8") as f:
+            assert f.read() == metrics.render()
+
+        prof = os.path.join(root, "run.prof")
+        with metrics.trace(prof, top=0):
+            t = threading.Thread(target=work)
+            t.start()
+            t.join()
+        assert any(func[2] == "work" for func in pstats.Stats(prof).stats)
+
+
+def main() -> None:
+    print("=== Metrics Tester ===")
+    test_render_counters_and_cumulative_histograms()
+    test_snapshots_from_workers_merge_into_the_parent()
+    test_instrumented_methods_are_timed_and_count_errors()
+    test_textfile_and_trace_cover_threads()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Offline check of near-duplicate headline matching and of canonical
+handling: stored and in-flight canonicals, and links to canonicals whose
+batch was never stored (temporary database only).
+
+Run:
+  python src/finnews/test/test_near_duplicates.py
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+
+
+# Robust imports to support different run modes
+def _import_modules():
+    try:
+        from finnews import near_duplicates
+        from finnews.storage import db as store
+        return near_duplicates, store
+    except Exception:
+        try:
+            import near_duplicates  # type: ignore
+            from storage import db as store  # type: ignore
+            return near_duplicates, store
+        except Exception:
+            import sys
+            from pathlib import Path
+            sys.path.append(str(Path(__file__).resolve().parents[1]))  # add .../src/finnews
+            import near_duplicates  # type: ignore
+            from storage import db as store  # type: ignore
+            return near_duplicates, store
+
+
+near_duplicates, store = _import_modules()
+
+
+def _similar(a, b):
+    return near_duplicates.similar(near_duplicates.words(a), near_duplicates.words(b))
+
+
+def _row(url, title):
+    return {"url": f"https://example.com/{url}", "title": title}
+
+
+def _store_titles(st, rows):
+    """Store rows as canonical articles and index their titles, as the writer does."""
+    st.bulk_upsert_articles([{"provider": "newsapi", "external_id": None, "url": r["url"], "title": r["title"],
+                              "published_at": None, "source": None, "language": "en", "tickers": []}
+                             for r in rows])
+    st.bulk_save_title_words([near_duplicates.index_row(r["url"], r["words"], r["bands"]) for r in rows])
+
+
+def test_matching():
+    assert _similar("Apple shares rise", "Apple shares rise 3% after earnings")
+    assert _similar("Fed holds rates steady", "Fed holds interest rates steady")
+    assert _similar("Tesla recalls 2 million cars - Reuters", "Tesla Recalls 2 Million Cars | Bloomberg")
+    # Substitutions change the story, however long the headline
+    assert not _similar("Apple beats estimates", "Apple misses estimates")
+    assert not _similar("Apple shares rise 3% after strong earnings report",
+                        "Apple shares fall 3% after strong earnings report")
+    # A short headline inside a much longer one is a different story
+    assert not _similar("Apple shares rise", "Apple shares rise as Microsoft, Nvidia and Tesla fall on new chip rules")
+    assert not _similar("", "")
+
+    # Candidates share an LSH band
+    a = near_duplicates.bands(near_duplicates.minhash(near_duplicates.words("Apple shares rise")))
+    b = near_duplicates.bands(near_duplicates.minhash(near_duplicates.words("Apple shares rise 3% after earnings")))
+    assert len(a) == near_duplicates.BANDS and any(x == y for x, y in zip(a, b))
+
+
+def test_stored_and_pending_canonicals():
+    with tempfile.TemporaryDirectory() as root:
+        st = store.Store(os.path.join(root, "t.db"))
+        st.init_db()
+        index = near_duplicates.NearDuplicateIndex(st)
+
+        first = [_row(1, "Apple shares rise"), _row(2, "Oil slips as inventories build")]
+        index.classify(first)
+        assert [r["duplicate_of"] for r in first] == [None, None]
+        _store_titles(st, first)
+        index.forget(first)
+
+        # A stored canonical, then one still in flight from an earlier batch
+        second = [_row(3, "Apple shares rise 3% after earnings - Reuters"), _row(4, "Gold hits record high")]
+        index.classify(second)
+        assert second[0]["duplicate_of"] == first[0]["url"] and second[0]["distance"] == 3
+        third = [_row(5, "Gold hits a record high | CNBC"), _row(1, "Apple shares rise")]
+        index.classify(third, known_urls={first[0]["url"]})
+        assert third[0]["duplicate_of"] == second[1]["url"]
+        # A stored url is already somebody's canonical
+        assert third[1]["duplicate_of"] is None
+        st.close()
+
+
+def test_links_to_a_failed_canonical_are_dropped():
+    with tempfile.TemporaryDirectory() as root:
+        st = store.Store(os.path.join(root, "t.db"))
+        st.init_db()
+        index = near_duplicates.NearDuplicateIndex(st)
+
+        canonical = [_row(1, "Fed holds rates steady")]
+        index.classify(canonical)
+        copy = [_row(2, "Fed holds interest rates steady")]
+        index.classify(copy)
+        assert copy[0]["duplicate_of"] == canonical[0]["url"]
+        st.bulk_save_near_duplicates([{"url": copy[0]["url"], "canonical_url": copy[0]["duplicate_of"],
+                                       "distance": copy[0]["distance"]}])
+        # The canonical's writer batch fails: the writer stage forgets it
+        index.forget(canonical)
+
+        later = [_row(3, "Fed holds rates steady - AP")]
+        index.classify(later)
+        assert later[0]["duplicate_of"] is None
+        # Polled again, the copy is linked to the new canonical instead of the lost one
+        again = [_row(2, "Fed holds interest rates steady")]
+        index.classify(again)
+        assert again[0]["duplicate_of"] == later[0]["url"]
+        st.bulk_save_near_duplicates([{"url": again[0]["url"], "canonical_url": again[0]["duplicate_of"],
+                                       "distance": again[0]["distance"]}])
+        assert st.get_near_duplicate_links([again[0]["url"]])[again[0]["url"]][0] == later[0]["url"]
+        st.close()
+
+
+def test_backfill_indexes_stored_titles():
+    with tempfile.TemporaryDirectory() as root:
+        st = store.Store(os.path.join(root, "t.db"))
+        st.init_db()
+        rows = [_row(i, f"Company {i} raises guidance for the year") for i in range(5)] + [_row(9, "")]
+        st.bulk_upsert_articles([{"provider": "newsapi", "external_id": None, "url": r["url"], "title": r["title"],
+                                  "published_at": None, "source": None, "language": "en", "tickers": []}
+                                 for r in rows])
+        assert near_duplicates.backfill_index(st, batch_size=2) == 6
+        assert near_duplicates.backfill_index(st) == 0
+
+        copy = [_row(10, "Company 3 raises its guidance for the year")]
+        near_duplicates.NearDuplicateIndex(st).classify(copy)
+        assert copy[0]["duplicate_of"] == rows[3]["url"]
+        st.close()
+
+
+def main() -> None:
+    print("=== Near Duplicates Tester ===")
+    test_matching()
+    test_stored_and_pending_canonicals()
+    test_links_to_a_failed_canonical_are_dropped()
+    test_backfill_indexes_stored_titles()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Offline check that the ONNX backend only loads an export of the model
+currently on disk (temporary model directory, no real graph).
+
+Run:
+  python src/finnews/test/test_onnx_backend.py
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+
+
+# Robust imports to support different run modes
+def _import_onnx_backend():
+    try:
+        from finnews import onnx_backend
+        return onnx_backend
+    except Exception:
+        try:
+            import onnx_backend  # type: ignore
+            return onnx_backend
+        except Exception:
+            import sys
+            from pathlib import Path
+            sys.path.append(str(Path(__file__).resolve().parents[1]))  # add .../src/finnews
+            import onnx_backend  # type: ignore
+            return onnx_backend
+
+
+onnx_backend = _import_onnx_backend()
+
+
+def _raises(exc, fn):
+    try:
+        fn()
+    except exc:
+        return
+    raise AssertionError(f"{exc.__name__} not raised")
+
+
+def test_export_must_match_the_model_on_disk():
+    with tempfile.TemporaryDirectory() as model_path:
+        def write(name, text):
+            os.makedirs(os.path.dirname(os.path.join(model_path, name)), exist_ok=True)
+            with open(os.path.join(model_path, name), "w", encoding="utf-8") as f:
+                f.write(text)
+
+        write(onnx_backend.predict_text.MODEL_VERSION_FILE, "v1")
+        check = lambda: onnx_backend.check_export(model_path)
+        _raises(FileNotFoundError, check)
+        write(os.path.join(onnx_backend.ONNX_DIR, onnx_backend.FP32_FILE), "graph")
+        # Exports from before the source version was recorded are not trusted
+        _raises(RuntimeError, check)
+        write(os.path.join(onnx_backend.ONNX_DIR, onnx_backend.SOURCE_VERSION_FILE), "v1")
+        assert check() == onnx_backend.onnx_path(model_path)
+        # Retrained without exporting again
+        write(onnx_backend.predict_text.MODEL_VERSION_FILE, "v2")
+        _raises(RuntimeError, check)
+        # The int8 graph is checked on its own
+        write(onnx_backend.predict_text.MODEL_VERSION_FILE, "v1")
+        _raises(FileNotFoundError, lambda: onnx_backend.check_export(model_path, quantized=True))
+
+
+def main() -> None:
+    print("=== ONNX Backend Tester ===")
+    test_export_must_match_the_model_on_disk()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Offline check of raw payload storage: compression round trips, the move of
+articles.raw_json out of older databases, and dictionary compaction with
+long-lived stores (temporary databases only).
+
+Run:
+  python src/finnews/test/test_payloads.py
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import tempfile
+
+
+# Robust imports to support different run modes
+def _import_storage():
+    try:
+        from finnews.storage import db as store, payloads
+        return store, payloads
+    except Exception:
+        try:
+            from storage import db as store, payloads  # type: ignore
+            return store, payloads
+        except Exception:
+            import sys
+            from pathlib import Path
+            sys.path.append(str(Path(__file__).resolve().parents[1]))  # add .../src/finnews
+            from storage import db as store, payloads  # type: ignore
+            return store, payloads
+
+
+store, payloads = _import_storage()
+
+# articles as created by the first schema.sql, before article_raw existed
+OLD_ARTICLES = """
+CREATE TABLE articles(
+  id INTEGER PRIMARY KEY,
+  provider TEXT NOT NULL,
+  external_id TEXT,
+  url TEXT NOT NULL UNIQUE,
+  title TEXT NOT NULL,
+  published_at TEXT,
+  source TEXT,
+  language TEXT,
+  tickers_json TEXT,
+  raw_json TEXT NOT NULL,
+  inserted_at TEXT NOT NULL
+);
+"""
+
+
+def _raw(i: int) -> dict:
+    return {"source": {"id": None, "name": "Example Wire"}, "author": "Desk",
+            "title": f"Story {i}", "url": f"https://example.com/{i}",
+            "description": "Shares moved after the company reported quarterly results.",
+            "publishedAt": "2024-03-01T12:00:00Z"}
+
+
+def _article(i: int) -> dict:
+    return {"provider": "newsapi", "external_id": None, "url": f"https://example.com/{i}",
+            "title": f"Story {i}", "published_at": "2024-03-01T12:00:00Z", "source": "Example Wire",
+            "language": "en", "tickers": [], "raw_obj": _raw(i)}
+
+
+def test_compress_round_trips_with_and_without_dictionary():
+    data = payloads.encode(_raw(1))
+    dictionary = payloads.train_dictionary([payloads.encode(_raw(i)) for i in range(50)], codec="zlib")
+    assert 0 < len(dictionary) <= payloads.ZLIB_MAX_DICT
+    plain = payloads.compress(data, codec="zlib")
+    shared = payloads.compress(data, codec="zlib", dictionary=dictionary)
+    assert len(shared) < len(plain)
+    assert payloads.decompress(plain, codec="zlib") == data
+    assert payloads.decode(payloads.decompress(shared, codec="zlib", dictionary=dictionary)) == _raw(1)
+    try:
+        payloads.compress(data, codec="lz4")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("unknown codec accepted")
+
+
+def test_raw_json_moves_to_article_raw():
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "old.db")
+        conn = sqlite3.connect(path)
+        conn.executescript(OLD_ARTICLES)
+        conn.executemany(
+            "INSERT INTO articles(provider, url, title, raw_json, inserted_at) VALUES ('newsapi', ?, ?, ?, '')",
+            [(f"https://example.com/{i}", f"Story {i}", payloads.encode(_raw(i)).decode("utf-8")) for i in range(5)]
+            + [("https://example.com/empty", "Empty", "{}")],
+        )
+        conn.commit()
+        conn.close()
+
+        st = store.Store(path)
+        st.init_db()
+        columns = {r["name"] for r in st.conn().execute("PRAGMA table_info(articles)")}
+        assert "raw_json" not in columns and "description" in columns
+        ids = st.get_article_ids_by_url([f"https://example.com/{i}" for i in range(5)] + ["https://example.com/empty"])
+        raws = st.get_raw_payloads(list(ids.values()))
+        assert raws == {ids[f"https://example.com/{i}"]: _raw(i) for i in range(5)}
+        # Running init_db again is a no-op
+        st.init_db()
+        assert st.get_raw_payload(ids["https://example.com/0"]) == _raw(0)
+        st.close()
+
+
+def test_compaction_keeps_long_lived_stores_writing():
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "t.db")
+        early = store.Store(path)
+        early.init_db()
+        early.bulk_upsert_articles([_article(i) for i in range(40)])
+
+        compactor = store.Store(path)
+        first, rewritten = compactor.compact_raw_payloads()
+        assert rewritten == 40
+        writer = store.Store(path)
+        writer.bulk_upsert_articles([_article(40)])
+        second, _ = compactor.compact_raw_payloads()
+        # Nothing uses the first dictionary any more, so it is deleted; both stores keep writing
+        writer.bulk_upsert_articles([_article(41)])
+        writer.upsert_article(**_article(42))
+        early.bulk_upsert_articles([_article(43)])
+
+        conn = compactor.conn()
+        assert {r["id"] for r in conn.execute("SELECT id FROM raw_dictionaries")} == {second} != {first}
+        assert {r["dict_id"] for r in conn.execute("SELECT DISTINCT dict_id FROM article_raw")} == {second}
+        ids = compactor.get_article_ids_by_url([f"https://example.com/{i}" for i in range(44)])
+        raws = compactor.get_raw_payloads(list(ids.values()))
+        assert raws == {ids[f"https://example.com/{i}"]: _raw(i) for i in range(44)}
+        for st in (early, compactor, writer):
+            st.close()
+
+
+def main() -> None:
+    print("=== Payloads Tester ===")
+    test_compress_round_trips_with_and_without_dictionary()
+    test_raw_json_moves_to_article_raw()
+    test_compaction_keeps_long_lived_stores_writing()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Offline check of the staged pipeline machinery (no model, no network).
+
+Run:
+  python src/finnews/test/test_pipeline.py
+"""
+from __future__ import annotations
+
+import threading
+import time
+
+
+# Robust imports to support different run modes
+def _import_pipeline():
+    try:
+        from finnews import pipeline
+        return pipeline
+    except Exception:
+        try:
+            import pipeline  # type: ignore
+            return pipeline
+        except Exception:
+            import sys
+            from pathlib import Path
+            sys.path.append(str(Path(__file__).resolve().parents[1]))  # add .../src/finnews
+            import pipeline  # type: ignore
+            return pipeline
+
+
+pipeline = _import_pipeline()
+
+
+def test_every_item_drains_through_all_stages():
+    written = []
+    lock = threading.Lock()
+
+    def source(emit):
+        for i in range(500):
+            emit(i)
+
+    def double(batch):
+        return [x * 2 for x in batch]
+
+    def sink(batch):
+        with lock:
+            written.extend(batch)
+        return batch
+
+    stats = pipeline.Pipeline(
+        source,
+        [
+            pipeline.Stage("double", double, workers=3, batch_size=16),
+            pipeline.Stage("sink", sink, batch_size=64),
+        ],
+        queue_size=8,
+    ).run()
+
+    assert sorted(written) == [i * 2 for i in range(500)]
+    assert stats["double"]["items_in"] == 500
+    assert stats["sink"]["items_out"] == 500
+    print(f"[pipeline] {stats}")
+
+
+def test_stop_drains_in_flight_items():
+    emitted = []
+    written = []
+
+    def source(emit):
+        i = 0
+        while emit(i):
+            emitted.append(i)
+            i += 1
+
+    def slow_sink(batch):
+        time.sleep(0.01)
+        written.extend(batch)
+        return batch
+
+    p = pipeline.Pipeline(source, [pipeline.Stage("sink", slow_sink, batch_size=4)], queue_size=4)
+    threading.Timer(0.1, p.stop).start()
+    p.run()
+
+    # Bounded queue means the source never runs far ahead, and nothing is lost
+    assert written == emitted
+    assert len(emitted) < 1000
+
+
+def test_failing_batch_is_counted_not_fatal():
+    def source(emit):
+        for i in range(10):
+            emit(i)
+
+    def picky(batch):
+        if 3 in batch:
+            raise ValueError("bad item")
+        return batch
+
+    stats = pipeline.Pipeline(source, [pipeline.Stage("picky", picky, batch_size=1)]).run()
+    assert stats["picky"]["errors"] == 1
+    assert stats["picky"]["items_out"] == 9
+
+
+def test_failed_inference_passes_rows_on_unscored():
+    written = []
+
+    def source(emit):
+        for i in range(6):
+            emit({"url": f"https://example.com/{i}", "title": f"Story {i}", "needs_sentiment": i % 2 == 0})
+
+    def sink(rows):
+        written.extend(rows)
+        return rows
+
+    def broken(texts, **kwargs):
+        raise RuntimeError("model file missing")
+
+    real = pipeline.sentiment_cache.predict_sentiment_scores_cached
+    pipeline.sentiment_cache.predict_sentiment_scores_cached = broken
+    try:
+        stats = pipeline.Pipeline(
+            source, [pipeline.make_inference_stage(batch_size=4), pipeline.Stage("sink", sink, batch_size=8)]
+        ).run()
+    finally:
+        pipeline.sentiment_cache.predict_sentiment_scores_cached = real
+
+    # Every row reaches the writer without a sentiment, still flagged for a later run
+    assert len(written) == 6 and all("sentiment" not in r for r in written)
+    assert stats["inference"]["errors"] >= 1 and stats["inference"]["unscored"] == 3
+
+
+def test_split_on_error_isolates_the_bad_item():
+    def source(emit):
+        for i in range(10):
+            emit(i)
+
+    def picky(batch):
+        if 3 in batch:
+            raise ValueError("bad item")
+        return batch
+
+    seen = []
+
+    def sink(batch):
+        seen.extend(batch)
+        return batch
+
+    stats = pipeline.Pipeline(
+        source,
+        [pipeline.Stage("picky", picky, batch_size=10, max_wait_s=1.0, split_on_error=True),
+         pipeline.Stage("sink", sink, batch_size=10)],
+    ).run()
+    assert sorted(seen) == [i for i in range(10) if i != 3]
+    assert stats["picky"]["errors"] == 1
+
+
+def main() -> None:
+    print("=== Pipeline Tester ===")
+    test_every_item_drains_through_all_stages()
+    test_stop_drains_in_flight_items()
+    test_failing_batch_is_counted_not_fatal()
+    test_failed_inference_passes_rows_on_unscored()
+    test_split_on_error_isolates_the_bad_item()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
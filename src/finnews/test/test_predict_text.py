@@ -0,0 +1,239 @@
+"""
+Offline check of long-text scoring in SentimentPredictor: headline/body
+segments, overlapping windows, length-weighted pooling, length-bucketed
+batches, the window cache, and the lazily loaded process-wide predictor
+(an in-memory word-level tokenizer and a fake network, no model files).
+
+Run:
+  python src/finnews/test/test_predict_text.py
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+
+import numpy as np
+
+
+# Robust imports to support different run modes
+def _import_predict_text():
+    try:
+        from finnews import predict_text
+        return predict_text
+    except Exception:
+        try:
+            import predict_text  # type: ignore
+            return predict_text
+        except Exception:
+            import sys
+            from pathlib import Path
+            sys.path.append(str(Path(__file__).resolve().parents[1]))  # add .../src/finnews
+            import predict_text  # type: ignore
+            return predict_text
+
+
+predict_text = _import_predict_text()
+
+WORDS = [f"w{i}" for i in range(60)]
+
+
+def _tokenizer():
+    from tokenizers import Tokenizer, models, pre_tokenizers, processors
+    from transformers import PreTrainedTokenizerFast
+
+    vocab = {"[PAD]": 0, "[UNK]": 1, "[CLS]": 2, "[SEP]": 3, **{w: i + 4 for i, w in enumerate(WORDS)}}
+    tok = Tokenizer(models.WordLevel(vocab, unk_token="[UNK]"))
+    tok.pre_tokenizer = pre_tokenizers.Whitespace()
+    tok.post_processor = processors.TemplateProcessing(
+        single="[CLS] $A [SEP]", special_tokens=[("[CLS]", 2), ("[SEP]", 3)]
+    )
+    return PreTrainedTokenizerFast(tokenizer_object=tok, pad_token="[PAD]", unk_token="[UNK]",
+                                   cls_token="[CLS]", sep_token="[SEP]")
+
+
+class FakePredictor(predict_text.SentimentPredictor):
+    """Logits from the window's token ids: words w0-w19 negative, w20-w39 neutral, w40+ positive."""
+    backend = "fake"
+    tensor_type = "np"
+
+    def __init__(self, cache_size=64):
+        self.tokenizer = _tokenizer()
+        self.id2label = {0: "negative", 1: "neutral", 2: "positive"}
+        self.forward_rows = 0
+        self.batches = []  # (rows, padded length) per forward pass
+        self.windows = []  # word indexes of every window scored, in order
+        self._init_window_cache(size=cache_size)
+
+    def _logits(self, inputs):
+        ids, mask = inputs["input_ids"], inputs["attention_mask"]
+        self.forward_rows += len(ids)
+        self.batches.append(ids.shape)
+        out = np.zeros((len(ids), 3), dtype=np.float32)
+        for row, (r, m) in enumerate(zip(ids, mask)):
+            words = [i - 4 for i, keep in zip(r, m) if keep and i >= 4]
+            self.windows.append(words)
+            for w in words:
+                out[row, min(w // 20, 2)] += 1.0 / len(words)
+        return out
+
+
+def _text(*ids):
+    return " ".join(WORDS[i] for i in ids)
+
+
+def _with_small_windows(fn):
+    """MAX_LENGTH 8 (6 words per window), stride 2, at most 4 windows per text."""
+    saved = predict_text.MAX_LENGTH, predict_text.config.CHUNK_STRIDE, predict_text.config.CHUNK_MAX_WINDOWS
+    predict_text.MAX_LENGTH, predict_text.config.CHUNK_STRIDE, predict_text.config.CHUNK_MAX_WINDOWS = 8, 2, 4
+    try:
+        fn()
+    finally:
+        predict_text.MAX_LENGTH, predict_text.config.CHUNK_STRIDE, predict_text.config.CHUNK_MAX_WINDOWS = saved
+
+
+def test_long_texts_are_windowed_and_capped():
+    def run():
+        p = FakePredictor()
+        short, long_ = _text(41, 42), _text(*range(0, 30))
+        results = p.predict_scores([short, long_])
+        assert [r["label"] for r in results] == ["positive", "negative"]
+        # 30 words in windows of 6 overlapping by 2 is 7 windows, capped at 4
+        assert p.windows_scored == 1 + 4 and p.forward_rows == 5
+        assert abs(sum(results[1]["probs"].values()) - 1.0) < 1e-6
+
+    _with_small_windows(run)
+
+
+def test_windows_overlap_by_the_stride():
+    def run():
+        p = FakePredictor()
+        p.predict_scores([_text(*range(10))])
+        # 6 words per window, each starting 2 words before the previous one ended
+        assert sorted(p.windows) == [list(range(0, 6)), list(range(4, 10))]
+        p.predict_scores([f"{_text(50)}\n\n{_text(*range(20, 34))}"])
+        # The headline is its own window; the body's windows start at its first word
+        assert sorted(p.windows[2:]) == [[20, 21, 22, 23, 24, 25], [24, 25, 26, 27, 28, 29],
+                                         [28, 29, 30, 31, 32, 33], [50]]
+
+    _with_small_windows(run)
+
+
+def test_headline_and_body_are_pooled_by_length():
+    def run():
+        p = FakePredictor()
+        title, body = _text(41, 42), _text(21, 22, 23, 24, 25)
+        [doc] = p.predict_scores([f"{title}\n\n{body}"])
+        # Headline window: 4 tokens, all positive; body window: 7 tokens, all neutral
+        expected = predict_text.softmax(np.array([[0.0, 7.0 / 11, 4.0 / 11]]))[0]
+        assert np.allclose([doc["probs"][k] for k in ("negative", "neutral", "positive")], expected)
+        assert doc["label"] == "neutral" and p.windows_scored == 2
+
+    _with_small_windows(run)
+
+
+def test_batches_are_bucketed_by_length_without_changing_results():
+    def run():
+        texts = [_text(*range(i, 2 * i + 1)) for i in (5, 0, 3, 1, 4, 2)]
+        expected = FakePredictor().predict_scores(texts, batch_size=32)
+        p = FakePredictor()
+        assert p.predict_scores(texts, batch_size=2) == expected
+        # Six windows of 3 to 8 tokens, shortest first, each pair padded only to its longer one
+        assert [tuple(shape) for shape in p.batches] == [(2, 4), (2, 6), (2, 8)]
+        assert p.predict_scores([], batch_size=2) == [] and len(p.batches) == 3
+
+    _with_small_windows(run)
+
+
+def test_window_cache_shares_bodies_across_headlines():
+    def run():
+        p = FakePredictor()
+        body = _text(*range(20, 36))
+        first = p.predict_scores([f"{_text(41)}\n\n{body}"])
+        scored = p.windows_scored
+        assert scored > 2 and p.windows_cached == 0
+        # Same body under another headline: only the new headline is scored
+        second = p.predict_scores([f"{_text(1, 2)}\n\n{body}"])
+        assert p.windows_scored == scored + 1 and p.windows_cached == scored - 1
+        assert first[0]["label"] == second[0]["label"] == "neutral"
+        # The same text again is served entirely from the cache
+        p.predict_scores([f"{_text(1, 2)}\n\n{body}"])
+        assert p.windows_scored == scored + 1 and p.forward_rows == scored + 1
+
+    _with_small_windows(run)
+
+
+def test_window_cache_evicts_least_recently_used():
+    def run():
+        p = FakePredictor(cache_size=2)
+        a, b, c = _text(1), _text(21), _text(41)
+        p.predict_scores([a, b])
+        p.predict_scores([a])  # a is now the most recently used
+        p.predict_scores([c])  # evicts b
+        assert p.windows_scored == 3 and p.windows_cached == 1
+        p.predict_scores([a, c])
+        assert p.windows_scored == 3 and p.windows_cached == 3
+        p.predict_scores([b])
+        assert p.windows_scored == 4 and len(p._window_cache) == 2
+
+    _with_small_windows(run)
+
+
+def _with_predictor_singleton(fn):
+    """Run fn(model_dir, built) with get_predictor() building FakePredictors for a temporary model directory."""
+    config = predict_text.config
+    names = ("MODEL_PATH", "INFERENCE_BACKEND", "CASCADE", "INFERENCE_PROCESSES")
+    saved_config = {n: getattr(config, n) for n in names}
+    saved = predict_text._build_predictor, predict_text._predictor, predict_text._predictor_version
+    built = []
+
+    def build():
+        built.append(FakePredictor())
+        return built[-1]
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        config.MODEL_PATH, config.INFERENCE_BACKEND, config.CASCADE, config.INFERENCE_PROCESSES = model_dir, "torch", False, 1
+        predict_text._build_predictor, predict_text._predictor, predict_text._predictor_version = build, None, None
+        try:
+            fn(model_dir, built)
+        finally:
+            for n, v in saved_config.items():
+                setattr(config, n, v)
+            predict_text._build_predictor, predict_text._predictor, predict_text._predictor_version = saved
+
+
+def _write_version(model_dir, version):
+    with open(os.path.join(model_dir, predict_text.MODEL_VERSION_FILE), "w", encoding="utf-8") as f:
+        f.write(version)
+
+
+def test_predictor_is_loaded_once_and_again_after_retraining():
+    def run(model_dir, built):
+        _write_version(model_dir, "v1")
+        # Empty input never loads the model
+        assert predict_text.predict_sentiment_batch([]) == [] and predict_text.predict_sentiment_scores([]) == []
+        assert built == []
+        assert predict_text.predict_sentiment_batch([_text(41), _text(1)]) == ["positive", "negative"]
+        assert predict_text.predict_sentiment(_text(21)) == "neutral"
+        assert len(built) == 1 and predict_text.get_predictor() is built[0]
+        assert predict_text.predictor_version() == "v1"
+        _write_version(model_dir, "v2")
+        assert predict_text.get_predictor() is built[1] and len(built) == 2
+        assert predict_text.predictor_version() == predict_text._predictor_version == "v2"
+
+    _with_predictor_singleton(run)
+
+
+def main() -> None:
+    print("=== Predict Text Tester ===")
+    test_long_texts_are_windowed_and_capped()
+    test_windows_overlap_by_the_stride()
+    test_headline_and_body_are_pooled_by_length()
+    test_batches_are_bucketed_by_length_without_changing_results()
+    test_window_cache_shares_bodies_across_headlines()
+    test_window_cache_evicts_least_recently_used()
+    test_predictor_is_loaded_once_and_again_after_retraining()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Offline check of price move computation on synthetic minute bars: as-of
+tolerance, missing bars, horizons, the bar store path and idempotent
+backfills (temporary database and bar store only).
+
+Run:
+  python src/finnews/test/test_price_moves.py
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+
+import pandas as pd
+
+
+# Robust imports to support different run modes
+def _import_modules():
+    try:
+        from finnews import bar_store, price_moves
+        from finnews.storage import db as store
+        return bar_store, price_moves, store
+    except Exception:
+        try:
+            import bar_store, price_moves  # type: ignore
+            from storage import db as store  # type: ignore
+            return bar_store, price_moves, store
+        except Exception:
+            import sys
+            from pathlib import Path
+            sys.path.append(str(Path(__file__).resolve().parents[1]))  # add .../src/finnews
+            import bar_store, price_moves  # type: ignore
+            from storage import db as store  # type: ignore
+            return bar_store, price_moves, store
+
+
+bar_store, price_moves, store = _import_modules()
+
+OPEN = pd.Timestamp("2024-03-01T14:30:00Z")
+
+
+def _bars():
+    """AAPL every minute for an hour (close 100.0, 100.1, ...), then one bar after a 30 minute gap."""
+    ts = [OPEN + pd.Timedelta(minutes=i) for i in range(60)] + [OPEN + pd.Timedelta(minutes=90)]
+    close = [100.0 + i / 10 for i in range(60)] + [110.0]
+    return pd.DataFrame({"symbol": "AAPL", "ts": pd.to_datetime(ts, utc=True), "close": close})
+
+
+def _events(*rows):
+    return pd.DataFrame(list(rows), columns=["article_id", "symbol", "published_at"])
+
+
+def _iso(minutes):
+    return (OPEN + pd.Timedelta(minutes=minutes)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _moves(events, **kwargs):
+    out = price_moves.compute_moves(events, _bars(), **kwargs)
+    return {(r.article_id, r.horizon_min): r for r in out.itertuples(index=False)}
+
+
+def test_horizons_use_the_last_bar_at_or_before_each_time():
+    # Published between bars: t0 is the 10th minute's bar
+    moves = _moves(_events((1, "aapl", _iso(10.5))), horizons=[5, 15], tolerance_min=5)
+    assert sorted(moves) == [(1, 5), (1, 15)]
+    m = moves[(1, 5)]
+    assert (m.symbol, m.t0_utc, m.t0_px, m.tN_utc) == ("AAPL", _iso(10), 101.0, _iso(15))
+    assert abs(m.tN_px - 101.5) < 1e-9 and abs(m.delta_pct - (101.5 / 101.0 - 1) * 100) < 1e-9
+    assert moves[(1, 15)].tN_utc == _iso(25)
+
+
+def test_tolerance_and_missing_bars():
+    events = _events(
+        (1, "AAPL", _iso(-1)),       # before the first bar
+        (2, "AAPL", _iso(62)),       # 3 minutes after the last regular bar
+        (3, "AAPL", _iso(80)),       # 21 minutes stale: no t0 within tolerance
+        (4, "MSFT", _iso(10)),       # no bars at all
+        (5, "AAPL", None),           # undated
+        (6, "AAPL", _iso(58)),
+    )
+    moves = _moves(events, horizons=[5, 30], tolerance_min=5)
+    # 2: t0 at minute 59; +5 has no bar within 5 minutes, +30 lands on the minute 90 bar
+    # 6: +5 is minute 63 (last bar 59, 4 minutes old); +30 is minute 88, 29 minutes after minute 59
+    assert sorted(moves) == [(2, 30), (6, 5)]
+    assert moves[(2, 30)].tN_utc == _iso(90) and moves[(6, 5)].tN_utc == _iso(59)
+    # A wide tolerance reaches across the gap
+    wide = _moves(_events((3, "AAPL", _iso(80))), horizons=[15], tolerance_min=30)
+    assert wide[(3, 15)].t0_utc == _iso(59) and wide[(3, 15)].tN_utc == _iso(90)
+    # tN not after t0 (nothing traded over the horizon) is skipped
+    assert _moves(_events((7, "AAPL", _iso(70))), horizons=[5], tolerance_min=30) == {}
+    assert _moves(_events((1, "AAPL", _iso(10))), horizons=[]) == {}
+
+
+def test_bar_store_gives_the_same_moves():
+    events = _events((1, "AAPL", _iso(10.5)), (2, "AAPL", _iso(62)), (3, "MSFT", _iso(5)), (4, "AAPL", _iso(80)))
+    with tempfile.TemporaryDirectory() as root:
+        bs = bar_store.BarStore(root)
+        bs.append_frame(_bars())
+        for tolerance in (5, 30):
+            frame = price_moves.compute_moves(events, _bars(), horizons=[5, 30], tolerance_min=tolerance)
+            mapped = price_moves.compute_moves_from_store(events, bs, horizons=[5, 30], tolerance_min=tolerance)
+            key = ["article_id", "horizon_min"]
+            a = frame.sort_values(key).reset_index(drop=True)
+            b = mapped.sort_values(key).reset_index(drop=True)
+            assert len(a) and a[["article_id", "symbol", "t0_utc", "tN_utc", "horizon_min"]].equals(
+                b[["article_id", "symbol", "t0_utc", "tN_utc", "horizon_min"]])
+            assert ((a["delta_pct"] - b["delta_pct"]).abs() < 1e-4).all()
+
+
+def test_backfill_is_idempotent():
+    with tempfile.TemporaryDirectory() as root:
+        st = store.Store(os.path.join(root, "t.db"))
+        st.init_db()
+        st.bulk_upsert_articles([
+            {"provider": "newsapi", "external_id": None, "url": f"https://example.com/{i}", "title": f"Story {i}",
+             "published_at": _iso(minutes), "source": None, "language": "en", "tickers": ["AAPL"]}
+            for i, minutes in enumerate((10, 20, 200))
+        ])
+
+        def stored():
+            return st.conn().execute(
+                "SELECT article_id, horizon_min, tN_px FROM price_moves ORDER BY article_id, horizon_min"
+            ).fetchall()
+
+        assert price_moves.backfill(st, _bars(), horizons=[5, 15]) == 4
+        first = [tuple(r) for r in stored()]
+        assert len(first) == 4
+        # Re-running upserts on (article_id, symbol, horizon_min) instead of adding rows
+        assert price_moves.backfill(st, _bars(), horizons=[5, 15]) == 4
+        assert [tuple(r) for r in stored()] == first
+        # Corrected bars update the stored moves in place
+        bars = _bars()
+        bars.loc[bars["ts"] == OPEN + pd.Timedelta(minutes=15), "close"] = 200.0
+        price_moves.backfill(st, bars, horizons=[5, 15])
+        assert [tuple(r) for r in stored()][0][2] == 200.0 and len(stored()) == 4
+        st.close()
+
+
+def main() -> None:
+    print("=== Price Moves Tester ===")
+    test_horizons_use_the_last_bar_at_or_before_each_time()
+    test_tolerance_and_missing_bars()
+    test_bar_store_gives_the_same_moves()
+    test_backfill_is_idempotent()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
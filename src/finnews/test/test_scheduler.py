@@ -0,0 +1,253 @@
+"""
+Offline check of the polling scheduler's watermarks: pagination of feeds
+with more than one page of new items, feeds cut off at POLL_MAX_REQUESTS
+catching up over later polls, and watermarks held back when a pipeline
+stage fails (fake provider and stages, temporary database only).
+
+Run:
+  python src/finnews/test/test_scheduler.py
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+
+# Robust imports to support different run modes
+def _import_modules():
+    try:
+        from finnews import pipeline, scheduler
+        from finnews.storage import db as store
+        return pipeline, scheduler, store
+    except Exception:
+        try:
+            import pipeline, scheduler  # type: ignore
+            from storage import db as store  # type: ignore
+            return pipeline, scheduler, store
+        except Exception:
+            import sys
+            from pathlib import Path
+            sys.path.append(str(Path(__file__).resolve().parents[1]))  # add .../src/finnews
+            import pipeline, scheduler  # type: ignore
+            from storage import db as store  # type: ignore
+            return pipeline, scheduler, store
+
+
+pipeline, scheduler, store = _import_modules()
+
+START = datetime(2024, 3, 1, tzinfo=timezone.utc)
+
+
+class Provider:
+    """Newest-first pages of n articles, filtered like the real endpoints (since exclusive, until inclusive)."""
+    def __init__(self, n: int, page_size: int):
+        self.articles = [
+            {"url": f"https://example.com/{i}", "title": f"Story {i}",
+             "published_at": scheduler.to_iso(START + timedelta(minutes=i))}
+            for i in range(n)
+        ]
+        self.page_size = page_size
+        self.calls = 0
+
+    def fetch(self, since, until):
+        self.calls += 1
+        lo, hi = scheduler.parse_iso(since), scheduler.parse_iso(until)
+        rows = [a for a in reversed(self.articles)
+                if (lo is None or scheduler.parse_iso(a["published_at"]) > lo)
+                and (hi is None or scheduler.parse_iso(a["published_at"]) <= hi)]
+        return [dict(a) for a in rows[:self.page_size]]
+
+
+def _run(st, feeds, *, fail=False, day=1):
+    """Poll with a writer that records urls instead of the model and storage stages."""
+    written = []
+
+    def build(requests, *, st, on_fetched):
+        def infer(rows):
+            if fail:
+                raise RuntimeError("model file missing")
+            return rows
+
+        def write(rows):
+            written.extend(r["url"] for r in rows)
+            return rows
+
+        return pipeline.Pipeline(
+            pipeline.fetch_source(requests, on_fetched=on_fetched),
+            [pipeline.Stage("inference", infer, batch_size=2), pipeline.Stage("writer", write, batch_size=8)],
+        )
+
+    real = scheduler.pipeline.build_ingestion_pipeline
+    scheduler.pipeline.build_ingestion_pipeline = build
+    try:
+        scheduler.Scheduler(feeds, st=st).poll_once(now=START + timedelta(days=day))
+    finally:
+        scheduler.pipeline.build_ingestion_pipeline = real
+    return written
+
+
+def _seed(st, feed):
+    """A watermark just before the provider's oldest article, due for polling."""
+    st.save_watermark(provider=feed.provider, query=feed.query,
+                      last_published_at=scheduler.to_iso(START - timedelta(minutes=1)), last_count=0,
+                      poll_interval_s=300, next_poll_at=scheduler.to_iso(START))
+
+
+def _watermark(st, feed):
+    return (st.get_watermarks().get(feed.key) or {}).get("last_published_at")
+
+
+def test_failed_stage_keeps_the_watermark():
+    with tempfile.TemporaryDirectory() as root:
+        st = store.Store(os.path.join(root, "t.db"))
+        st.init_db()
+        provider = Provider(3, page_size=10)
+        feed = scheduler.Feed("marketaux", "symbols:*", provider.fetch, page_size=10)
+
+        _run(st, [feed], fail=True)
+        assert _watermark(st, feed) is None
+        # The next clean poll reads the same items again and commits
+        assert sorted(_run(st, [feed], day=2)) == sorted(a["url"] for a in provider.articles)
+        assert _watermark(st, feed) == provider.articles[-1]["published_at"]
+        st.close()
+
+
+def test_first_poll_reads_one_page():
+    with tempfile.TemporaryDirectory() as root:
+        st = store.Store(os.path.join(root, "t.db"))
+        st.init_db()
+        provider = Provider(7, page_size=3)
+        feed = scheduler.Feed("newsapi", "everything:stocks", provider.fetch, page_size=3)
+
+        assert len(_run(st, [feed])) == 3 and provider.calls == 1
+        assert _watermark(st, feed) == provider.articles[-1]["published_at"]
+        st.close()
+
+
+def test_feed_pages_back_to_the_watermark():
+    with tempfile.TemporaryDirectory() as root:
+        st = store.Store(os.path.join(root, "t.db"))
+        st.init_db()
+        provider = Provider(7, page_size=3)
+        feed = scheduler.Feed("newsapi", "everything:stocks", provider.fetch, page_size=3)
+        _seed(st, feed)
+
+        written = _run(st, [feed])
+        assert sorted(written) == sorted(a["url"] for a in provider.articles)
+        assert feed.complete and _watermark(st, feed) == provider.articles[-1]["published_at"]
+        st.close()
+
+
+def test_truncated_feed_keeps_the_watermark():
+    with tempfile.TemporaryDirectory() as root:
+        st = store.Store(os.path.join(root, "t.db"))
+        st.init_db()
+        provider = Provider(10, page_size=3)
+        feed = scheduler.Feed("newsapi", "everything:stocks", provider.fetch, page_size=3)
+        _seed(st, feed)
+        seeded = _watermark(st, feed)
+
+        limit = scheduler.config.POLL_MAX_REQUESTS
+        scheduler.config.POLL_MAX_REQUESTS = 2
+        try:
+            written = _run(st, [feed])
+        finally:
+            scheduler.config.POLL_MAX_REQUESTS = limit
+        # Newest two pages stored (one item shared by both), older ones still pending
+        assert len(written) == 5 and provider.calls == 2
+        assert not feed.complete and _watermark(st, feed) == seeded
+        st.close()
+
+
+def _poll_days(st, feed, days, *, max_requests=2):
+    """Poll once per day with POLL_MAX_REQUESTS lowered; returns the urls written by each poll."""
+    limit = scheduler.config.POLL_MAX_REQUESTS
+    scheduler.config.POLL_MAX_REQUESTS = max_requests
+    try:
+        return [_run(st, [feed], day=day) for day in days]
+    finally:
+        scheduler.config.POLL_MAX_REQUESTS = limit
+
+
+def test_truncated_feed_catches_up_on_later_polls():
+    with tempfile.TemporaryDirectory() as root:
+        st = store.Store(os.path.join(root, "t.db"))
+        st.init_db()
+        provider = Provider(10, page_size=3)
+        feed = scheduler.Feed("newsapi", "everything:stocks", provider.fetch, page_size=3)
+        _seed(st, feed)
+        seeded = _watermark(st, feed)
+
+        polls = _poll_days(st, feed, [1, 2])
+        assert _watermark(st, feed) == seeded and not feed.complete
+        polls += _poll_days(st, feed, [3])
+        urls = [a["url"] for a in provider.articles]
+        # Each poll resumes where the last one stopped, until the watermark is reached
+        assert [sorted(p) for p in polls] == [sorted(urls[5:]), sorted(urls[1:6]), sorted(urls[:2])]
+        assert feed.complete
+        mark = st.get_watermarks()[feed.key]
+        assert mark["resume_until"] is None and mark["pending_published_at"] is None
+        assert _watermark(st, feed) == provider.articles[-1]["published_at"]
+
+        # Caught up: the next poll reads only what arrived since
+        provider.articles.append({"url": "https://example.com/new", "title": "New",
+                                  "published_at": scheduler.to_iso(START + timedelta(hours=1))})
+        assert _poll_days(st, feed, [4]) == [["https://example.com/new"]]
+        assert _watermark(st, feed) == provider.articles[-1]["published_at"]
+        st.close()
+
+
+def test_failed_poll_resumes_from_the_same_point():
+    with tempfile.TemporaryDirectory() as root:
+        st = store.Store(os.path.join(root, "t.db"))
+        st.init_db()
+        provider = Provider(10, page_size=3)
+        feed = scheduler.Feed("newsapi", "everything:stocks", provider.fetch, page_size=3)
+        _seed(st, feed)
+
+        _poll_days(st, feed, [1])
+        resume = st.get_watermarks()[feed.key]["resume_until"]
+        limit = scheduler.config.POLL_MAX_REQUESTS
+        scheduler.config.POLL_MAX_REQUESTS = 2
+        try:
+            _run(st, [feed], fail=True, day=2)
+        finally:
+            scheduler.config.POLL_MAX_REQUESTS = limit
+        assert st.get_watermarks()[feed.key]["resume_until"] == resume
+        _poll_days(st, feed, [3, 4])
+        assert _watermark(st, feed) == provider.articles[-1]["published_at"]
+        st.close()
+
+
+def test_one_timestamp_filling_pages_does_not_stall():
+    with tempfile.TemporaryDirectory() as root:
+        st = store.Store(os.path.join(root, "t.db"))
+        st.init_db()
+        provider = Provider(8, page_size=2)
+        for a in provider.articles[2:6]:
+            a["published_at"] = provider.articles[5]["published_at"]
+        feed = scheduler.Feed("newsapi", "everything:stocks", provider.fetch, page_size=2)
+        _seed(st, feed)
+
+        written = set().union(*_poll_days(st, feed, range(1, 6)))
+        # Items sharing the timestamp beyond the first page of it are skipped, the rest is read
+        assert {a["url"] for a in provider.articles[:2] + provider.articles[6:]} <= written
+        assert _watermark(st, feed) == provider.articles[-1]["published_at"]
+        st.close()
+
+
+def main() -> None:
+    print("=== Scheduler Tester ===")
+    test_failed_stage_keeps_the_watermark()
+    test_first_poll_reads_one_page()
+    test_feed_pages_back_to_the_watermark()
+    test_truncated_feed_keeps_the_watermark()
+    test_truncated_feed_catches_up_on_later_polls()
+    test_failed_poll_resumes_from_the_same_point()
+    test_one_timestamp_filling_pages_does_not_stall()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Offline check of full-text headline search: the FTS5 index kept in sync by
+triggers, query sanitizing, BM25 ranking, highlights and snippets, and the
+index rebuild for databases created before it existed (temporary databases
+only).
+
+Run:
+  python src/finnews/test/test_search.py
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import tempfile
+
+
+# Robust imports to support different run modes
+def _import_store():
+    try:
+        from finnews.storage import db as store
+        return store
+    except Exception:
+        try:
+            from storage import db as store  # type: ignore
+            return store
+        except Exception:
+            import sys
+            from pathlib import Path
+            sys.path.append(str(Path(__file__).resolve().parents[1]))  # add .../src/finnews
+            from storage import db as store  # type: ignore
+            return store
+
+
+store = _import_store()
+
+
+def _store(root):
+    st = store.Store(os.path.join(root, "t.db"))
+    st.init_db()
+    return st
+
+
+def _article(i, title, description=None, source="Example Wire"):
+    return {"provider": "newsapi", "external_id": None, "url": f"https://example.com/{i}", "title": title,
+            "description": description, "published_at": "2024-03-01T12:00:00Z", "source": source,
+            "language": "en", "tickers": []}
+
+
+def _ids(st, query, **kwargs):
+    return [r["id"] for r in st.search_articles(query, **kwargs)]
+
+
+def test_index_follows_inserts_updates_and_deletes():
+    with tempfile.TemporaryDirectory() as root:
+        st = _store(root)
+        [(a0, _), (a1, _)] = st.bulk_upsert_articles([
+            _article(0, "Apple shares rise after earnings"),
+            _article(1, "Oil slips", "Crude inventories built up for a third week.", source="Energy Desk"),
+        ])
+        assert _ids(st, "apple") == [a0]
+        assert _ids(st, "inventories") == [a1] and _ids(st, "energy desk") == [a1]
+        # Porter stemming: other forms of a word match
+        assert _ids(st, "rising") == [a0]
+
+        st.bulk_upsert_articles([_article(0, "Apple shares fall after earnings")])
+        assert _ids(st, "rise") == [] and _ids(st, "fall") == [a0]
+        with st.conn() as conn:
+            conn.execute("DELETE FROM articles WHERE id = ?", (a1,))
+        assert _ids(st, "oil") == [] and _ids(st, "inventories") == []
+        st.close()
+
+
+def test_queries_are_sanitized():
+    with tempfile.TemporaryDirectory() as root:
+        st = _store(root)
+        [(a0, _), (a1, _)] = st.bulk_upsert_articles([
+            _article(0, "Apple earnings beat estimates"),
+            _article(1, "Microsoft earnings guidance"),
+        ])
+        # Every word must match, the last one as a prefix
+        assert sorted(_ids(st, "earn")) == sorted([a0, a1])
+        assert _ids(st, "earnings guid") == [a1]
+        assert _ids(st, "apple guidance") == []
+        # Quotes, operators, column filters and stray syntax are plain words, never FTS5 errors
+        for query in ('"apple', 'apple OR microsoft', 'title:apple', 'NEAR(apple earnings)', 'apple -beat',
+                      'apple AND', '*', '"', '(', '^apple', 'app*le'):
+            st.search_articles(query)
+        assert _ids(st, 'apple" OR "microsoft') == []
+        assert _ids(st, "title:apple") == []
+        assert _ids(st, '"Apple"  (earnings)') == [a0]
+        assert st.search_articles("") == [] and st.search_articles(" -*- ") == []
+        st.close()
+
+
+def test_title_matches_rank_first_with_highlights_and_snippets():
+    with tempfile.TemporaryDirectory() as root:
+        st = _store(root)
+        [(body, _), (title, _), (both, _)] = st.bulk_upsert_articles([
+            _article(0, "Markets wrap", "Chipmakers led gains as Nvidia climbed on strong demand."),
+            _article(1, "Nvidia climbs to record"),
+            _article(2, "Nvidia results", "Nvidia beat estimates and raised its outlook."),
+        ])
+        results = st.search_articles("nvidia")
+        # Title weight 10 vs description 2: both title hits before the body-only one
+        assert [r["id"] for r in results][-1] == body and set(r["id"] for r in results[:2]) == {title, both}
+        hits = {r["id"]: r for r in results}
+        assert hits[title]["title_hl"] == "[Nvidia] climbs to record"
+        assert hits[body]["title_hl"] == "Markets wrap"
+        assert "[Nvidia]" in hits[body]["snippet"] and "demand" in hits[body]["snippet"]
+        [bold] = st.search_articles("record", mark=("**", "**"))
+        assert bold["title_hl"] == "Nvidia climbs to **record**"
+        assert [r["id"] for r in st.search_articles("nvidia", limit=1, offset=2)] == [body]
+        st.close()
+
+
+def test_existing_databases_are_indexed_on_init():
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "old.db")
+        conn = sqlite3.connect(path)
+        conn.executescript("""
+            CREATE TABLE articles(
+              id INTEGER PRIMARY KEY, provider TEXT NOT NULL, external_id TEXT, url TEXT NOT NULL UNIQUE,
+              title TEXT NOT NULL, published_at TEXT, source TEXT, language TEXT, tickers_json TEXT,
+              raw_json TEXT NOT NULL, inserted_at TEXT NOT NULL
+            );
+        """)
+        conn.executemany(
+            "INSERT INTO articles(provider, url, title, source, raw_json, inserted_at) VALUES ('newsapi', ?, ?, ?, ?, '')",
+            [("https://example.com/0", "Apple shares rise", "Wire", '{"description": "Strong iPhone demand."}'),
+             ("https://example.com/1", "Oil slips", "Wire", "{}")],
+        )
+        conn.commit()
+        conn.close()
+
+        st = store.Store(path)
+        st.init_db()
+        ids = st.get_article_ids_by_url(["https://example.com/0", "https://example.com/1"])
+        assert _ids(st, "apple") == [ids["https://example.com/0"]]
+        # Descriptions recovered from raw_json by the migration are indexed too
+        assert _ids(st, "iphone") == [ids["https://example.com/0"]]
+        # A second init_db does not index the rows twice
+        st.init_db()
+        assert _ids(st, "oil") == [ids["https://example.com/1"]]
+        assert st.conn().execute("SELECT COUNT(*) FROM articles_fts WHERE articles_fts MATCH 'wire'").fetchone()[0] == 2
+        st.close()
+
+
+def main() -> None:
+    print("=== Search Tester ===")
+    test_index_follows_inserts_updates_and_deletes()
+    test_queries_are_sanitized()
+    test_title_matches_rank_first_with_highlights_and_snippets()
+    test_existing_databases_are_indexed_on_init()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Offline check of the inference cache: hits from memory and from the
+database, key normalization, and a model retrained on disk (reload,
+new cache keys, purge of the old model's rows). Uses a fake predictor,
+a temporary model directory and a temporary database.
+
+Run:
+  python src/finnews/test/test_sentiment_cache.py
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+
+
+# Robust imports to support different run modes
+def _import_sentiment_cache():
+    try:
+        from finnews import sentiment_cache
+        return sentiment_cache
+    except Exception:
+        try:
+            import sentiment_cache  # type: ignore
+            return sentiment_cache
+        except Exception:
+            import sys
+            from pathlib import Path
+            sys.path.append(str(Path(__file__).resolve().parents[1]))  # add .../src/finnews
+            import sentiment_cache  # type: ignore
+            return sentiment_cache
+
+
+sentiment_cache = _import_sentiment_cache()
+# The modules sentiment_cache itself uses (flat or package imports, depending on the run mode)
+predict_text = sentiment_cache.predict_text
+store = sentiment_cache.store
+config = predict_text.config
+
+
+class FakePredictor:
+    """Labels every text "positive" under model v1 and "negative" under any other."""
+    def __init__(self, version):
+        self.version = version
+        self.scored = []
+        self.on_predict = None
+
+    def predict_scores(self, texts, batch_size=32):
+        self.scored.extend(texts)
+        if self.on_predict:
+            self.on_predict()
+        label = "positive" if self.version == "v1" else "negative"
+        return [{"label": label, "score": 0.9, "probs": {label: 0.9}} for _ in texts]
+
+
+def _write_version(model_dir, version):
+    with open(os.path.join(model_dir, predict_text.MODEL_VERSION_FILE), "w", encoding="utf-8") as f:
+        f.write(version)
+
+
+def _with_model(fn):
+    """Run fn(model_dir, built) against a temporary database and model directory (torch backend, one process)."""
+    names = ("MODEL_PATH", "INFERENCE_BACKEND", "CASCADE", "INFERENCE_PROCESSES")
+    saved_config = {n: getattr(config, n) for n in names}
+    saved = (store.DB_PATH, predict_text._build_predictor, predict_text._predictor, predict_text._predictor_version)
+    built = []
+
+    def build():
+        built.append(FakePredictor(predict_text.model_version()))
+        return built[-1]
+
+    with tempfile.TemporaryDirectory() as root:
+        model_dir = os.path.join(root, "model")
+        os.makedirs(model_dir)
+        _write_version(model_dir, "v1")
+        config.MODEL_PATH, config.INFERENCE_BACKEND, config.CASCADE, config.INFERENCE_PROCESSES = model_dir, "torch", False, 1
+        store.DB_PATH = os.path.join(root, "t.db")
+        predict_text._build_predictor, predict_text._predictor, predict_text._predictor_version = build, None, None
+        try:
+            store.init_db()
+            fn(model_dir, built)
+        finally:
+            store.default_store().close()
+            for n, v in saved_config.items():
+                setattr(config, n, v)
+            store.DB_PATH, predict_text._build_predictor, predict_text._predictor, predict_text._predictor_version = saved
+
+
+def _cached_versions():
+    rows = store.default_store().conn().execute("SELECT model_version, COUNT(*) AS n FROM sentiment_cache GROUP BY 1")
+    return {r["model_version"]: r["n"] for r in rows}
+
+
+def test_hits_misses_and_normalization():
+    def run(model_dir, built):
+        cache = sentiment_cache.SentimentCache()
+        results = sentiment_cache.predict_sentiment_scores_cached(["Apple rises", "  apple   RISES ", "Oil falls"], cache=cache)
+        assert [r["label"] for r in results] == ["positive"] * 3
+        # Case and whitespace variants share a key, so they are scored once
+        assert built[0].scored == ["Apple rises", "Oil falls"]
+        sentiment_cache.predict_sentiment_scores_cached(["OIL FALLS", "Gold flat"], cache=cache)
+        assert built[0].scored[2:] == ["Gold flat"]
+        # A new process (empty memory) reads the database
+        labels = sentiment_cache.predict_sentiment_batch_cached(["apple rises", "gold flat"],
+                                                                cache=sentiment_cache.SentimentCache())
+        assert labels == ["positive", "positive"] and len(built[0].scored) == 3
+        assert _cached_versions() == {"v1": 3} and len(built) == 1
+
+    _with_model(run)
+
+
+def test_retrained_model_is_reloaded_and_old_rows_purged():
+    def run(model_dir, built):
+        cache = sentiment_cache.SentimentCache()
+        sentiment_cache.predict_sentiment_scores_cached(["Apple rises", "Oil falls"], cache=cache)
+        _write_version(model_dir, "v2")
+        # The same texts miss under the new version and are scored by the reloaded model
+        results = sentiment_cache.predict_sentiment_scores_cached(["Apple rises"], cache=cache)
+        assert [p.version for p in built] == ["v1", "v2"] and built[1].scored == ["Apple rises"]
+        assert results[0]["label"] == "negative"
+        assert _cached_versions() == {"v2": 1}
+        assert sentiment_cache.predict_sentiment_scores_cached(["apple rises"], cache=cache)[0]["label"] == "negative"
+        assert len(built) == 2 and built[1].scored == ["Apple rises"]
+
+    _with_model(run)
+
+
+def test_results_of_a_model_swapped_mid_call_are_not_cached():
+    def run(model_dir, built):
+        predict_text.get_predictor().on_predict = lambda: _write_version(model_dir, "v2")
+        results = sentiment_cache.predict_sentiment_scores_cached(["Apple rises"])
+        assert results[0]["label"] == "positive"
+        assert _cached_versions() == {}
+
+    _with_model(run)
+
+
+def main() -> None:
+    print("=== Sentiment Cache Tester ===")
+    test_hits_misses_and_normalization()
+    test_retrained_model_is_reloaded_and_old_rows_purged()
+    test_results_of_a_model_swapped_mid_call_are_not_cached()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Offline check of the hashed n-gram student model (toy data, temporary
+directory only).
+
+Run:
+  python src/finnews/test/test_student_model.py
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+
+import numpy as np
+
+
+# Robust imports to support different run modes
+def _import_student_model():
+    try:
+        from finnews import student_model
+        return student_model
+    except Exception:
+        try:
+            import student_model  # type: ignore
+            return student_model
+        except Exception:
+            import sys
+            from pathlib import Path
+            sys.path.append(str(Path(__file__).resolve().parents[1]))  # add .../src/finnews
+            import student_model  # type: ignore
+            return student_model
+
+
+student_model = _import_student_model()
+
+LABELS = ["positive", "negative", "neutral"]
+TRAIN = [
+    ("Profit rose sharply on strong demand", 0),
+    ("Shares jumped after earnings beat", 0),
+    ("Revenue grew to a record", 0),
+    ("Shares fell after a profit warning", 1),
+    ("Losses widened as sales dropped", 1),
+    ("The company cut its forecast", 1),
+    ("The annual meeting will be held in May", 2),
+    ("The company is based in Helsinki", 2),
+    ("The report will be published on Tuesday", 2),
+]
+
+
+def _trained():
+    texts = [t for t, _ in TRAIN]
+    targets = np.eye(3)[[y for _, y in TRAIN]]
+    return student_model.HashedLinearModel(LABELS, n_features=1 << 12).fit(texts * 5, np.tile(targets, (5, 1)), lr=0.1)
+
+
+def test_features_are_normalized_and_hashed():
+    X = student_model.featurize(["Profit rose", "", "Profit rose"], n_features=1 << 10)
+    assert X.shape == (3, 1 << 10)
+    assert np.isclose((X[0].toarray() ** 2).sum(), 1.0) and X[1].nnz == 0
+    assert (X[0] != X[2]).nnz == 0
+
+
+def test_fits_training_data_and_scores_empty_text():
+    model = _trained()
+    preds = model.predict_proba([t for t, _ in TRAIN]).argmax(axis=1)
+    assert preds.tolist() == [y for _, y in TRAIN]
+    probs = model.predict_proba(["", "Profit rose"])
+    assert np.allclose(probs.sum(axis=1), 1.0)
+
+
+def test_saved_model_serves_the_prediction_api():
+    model = _trained()
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "student.npz")
+        version = model.save(path)
+        assert student_model.model_version(path) == version
+        assert student_model.model_version(os.path.join(root, "missing.npz")) is None
+
+        predictor = student_model.StudentPredictor(path)
+        result = predictor.predict_scores(["Shares fell after a profit warning"])[0]
+        assert result["label"] == "negative"
+        assert set(result["probs"]) == set(LABELS) and result["score"] == max(result["probs"].values())
+        assert predictor.predict("Revenue grew to a record") == "positive"
+
+
+def main() -> None:
+    print("=== Student Model Tester ===")
+    test_features_are_normalized_and_hashed()
+    test_fits_training_data_and_scores_empty_text()
+    test_saved_model_serves_the_prediction_api()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Offline check of ticker tagging (no database, no network).
+
+Run:
+  python src/finnews/test/test_tickers.py
+"""
+from __future__ import annotations
+
+
+# Robust imports to support different run modes
+def _import_tickers():
+    try:
+        from finnews import tickers
+        return tickers
+    except Exception:
+        try:
+            import tickers  # type: ignore
+            return tickers
+        except Exception:
+            import sys
+            from pathlib import Path
+            sys.path.append(str(Path(__file__).resolve().parents[1]))  # add .../src/finnews
+            import tickers  # type: ignore
+            return tickers
+
+
+tickers = _import_tickers()
+
+SYMBOLS = {
+    "AAPL": ["Apple"],
+    "AMD": ["Advanced Micro Devices"],
+    "V": ["Visa"],
+    "JPM": ["JPMorgan", "JPMorgan Chase"],
+    "META": ["Meta", "Meta Platforms"],
+    "MSFT": ["Microsoft"],
+    "ORCL": ["Oracle"],
+    "TMUS": ["T-Mobile"],
+}
+PLAIN_NAMES = ["Apple", "Meta", "Oracle", "Visa"]
+
+
+def test_names_and_cashtags():
+    m = tickers.TickerMatcher(SYMBOLS)
+    assert m.extract("Apple's results lift $MSFT") == ["AAPL", "MSFT"]
+    assert m.extract("JPMorgan Chase and Visa beat estimates") == ["JPM", "V"]
+
+
+def test_word_boundaries_and_case():
+    m = tickers.TickerMatcher(SYMBOLS)
+    assert m.extract("Applebee's shares rise") == []
+    assert m.extract("new visa rules announced") == []
+    # Unknown cashtags are ignored
+    assert m.extract("$ZZZZ soars") == []
+
+
+def test_bare_symbols():
+    m = tickers.TickerMatcher(SYMBOLS)
+    assert m.extract("AMD jumps on chip demand") == ["AMD"]
+    assert m.extract("Nvidia and AMD rally; MSFT slips") == ["AMD", "MSFT"]
+    # Lowercase, part of a longer word, or a whole headline in capitals
+    assert m.extract("amd jumps") == []
+    assert m.extract("AMDX and pre-AMD designs") == []
+    assert m.extract("AMD AND NVIDIA SOAR") == []
+
+
+def test_plain_word_names():
+    m = tickers.TickerMatcher(SYMBOLS, plain_names=PLAIN_NAMES)
+    assert m.extract("Visa Rules Tighten") == []
+    assert m.extract("Oracle Of Omaha Buys More Stock") == []
+    assert m.extract("Meta-analysis finds no effect") == []
+    # Cues that the title-case name is the company
+    assert m.extract("Visa Shares Fall After Earnings") == ["V"]
+    assert m.extract("Oracle's Cloud Unit Grows") == ["ORCL"]
+    # Sentence case keeps the capital as the signal; hyphenated names still match
+    assert m.extract("Visa rules out a deal") == ["V"]
+    assert m.extract("T-Mobile raises outlook") == ["TMUS"]
+    # Title and description are judged separately
+    article = {"title": "Visa Rules Tighten For Travelers", "description": "Meta said on Tuesday it would appeal."}
+    assert m.tag(article) == ["META"]
+
+
+def test_overlapping_patterns():
+    ac = tickers.AhoCorasick([("he", "a"), ("she", "b"), ("hers", "c")])
+    assert sorted(ac.find("ushers")) == [(1, 4, "b"), (2, 4, "a"), (2, 6, "c")]
+
+
+def test_tag_merges_provider_tickers():
+    m = tickers.TickerMatcher(SYMBOLS)
+    article = {"title": "Markets drift", "description": "Microsoft slips", "tickers": ["XYZ"]}
+    assert m.tag(article) == ["MSFT", "XYZ"]
+
+
+def main() -> None:
+    print("=== Ticker Tagging Tester ===")
+    test_names_and_cashtags()
+    test_word_boundaries_and_case()
+    test_bare_symbols()
+    test_plain_word_names()
+    test_overlapping_patterns()
+    test_tag_merges_provider_tickers()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
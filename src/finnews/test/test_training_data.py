@@ -0,0 +1,112 @@
+"""
+Offline check of the tokenized training cache, length-grouped sampler and
+dynamic-padding collator (toy tokenizer, temporary directory only).
+
+Run:
+  python src/finnews/test/test_training_data.py
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+
+
+# Robust imports to support different run modes
+def _import_training_data():
+    try:
+        from finnews import training_data
+        return training_data
+    except Exception:
+        try:
+            import training_data  # type: ignore
+            return training_data
+        except Exception:
+            import sys
+            from pathlib import Path
+            sys.path.append(str(Path(__file__).resolve().parents[1]))  # add .../src/finnews
+            import training_data  # type: ignore
+            return training_data
+
+
+training_data = _import_training_data()
+
+ROWS = [
+    ("Profit rose sharply", "positive"),
+    ("Shares fell", "negative"),
+    ("The company will hold its annual meeting in May", "neutral"),
+    ("Sales beat estimates again", "positive"),
+]
+
+
+class WordTokenizer:
+    """Whitespace tokenizer with a growing vocabulary; counts its calls."""
+    special_tokens_map = {"pad_token": "[PAD]"}
+
+    def __init__(self):
+        self.vocab = {"[PAD]": 0, "[CLS]": 1, "[SEP]": 2}
+        self.calls = 0
+
+    def get_vocab(self):
+        return {}
+
+    def __call__(self, texts, *, truncation=True, max_length=512):
+        self.calls += 1
+        ids = [[1] + [self.vocab.setdefault(w, len(self.vocab)) for w in t.split()] + [2] for t in texts]
+        return {"input_ids": [row[:max_length] for row in ids]}
+
+
+def _write_csv(path):
+    with open(path, "w", encoding="latin1") as f:
+        f.write("Sentence,Sentiment\n")
+        for text, label in ROWS:
+            f.write(f'"{text}",{label}\n')
+
+
+def test_cache_is_built_once_and_memory_mapped():
+    with tempfile.TemporaryDirectory() as root:
+        csv = os.path.join(root, "data.csv")
+        _write_csv(csv)
+        tok = WordTokenizer()
+        data = training_data.build_cache(csv, tok, max_length=6, cache_dir=root)
+        assert len(data) == 4 and data.label2id == {"positive": 0, "negative": 1, "neutral": 2}
+        assert data.lengths.tolist() == [5, 4, 6, 6]
+        assert data.row(1).tolist() == [1, 6, 7, 2]
+        assert data.labels.tolist() == [0, 1, 2, 0]
+
+        again = training_data.build_cache(csv, tok, max_length=6, cache_dir=root)
+        assert tok.calls == 1 and again.root == data.root
+        # A different truncation length is a different cache
+        training_data.build_cache(csv, tok, max_length=8, cache_dir=root)
+        assert tok.calls == 2
+
+
+def test_sampler_groups_lengths_and_covers_every_row():
+    lengths = [(i * 37) % 100 + 1 for i in range(1000)]
+    sampler = training_data.LengthGroupedSampler(lengths, 10, seed=0)
+    first, second = list(sampler), list(sampler)
+    assert sorted(first) == list(range(1000)) and first != second
+    assert lengths[first[0]] == max(lengths)
+
+    grouped = training_data.padding_stats(lengths, 10)
+    plain = training_data.padding_stats(lengths, 10, grouped=False)
+    assert grouped["padded_tokens"] < plain["padded_tokens"] < plain["global_max_tokens"]
+
+
+def test_collator_pads_to_the_longest_in_batch():
+    collate = training_data.DynamicPaddingCollator(pad_token_id=0)
+    batch = collate([{"input_ids": [1, 5, 2], "labels": 1}, {"input_ids": [1, 2], "labels": 0}])
+    assert batch["input_ids"].tolist() == [[1, 5, 2], [1, 2, 0]]
+    assert batch["attention_mask"].tolist() == [[1, 1, 1], [1, 1, 0]]
+    assert batch["labels"].tolist() == [1, 0]
+
+
+def main() -> None:
+    print("=== Training Data Tester ===")
+    test_cache_is_built_once_and_memory_mapped()
+    test_sampler_groups_lengths_and_covers_every_row()
+    test_collator_pads_to_the_longest_in_batch()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Ticker tagging for headlines.
+
+Finds $cashtags, standalone all-caps symbols ("AMD", three letters or
+more) and company names from a local symbol list (data/symbols.csv:
+symbol,names,plain_names with names separated by '|'). Names are compiled
+once into an Aho-Corasick automaton, so tagging costs one pass over the
+text however many symbols are listed. Matches must sit on word boundaries,
+not touch a hyphen and start with a capital letter in the original text,
+which keeps "visa rules", "target price" or "Meta-analysis" from tagging.
+
+plain_names are names that are also ordinary words (Visa, Oracle). In
+title-case text their capital says nothing, so there they count only when
+followed by a company cue ("Visa Shares Fall", "Oracle's") and not in
+"Visa Rules Tighten" or "Oracle Of Omaha".
+"""
+import csv, re, string, threading
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import config
+
+# Prefer package import; fall back to relative when run as module
+try:
+    from storage import db as store
+except Exception:
+    from .storage import db as store  # type: ignore
+
+_CASHTAG_RE = re.compile(r"\$([A-Za-z]{1,5}(?:\.[A-Za-z])?)\b")
+# Shorter all-caps words (GE, MS, HD, V) are too often abbreviations
+_SYMBOL_RE = re.compile(r"(?<![\w$.-])([A-Z]{3,5}(?:\.[A-Z])?)(?![\w-])")
+_WORD_RE = re.compile(r"[A-Za-z][A-Za-z']*")
+# Words after a plain name that show it is the company
+COMPANY_CUES = frozenset(
+    "inc corp co ltd plc shares stock stocks earnings revenue profit sales results ceo "
+    "investors analysts deal price target".split()
+)
+# Lowercase ASCII only, so match offsets line up with the original text
+_FOLD = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def load_symbols(path: str) -> Dict[str, List[str]]:
+    """{symbol: [names]} from a symbol,names CSV."""
+    out: Dict[str, List[str]] = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            symbol = (row.get("symbol") or "").strip().upper()
+            if symbol:
+                out[symbol] = [n.strip() for n in (row.get("names") or "").split("|") if n.strip()]
+    return out
+
+
+def load_plain_names(path: str) -> Set[str]:
+    """Names listed in the optional plain_names column of a symbols CSV."""
+    with open(path, newline="", encoding="utf-8") as f:
+        return {
+            n.strip() for row in csv.DictReader(f)
+            for n in (row.get("plain_names") or "").split("|") if n.strip()
+        }
+
+
+def is_title_case(text: str) -> bool:
+    """Every word of four letters or more capitalized (and at least two of them), as in most headlines."""
+    long_words = [w for w in _WORD_RE.findall(text) if len(w) >= 4]
+    return len(long_words) >= 2 and all(w[0].isupper() for w in long_words)
+
+
+class AhoCorasick:
+    """Multi-pattern exact matcher over ASCII-folded text."""
+    def __init__(self, patterns: Iterable[Tuple[str, str]]):
+        # Node i: goto edges, failure link, (pattern length, value) outputs
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, str]]] = [[]]
+        for pattern, value in patterns:
+            self._add(pattern.translate(_FOLD), value)
+        self._link()
+
+    def _add(self, pattern: str, value: str) -> None:
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(pattern), value))
+
+    def _link(self) -> None:
+        todo = deque(self._goto[0].values())
+        while todo:
+            node = todo.popleft()
+            for ch, nxt in self._goto[node].items():
+                todo.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> Iterable[Tuple[int, int, str]]:
+        """(start, end, value) for every occurrence, overlapping ones included."""
+        node = 0
+        for i, ch in enumerate(text.translate(_FOLD)):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length, value in self._out[node]:
+                yield i + 1 - length, i + 1, value
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class TickerMatcher:
+    def __init__(self, symbols: Dict[str, List[str]], *, plain_names: Iterable[str] = ()):
+        self.symbols: Set[str] = set(symbols)
+        self.plain_names: Set[str] = {n.translate(_FOLD) for n in plain_names}
+        self._names = AhoCorasick((name, symbol) for symbol, names in symbols.items() for name in names)
+
+    @classmethod
+    def from_csv(cls, path: str) -> "TickerMatcher":
+        return cls(load_symbols(path), plain_names=load_plain_names(path))
+
+    def _company_cue(self, text: str, end: int) -> bool:
+        if text.startswith("'s", end) or text.startswith("’s", end):
+            return True
+        m = _WORD_RE.search(text, end)
+        return m is not None and not text[end:m.start()].strip(" ,") and m.group().lower() in COMPANY_CUES
+
+    def extract(self, text: str) -> List[str]:
+        """Known symbols mentioned in text, sorted."""
+        if not text:
+            return []
+        found: Set[str] = set()
+        for m in _CASHTAG_RE.finditer(text):
+            symbol = m.group(1).upper()
+            if symbol in self.symbols:
+                found.add(symbol)
+        # Bare symbols, unless the whole text is shouted in capitals
+        if not text.isupper():
+            found.update(m.group(1) for m in _SYMBOL_RE.finditer(text) if m.group(1) in self.symbols)
+        title_case = None
+        for start, end, symbol in self._names.find(text):
+            if symbol in found or not text[start].isupper():
+                continue
+            before = text[start - 1] if start else " "
+            after = text[end] if end < len(text) else " "
+            # Allow possessives ("Apple's") but not longer words ("Applebee's", "Meta-analysis")
+            if _is_word_char(before) or _is_word_char(after) or "-" in (before, after):
+                continue
+            if text[start:end].translate(_FOLD) in self.plain_names:
+                if title_case is None:
+                    title_case = is_title_case(text)
+                if title_case and not self._company_cue(text, end):
+                    continue
+            found.add(symbol)
+        return sorted(found)
+
+    def tag(self, article: Dict[str, object]) -> List[str]:
+        """Provider tickers merged with those found in the title and description."""
+        found = set(article.get("tickers") or [])
+        # Separately, since a title-case title and a sentence-case description read differently
+        for key in ("title", "description"):
+            found.update(self.extract(str(article.get(key) or "")))
+        return sorted(found)
+
+
+_matcher: Optional[TickerMatcher] = None
+_matcher_lock = threading.Lock()
+
+
+def get_matcher() -> TickerMatcher:
+    """Process-wide matcher over config.SYMBOLS_PATH, compiled on first use."""
+    global _matcher
+    if _matcher is None:
+        with _matcher_lock:
+            if _matcher is None:
+                _matcher = TickerMatcher.from_csv(config.SYMBOLS_PATH)
+    return _matcher
+
+
+def backfill_tickers(st: "store.Store", *, batch_size: int = 1000) -> int:
+    """Re-tag every stored article into article_tickers. Returns articles tagged."""
+    matcher = get_matcher()
+    tagged = 0
+    last_id = 0
+    while True:
+        rows = st.articles_for_tagging(after_id=last_id, limit=batch_size)
+        if not rows:
+            return tagged
+        st.bulk_save_article_tickers({r["id"]: matcher.tag(r) for r in rows})
+        tagged += len(rows)
+        last_id = rows[-1]["id"]
@@ -1,67 +1,39 @@
-import pandas as pd
+import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
-import torch
 from transformers import AutoTokenizer, AutoModelForSequenceClassification, Trainer, TrainingArguments
+import config
+import predict_text
+import training_data
 
-# --- 1. Load and Prepare Your Labeled Data ---
-print("Loading financial sentiment data...")
-try:
-    # The 'latin1' encoding is often needed for this specific dataset
-    df = pd.read_csv('./dev/data/sentiment_data.csv', encoding='latin1')
-except FileNotFoundError:
-    print("Error: 'sentiment_data.csv' not found. Make sure it's in the same folder.")
-
-# Drop any rows with missing data
-df.dropna(inplace=True)
-
-# Create a mapping from category name to integer ID
-unique_labels = df['Sentiment'].unique()
-label2id = {label: i for i, label in enumerate(unique_labels)}
-id2label = {i: label for i, label in enumerate(unique_labels)}
-
-# Add a new column with the integer labels
-df['label'] = df['Sentiment'].map(label2id)
+# --- 1. Load Pre-trained FinBERT Tokenizer ---
+model_name = "ProsusAI/finbert"
+print(f"Loading tokenizer for '{model_name}'...")
+tokenizer = AutoTokenizer.from_pretrained(model_name)
 
-print(f"Loaded {len(df)} labeled sentences.")
-print(f"Categories found: {list(unique_labels)}")
+# --- 2. Load Your Labeled Data (tokenized once, then memory-mapped from the cache) ---
+print("Loading financial sentiment data...")
+data = training_data.build_cache(config.TRAIN_DATA_PATH, tokenizer, max_length=predict_text.MAX_LENGTH)
+label2id, id2label = data.label2id, data.id2label
 
-# --- 2. Load Pre-trained FinBERT Tokenizer and Model ---
-model_name = "ProsusAI/finbert"
-print(f"Loading tokenizer and model for '{model_name}'...")
+print(f"Loaded {len(data)} labeled sentences (token cache: {data.root}).")
+print(f"Categories found: {list(label2id)}")
 
-tokenizer = AutoTokenizer.from_pretrained(model_name)
 model = AutoModelForSequenceClassification.from_pretrained(
     model_name,
-    num_labels=len(unique_labels),
+    num_labels=len(label2id),
     id2label=id2label,
     label2id=label2id
 )
 
-# --- 3. Create a PyTorch Dataset ---
+# --- 3. Create the Datasets ---
 # Split your data into training and validation sets
-train_df, val_df = train_test_split(df, test_size=0.2, random_state=42, stratify=df['label'])
-
-# Tokenize the text
-train_encodings = tokenizer(train_df['Sentence'].tolist(), truncation=True, padding=True)
-val_encodings = tokenizer(val_df['Sentence'].tolist(), truncation=True, padding=True)
-
-# Create a custom PyTorch Dataset class
-class FinancialDataset(torch.utils.data.Dataset):
-    def __init__(self, encodings, labels):
-        self.encodings = encodings
-        self.labels = labels
-
-    def __getitem__(self, idx):
-        item = {key: torch.tensor(val[idx]) for key, val in self.encodings.items()}
-        item['labels'] = torch.tensor(self.labels[idx])
-        return item
-
-    def __len__(self):
-        return len(self.labels)
-        
-train_dataset = FinancialDataset(train_encodings, train_df['label'].tolist())
-val_dataset = FinancialDataset(val_encodings, val_df['label'].tolist())
+train_idx, val_idx = train_test_split(
+    np.arange(len(data)), test_size=0.2, random_state=42, stratify=np.asarray(data.labels)
+)
+train_dataset = training_data.TokenizedDataset(data, train_idx)
+# Validation order does not affect accuracy, so sort it to pad as little as possible
+val_dataset = training_data.TokenizedDataset(data, val_idx).sorted_by_length()
 
 # --- 4. Fine-Tune the Model with the Trainer API ---
 print("Configuring training...")
@@ -82,6 +54,10 @@ training_args = TrainingArguments(
     load_best_model_at_end=True,     # Load the best model found during training
 )
 
+stats = training_data.padding_stats(train_dataset.lengths, training_args.per_device_train_batch_size)
+print(f"Tokens per epoch: {stats['real_tokens']} real, {stats['padded_tokens']} with length-grouped padding "
+      f"(vs {stats['global_max_tokens']} padded to the longest sentence).")
+
 # Define a function to compute metrics
 def compute_metrics(pred):
     labels = pred.label_ids
@@ -89,12 +65,13 @@ def compute_metrics(pred):
     acc = accuracy_score(labels, preds)
     return {'accuracy': acc}
 
-# Create the Trainer
-trainer = Trainer(
+# Create the Trainer: batches of similar length, each padded only to its own longest sentence
+trainer = training_data.length_grouped_trainer(Trainer)(
     model=model,
     args=training_args,
     train_dataset=train_dataset,
     eval_dataset=val_dataset,
+    data_collator=training_data.DynamicPaddingCollator(tokenizer.pad_token_id),
     compute_metrics=compute_metrics,
 )
 
@@ -109,9 +86,11 @@ eval_results = trainer.evaluate()
 print(f"\nFinal evaluation accuracy: {eval_results['eval_accuracy'] * 100:.2f}%")
 
 # --- 6. Save the Final Model ---
-final_model_path = "./final_model/model"
+final_model_path = config.MODEL_PATH
 trainer.save_model(final_model_path)
 tokenizer.save_pretrained(final_model_path)
-print(f"Model saved to {final_model_path}")
+# A new version id invalidates every cached prediction from the previous model
+version = predict_text.write_model_version(final_model_path)
+print(f"Model saved to {final_model_path} (version {version})")
 
 
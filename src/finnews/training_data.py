@@ -0,0 +1,232 @@
+"""
+Training data for train_model.py: labeled sentences, tokenized once.
+
+Token ids are cached on disk as flat NumPy column files (ids.i32 plus
+row offsets and labels), keyed by a fingerprint of the tokenizer and a
+checksum of the CSV. Reruns memory-map the cache instead of tokenizing
+again. Batches are built by a length-grouped sampler and padded only to
+their own longest sentence by DynamicPaddingCollator.
+
+    python src/finnews/training_data.py ProsusAI/finbert    # build (or show) the cache
+"""
+import hashlib, json, os, shutil, sys
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+import config
+
+TEXT_COLUMN = "Sentence"
+LABEL_COLUMN = "Sentiment"
+# Groups of this many batches are sorted by length before batching
+MEGABATCH_FACTOR = 50
+
+
+def load_labeled(csv_path: Optional[str] = None) -> pd.DataFrame:
+    """Sentence/Sentiment rows without missing values (the dataset is latin-1 encoded)."""
+    df = pd.read_csv(csv_path or config.TRAIN_DATA_PATH, encoding="latin1")
+    return df.dropna(subset=[TEXT_COLUMN, LABEL_COLUMN]).reset_index(drop=True)
+
+
+def file_checksum(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def tokenizer_fingerprint(tokenizer) -> str:
+    """Hash of everything that decides the ids: vocab, normalization and special tokens."""
+    digest = hashlib.sha256(type(tokenizer).__name__.encode("utf-8"))
+    backend = getattr(tokenizer, "backend_tokenizer", None)
+    if backend is not None:
+        state = json.loads(backend.to_str())
+        # Calling the tokenizer switches these on; max_length is part of the cache key anyway
+        state.pop("truncation", None)
+        state.pop("padding", None)
+        digest.update(json.dumps(state, sort_keys=True).encode("utf-8"))
+    else:
+        digest.update(json.dumps(sorted(tokenizer.get_vocab().items())).encode("utf-8"))
+    digest.update(json.dumps(tokenizer.special_tokens_map, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class TokenizedSet:
+    """
+    Ragged token ids for every row: row i is ids[offsets[i]:offsets[i + 1]].
+    Arrays are read-only memmaps of the cache files.
+    """
+    def __init__(self, root: str):
+        self.root = root
+        with open(os.path.join(root, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta: Dict[str, Any] = json.load(f)
+        self.offsets = np.memmap(os.path.join(root, "offsets.i64"), dtype="int64", mode="r")
+        self.labels = np.memmap(os.path.join(root, "labels.i64"), dtype="int64", mode="r")
+        n_ids = int(self.offsets[-1])
+        self.ids = (np.memmap(os.path.join(root, "ids.i32"), dtype="int32", mode="r", shape=(n_ids,))
+                    if n_ids else np.empty(0, dtype="int32"))
+        self.lengths = np.diff(self.offsets)
+
+    @property
+    def label2id(self) -> Dict[str, int]:
+        return self.meta["label2id"]
+
+    @property
+    def id2label(self) -> Dict[int, str]:
+        return {i: label for label, i in self.label2id.items()}
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def row(self, i: int) -> np.ndarray:
+        return self.ids[self.offsets[i]:self.offsets[i + 1]]
+
+
+def build_cache(csv_path: str, tokenizer, *, max_length: int, cache_dir: Optional[str] = None) -> TokenizedSet:
+    """Tokenize csv_path unpadded (or reuse the matching cache) and return the memmapped set."""
+    cache_dir = cache_dir or config.TRAIN_CACHE_PATH
+    key = f"{tokenizer_fingerprint(tokenizer)}-{file_checksum(csv_path)}-{max_length}"
+    root = os.path.join(cache_dir, key)
+    if os.path.exists(os.path.join(root, "meta.json")):
+        return TokenizedSet(root)
+
+    df = load_labeled(csv_path)
+    # Label ids in order of first appearance, as train_model.py always assigned them
+    label2id = {label: i for i, label in enumerate(df[LABEL_COLUMN].unique())}
+    encoded = tokenizer(df[TEXT_COLUMN].astype(str).tolist(), truncation=True, max_length=max_length)["input_ids"]
+    lengths = np.fromiter((len(ids) for ids in encoded), dtype="int64", count=len(encoded))
+
+    tmp = f"{root}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    np.concatenate([[0], np.cumsum(lengths)]).astype("int64").tofile(os.path.join(tmp, "offsets.i64"))
+    np.fromiter((i for ids in encoded for i in ids), dtype="int32", count=int(lengths.sum())).tofile(
+        os.path.join(tmp, "ids.i32"))
+    df[LABEL_COLUMN].map(label2id).to_numpy("int64").tofile(os.path.join(tmp, "labels.i64"))
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"csv": os.path.abspath(csv_path), "rows": len(df), "max_length": max_length,
+                   "label2id": label2id}, f, indent=2)
+    try:
+        os.replace(tmp, root)
+    except OSError:
+        # Another process built the same cache first
+        shutil.rmtree(tmp, ignore_errors=True)
+    return TokenizedSet(root)
+
+
+class TokenizedDataset:
+    """torch-style dataset over a subset of a TokenizedSet's rows."""
+    def __init__(self, data: TokenizedSet, indices: Sequence[int]):
+        self.data = data
+        self.indices = np.asarray(indices, dtype="int64")
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        row = int(self.indices[i])
+        return {"input_ids": self.data.row(row), "labels": int(self.data.labels[row])}
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return self.data.lengths[self.indices]
+
+    def sorted_by_length(self) -> "TokenizedDataset":
+        """Same rows, shortest first: evaluation order does not matter, padding does."""
+        return TokenizedDataset(self.data, self.indices[np.argsort(self.lengths, kind="stable")])
+
+
+class LengthGroupedSampler:
+    """
+    Random batches of similar length. Each epoch shuffles the rows, sorts
+    every group of MEGABATCH_FACTOR * batch_size by length, cuts it into
+    batches and shuffles the batch order. The longest batch comes first so
+    an out-of-memory error shows up immediately.
+    """
+    def __init__(self, lengths: Sequence[int], batch_size: int, *, seed: int = 42):
+        self.lengths = np.asarray(lengths)
+        self.batch_size = max(1, int(batch_size))
+        self.seed = seed
+        self.epoch = 0
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def set_epoch(self, epoch: int) -> None:
+        self.epoch = epoch
+
+    def __iter__(self) -> Iterator[int]:
+        rng = np.random.default_rng(self.seed + self.epoch)
+        self.epoch += 1
+        order = rng.permutation(len(self.lengths))
+        mega = self.batch_size * MEGABATCH_FACTOR
+        batches: List[np.ndarray] = []
+        for start in range(0, len(order), mega):
+            group = order[start:start + mega]
+            group = group[np.argsort(-self.lengths[group], kind="stable")]
+            batches += [group[i:i + self.batch_size] for i in range(0, len(group), self.batch_size)]
+        if not batches:
+            return iter(())
+        longest = max(range(len(batches)), key=lambda b: self.lengths[batches[b][0]])
+        rest = [batches[b] for b in rng.permutation(len(batches)) if b != longest]
+        return iter(int(i) for i in np.concatenate([batches[longest], *rest]))
+
+
+class DynamicPaddingCollator:
+    """Pads each batch to its own longest sequence and builds the attention mask."""
+    def __init__(self, pad_token_id: int = 0):
+        self.pad_token_id = pad_token_id
+
+    def __call__(self, features: List[Dict[str, Any]]) -> Dict[str, Any]:
+        import torch
+
+        width = max(len(f["input_ids"]) for f in features)
+        input_ids = torch.full((len(features), width), self.pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(features), width), dtype=torch.long)
+        for i, f in enumerate(features):
+            n = len(f["input_ids"])
+            input_ids[i, :n] = torch.from_numpy(np.asarray(f["input_ids"], dtype="int64"))
+            attention_mask[i, :n] = 1
+        batch = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "labels" in features[0]:
+            batch["labels"] = torch.tensor([f["labels"] for f in features], dtype=torch.long)
+        return batch
+
+
+def length_grouped_trainer(trainer_cls):
+    """
+    trainer_cls (a transformers Trainer) drawing training batches from
+    LengthGroupedSampler over the train dataset's cached lengths.
+    """
+    class LengthGroupedTrainer(trainer_cls):
+        def _get_train_sampler(self, *args, **kwargs):
+            dataset = self.train_dataset
+            if not isinstance(dataset, TokenizedDataset):
+                return super()._get_train_sampler(*args, **kwargs)
+            batch = self.args.train_batch_size * self.args.gradient_accumulation_steps
+            return LengthGroupedSampler(dataset.lengths, batch, seed=self.args.seed)
+
+    return LengthGroupedTrainer
+
+
+def padding_stats(lengths: Sequence[int], batch_size: int, *, grouped: bool = True, seed: int = 42) -> Dict[str, float]:
+    """Real vs padded tokens per epoch: grouped batches against padding the whole set to its max."""
+    lengths = np.asarray(lengths)
+    real = int(lengths.sum())
+    order = list(LengthGroupedSampler(lengths, batch_size, seed=seed)) if grouped else range(len(lengths))
+    order = np.asarray(list(order))
+    padded = sum(int(lengths[order[i:i + batch_size]].max()) * len(order[i:i + batch_size])
+                 for i in range(0, len(order), batch_size))
+    return {"real_tokens": real, "padded_tokens": padded, "global_max_tokens": int(lengths.max()) * len(lengths),
+            "efficiency": real / padded if padded else 1.0}
+
+
+if __name__ == "__main__":
+    from transformers import AutoTokenizer
+
+    name = sys.argv[1] if len(sys.argv) > 1 else config.MODEL_PATH
+    data = build_cache(config.TRAIN_DATA_PATH, AutoTokenizer.from_pretrained(name), max_length=512)
+    print(f"{len(data)} rows, {len(data.ids)} tokens in {data.root}")
+    print(padding_stats(data.lengths, 16))